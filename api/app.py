@@ -1,20 +1,31 @@
 # api/app.py
-from flask import Flask, request, jsonify, render_template, send_from_directory
-from pymongo import MongoClient
+from flask import Flask, request, jsonify, render_template, g, redirect, make_response
 from bson import ObjectId
-from datetime import datetime
+from datetime import date, datetime
+from functools import wraps
+import hashlib
 import os
-import time
-from werkzeug.utils import secure_filename
-from service.logic import analyze_supplies, analyze_rent, analyze_bills
-from api.utils import to_json
+from service.logic import analyze_supplies, analyze_rent, analyze_bills, next_status_change
+from service.users import resolve_users, roommates_info, get_username
+from service.dashboard import get_dashboard, group_changed, group_revision
+from service.indexes import ensure_indexes
+from service.dates import to_datetime, doc_datetime
+from service.pagination import parse_page_args
+from service.recurrence import create_series, materialize_series, series_edited, end_series, is_upcoming
+from service.writes import insert_document, update_document
+from service.media import save_upload, public_url, process_in_background
+from service.storage import get_store
+from api.utils import to_json, stream_list, MongoJSONProvider
+from api.auth import init_auth
+from api.assets import init_assets
 
-# DB config
-MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "main_db")
+from service.mongo import db
 
-client = MongoClient(MONGO_URL)
-db = client[MONGO_DB_NAME]
+# Fields the bill delete permission check reads
+BILL_PERMISSION_FIELDS = {
+    "group_name": 1, "assigned_to": 1, "created_by": 1,
+    "deletable_visibility": 1, "deletable_by": 1
+}
 
 # Create Flask app that serves templates from project root templates/
 # and static from project root static/
@@ -27,6 +38,63 @@ app = Flask(
     static_folder=os.path.join(PROJECT_ROOT, "static"),
 )
 
+# jsonify encodes ObjectIds and datetimes directly
+app.json = MongoJSONProvider(app)
+
+# Decode the Bearer token once per request into g.user_id
+init_auth(app)
+
+# Fingerprinted static files with caching headers (build with `python -m api.assets`)
+init_assets(app)
+
+
+def conditional_on_revision(view=None, status_sections=()):
+    """
+    Answers a GET of a group's data from the group's revision counter:
+    If-None-Match gets a 304 without the view (and its analyze_* call)
+    running. The ETag also covers the caller, the query string and the
+    day. Views whose statuses (OVERDUE, days_left) depend on the time of
+    day name their status_sections, and the ETag also covers the next
+    time one of those statuses changes.
+    """
+    if view is None:
+        return lambda view: conditional_on_revision(view, status_sections)
+
+    @wraps(view)
+    def wrapped(group_name, *args, **kwargs):
+        if request.method != "GET":
+            return view(group_name, *args, **kwargs)
+        revision = group_revision(db, group_name)
+        if revision is None:
+            return view(group_name, *args, **kwargs)
+        scope = f"{g.user_id}|{request.full_path}|{date.today().isoformat()}"
+        if status_sections:
+            changes_at = next_status_change(db, group_name, status_sections)
+            scope += f"|{changes_at.isoformat() if changes_at else ''}"
+        etag = f"r{revision}-{hashlib.sha1(scope.encode()).hexdigest()[:16]}"
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = make_response(view(group_name, *args, **kwargs))
+            if response.status_code != 200:
+                return response
+        response.set_etag(etag)
+        # Always revalidate; a 304 costs only the indexed lookups above
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+    return wrapped
+
+
+def paged_group_response(data):
+    """
+    Same cursor contract as the other list endpoints: the next page's
+    cursor travels in the X-Next-Cursor header, not in the body.
+    """
+    next_cursor = data.pop("next_cursor", None)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return jsonify(data), 200, headers
+
+
 # Import and register routes blueprint (api endpoints) under /api
 try:
     from .routes import routes as api_routes
@@ -89,53 +157,53 @@ def rent_status():
 
 # Bills Routes
 @app.route("/api/groups/<group_name>/members", methods=["GET"])
+@conditional_on_revision
 def get_group_members_by_name(group_name):
     """Get group members by group name"""
     try:
-        group = db.groups.find_one({"name": group_name})
+        group = db.groups.find_one({"name": group_name}, {"roommates": 1})
         if not group:
             return jsonify({"error": "Group not found"}), 404
         
         roommate_ids = group.get("roommates", [])
-        roommates_info = []
-        for rm_id in roommate_ids:
-            try:
-                user = db.users.find_one({"_id": ObjectId(rm_id)})
-                if user:
-                    roommates_info.append({
-                        "user_id": str(rm_id),
-                        "username": user.get("username", ""),
-                        "email": user.get("email", "")
-                    })
-            except Exception:
-                pass
-        
-        return jsonify({"members": roommates_info}), 200
+        users = resolve_users(db, roommate_ids)
+        return jsonify({"members": roommates_info(roommate_ids, users)}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/groups/<group_name>/dashboard", methods=["GET"])
+def dashboard_route(group_name):
+    """Get the home page summary for a group from its precomputed snapshot"""
+    if not group_name or group_name == "null" or group_name == "undefined":
+        return jsonify({"error": "Invalid group name"}), 400
+    try:
+        # Private bills and events are counted for the signed-in user only
+        dashboard = get_dashboard(db, group_name, g.user_id)
+        user_id = request.args.get("user_id")
+        if user_id:
+            dashboard["group_count"] = db.groups.count_documents({"roommates": user_id})
+        return jsonify(dashboard), 200
+    except Exception as e:
+        app.logger.error(f"Error getting dashboard: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/api/groups/<group_name>/bills", methods=["GET", "POST"])
+@conditional_on_revision(status_sections=("bills",))
 def bills_route(group_name):
     """Get all bills for a group or create a new bill"""
     if not group_name or group_name == "null" or group_name == "undefined":
         return jsonify({"error": "Invalid group name"}), 400
     
     if request.method == "GET":
-        # Get current user ID from token
-        user_id = None
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            try:
-                import jwt
-                token = auth_header.split(" ")[1]
-                jwt_secret = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
-                payload = jwt.decode(token, jwt_secret, algorithms=["HS256"])
-                user_id = payload.get("user_id")
-            except Exception:
-                pass
+        user_id = g.user_id
+        
+        try:
+            after, limit = parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        results = analyze_bills(db, group_name, user_id)
-        return jsonify(results), 200
+        results = analyze_bills(db, group_name, user_id, after, limit)
+        return paged_group_response(results)
     
     else:  # POST
         try:
@@ -148,38 +216,21 @@ def bills_route(group_name):
                 return jsonify({"error": "Missing required fields: name, amount, due_date"}), 400
             
             # Verify group exists
-            group = db.groups.find_one({"name": group_name})
+            group = db.groups.find_one({"name": group_name}, {"_id": 1})
             if not group:
                 return jsonify({"error": f"Group '{group_name}' not found"}), 404
             
-            # Get creator from Authorization header or request
-            creator_id = None
-            auth_header = request.headers.get("Authorization", "")
-            if auth_header.startswith("Bearer "):
-                try:
-                    import jwt
-                    token = auth_header.split(" ")[1]
-                    jwt_secret = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
-                    payload = jwt.decode(token, jwt_secret, algorithms=["HS256"])
-                    creator_id = payload.get("user_id")
-                except Exception:
-                    pass
+            creator_id = g.user_id
             
             # Get assigned user info if provided
             assigned_to_user_id = data.get("assigned_to")
-            assigned_to_username = None
-            if assigned_to_user_id:
-                try:
-                    assigned_user = db.users.find_one({"_id": ObjectId(assigned_to_user_id)})
-                    if assigned_user:
-                        assigned_to_username = assigned_user.get("username", "")
-                except Exception:
-                    pass
+            assigned_to_username = get_username(db, assigned_to_user_id)
             
             bill = {
                 "name": data["name"],
                 "amount": float(data["amount"]),
                 "due_date": data["due_date"],
+                "due_at": to_datetime(data["due_date"]),  # Typed copy for range queries
                 "group_name": group_name,
                 "category": data.get("category", "other"),  # rent, utilities, internet, other
                 "assigned_to": assigned_to_user_id,  # Who this bill belongs to
@@ -203,8 +254,16 @@ def bills_route(group_name):
                 "created_at": datetime.now().isoformat()
             }
             
-            result = db.bills.insert_one(bill)
-            saved = db.bills.find_one({"_id": result.inserted_id})
+            saved = insert_document(db.bills, bill)
+            if bill["is_recurring"]:
+                series = create_series(db, bill)
+                if series:
+                    materialize_series(db, series)
+                    saved["series_id"] = series["_id"]
+                # The series' first occurrences were written too
+                group_changed(db, group_name, "bills")
+            else:
+                group_changed(db, group_name, "bills", docs=[saved])
             return jsonify(to_json(saved)), 201
         except Exception as e:
             app.logger.error(f"Error creating bill: {str(e)}")
@@ -221,18 +280,7 @@ def bill_route(bill_id):
             return jsonify(to_json(bill)), 200
         
         elif request.method == "PATCH":
-            # Get current user ID from token
-            user_id = None
-            auth_header = request.headers.get("Authorization", "")
-            if auth_header.startswith("Bearer "):
-                try:
-                    import jwt
-                    token = auth_header.split(" ")[1]
-                    jwt_secret = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
-                    payload = jwt.decode(token, jwt_secret, algorithms=["HS256"])
-                    user_id = payload.get("user_id")
-                except Exception:
-                    pass
+            user_id = g.user_id
             
             # Check if bill exists and verify creator
             bill = db.bills.find_one({"_id": ObjectId(bill_id)})
@@ -267,59 +315,19 @@ def bill_route(bill_id):
                 update_data["amount"] = float(data["amount"])
             if "due_date" in data:
                 update_data["due_date"] = data["due_date"]
+                update_data["due_at"] = to_datetime(data["due_date"])
             if "category" in data:
                 update_data["category"] = data["category"]
             if "assigned_to" in data:
                 assigned_to_user_id = data["assigned_to"]
                 update_data["assigned_to"] = assigned_to_user_id
                 # Get username for display
-                assigned_to_username = None
-                if assigned_to_user_id:
-                    try:
-                        assigned_user = db.users.find_one({"_id": ObjectId(assigned_to_user_id)})
-                        if assigned_user:
-                            assigned_to_username = assigned_user.get("username", "")
-                    except Exception:
-                        pass
-                update_data["assigned_to_username"] = assigned_to_username
+                update_data["assigned_to_username"] = get_username(db, assigned_to_user_id)
             if "paid" in data:
                 update_data["paid"] = data["paid"]
                 if data["paid"]:
                     update_data["paid_at"] = datetime.now().isoformat()
                     update_data["paid_by"] = data.get("paid_by")
-                    
-                    # If recurring bill is paid, create next occurrence
-                    bill = db.bills.find_one({"_id": ObjectId(bill_id)})
-                    if bill and bill.get("is_recurring") and bill.get("recurring_days"):
-                        from datetime import timedelta
-                        current_due = datetime.fromisoformat(bill["due_date"])
-                        next_due = current_due + timedelta(days=bill["recurring_days"])
-                        
-                        next_bill = {
-                            "name": bill["name"],
-                            "amount": bill["amount"],
-                            "due_date": next_due.isoformat().split('T')[0],  # Just the date part
-                            "group_name": bill["group_name"],
-                            "category": bill.get("category", "other"),
-                            "assigned_to": bill.get("assigned_to"),  # Inherit assigned_to from original bill
-                            "assigned_to_username": bill.get("assigned_to_username"),  # Inherit username
-                            "paid": False,
-                            "is_recurring": True,
-                            "recurring_frequency": bill.get("recurring_frequency"),
-                            "recurring_days": bill["recurring_days"],
-                            "notification_frequency": bill.get("notification_frequency", "daily"),
-                            "notification_days_before": bill.get("notification_days_before"),
-                            "visibility": bill.get("visibility", "all"),
-                            "visible_to": bill.get("visible_to", []),
-                            "editable_visibility": bill.get("editable_visibility", "only_me"),
-                            "editable_by": bill.get("editable_by", []),
-                            "deletable_visibility": bill.get("deletable_visibility", "only_me"),
-                            "deletable_by": bill.get("deletable_by", []),
-                            "notes": bill.get("notes", ""),
-                            "created_by": bill.get("created_by"),  # Inherit creator from original bill
-                            "created_at": datetime.now().isoformat()
-                        }
-                        db.bills.insert_one(next_bill)
             if "notes" in data:
                 update_data["notes"] = data["notes"]
             if "is_recurring" in data:
@@ -348,33 +356,31 @@ def bill_route(bill_id):
             if not update_data:
                 return jsonify({"error": "No fields to update"}), 400
             
-            result = db.bills.update_one(
+            updated = update_document(
+                db.bills,
                 {"_id": ObjectId(bill_id)},
                 {"$set": update_data}
             )
             
-            if result.matched_count == 0:
+            if not updated:
                 return jsonify({"error": "Bill not found"}), 404
+            series = series_edited(db, bill, update_data)
+            if series:
+                updated["series_id"] = series["_id"]
+                group_changed(db, bill.get("group_name"), "bills")
+            else:
+                group_changed(db, bill.get("group_name"), "bills", docs=[updated])
             
-            updated = db.bills.find_one({"_id": ObjectId(bill_id)})
             return jsonify(to_json(updated)), 200
         
         else:  # DELETE
-            # Get current user ID from token
-            user_id = None
-            auth_header = request.headers.get("Authorization", "")
-            if auth_header.startswith("Bearer "):
-                try:
-                    import jwt
-                    token = auth_header.split(" ")[1]
-                    jwt_secret = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
-                    payload = jwt.decode(token, jwt_secret, algorithms=["HS256"])
-                    user_id = payload.get("user_id")
-                except Exception:
-                    pass
+            user_id = g.user_id
             
             # Check if bill exists and verify permissions
-            bill = db.bills.find_one({"_id": ObjectId(bill_id)})
+            bill = db.bills.find_one(
+                {"_id": ObjectId(bill_id)},
+                {**BILL_PERMISSION_FIELDS, "series_id": 1, "paid": 1, "due_date": 1, "due_at": 1}
+            )
             if not bill:
                 return jsonify({"error": "Bill not found"}), 404
             
@@ -400,6 +406,14 @@ def bill_route(bill_id):
             result = db.bills.delete_one({"_id": ObjectId(bill_id)})
             if result.deleted_count == 0:
                 return jsonify({"error": "Bill not found"}), 404
+            if bill.get("series_id") and is_upcoming(bill):
+                # Deleting an upcoming occurrence ends its series, or the
+                # materializer would keep creating occurrences; past and
+                # paid occurrences are deleted on their own
+                end_series(db, bill["series_id"], doc_datetime(bill, "due_date", "due_at"))
+                group_changed(db, bill.get("group_name"), "bills")
+            else:
+                group_changed(db, bill.get("group_name"), "bills", removed=[bill_id])
             return jsonify({"message": "Bill deleted successfully"}), 200
     
     except Exception as e:
@@ -407,17 +421,22 @@ def bill_route(bill_id):
         return jsonify({"error": f"Invalid bill ID or operation failed: {str(e)}"}), 400
 
 # Additional API routes that need app instance (from routes.py)
-from service.logic import analyze_chores, mark_chore_complete, get_group_calendar
+from service.logic import analyze_chores, mark_chore_complete, reopen_chore, delete_chore, get_group_calendar, get_custom_events, CHORE_ALREADY_COMPLETED
 
 @app.route("/api/groups/<group_name>/chores", methods=["GET", "POST"])
+@conditional_on_revision(status_sections=("chores",))
 def chores_route(group_name):
     # Validate group_name
     if not group_name or group_name == "null" or group_name == "undefined":
         return jsonify({"error": "Invalid group name. Please select a group first."}), 400
     
     if request.method == "GET":
-        data = analyze_chores(db, group_name)
-        return jsonify(data), 200
+        try:
+            after, limit = parse_page_args(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        data = analyze_chores(db, group_name, after, limit)
+        return paged_group_response(data)
     else:  # POST
         try:
             # Handle both JSON and FormData requests
@@ -437,24 +456,12 @@ def chores_route(group_name):
                     frequency_days = 7
                 media_file = request.files.get("media")
                 
+                media_key = None
                 media_url = None
                 if media_file and media_file.filename:
-                    # Create uploads directory if it doesn't exist
-                    uploads_dir = os.path.join(PROJECT_ROOT, "static", "uploads", "chores")
-                    os.makedirs(uploads_dir, exist_ok=True)
-                    
-                    # Generate secure filename
-                    filename = secure_filename(media_file.filename)
-                    # Add timestamp to avoid conflicts
-                    timestamp = int(time.time() * 1000)
-                    name, ext = os.path.splitext(filename)
-                    filename = f"{name}_{timestamp}{ext}"
-                    
-                    filepath = os.path.join(uploads_dir, filename)
-                    media_file.save(filepath)
-                    
-                    # Store relative URL for serving
-                    media_url = f"/static/uploads/chores/{filename}"
+                    # Stored under its content hash; thumbnails are rendered in the background
+                    media_key = save_upload(media_file.stream, media_file.filename, media_file.mimetype)
+                    media_url = public_url(media_key)
             else:
                 # Handle JSON request
                 data = request.json
@@ -473,6 +480,7 @@ def chores_route(group_name):
                     frequency_days = int(data.get("frequency_days", 7))
                 except (ValueError, TypeError):
                     frequency_days = 7
+                media_key = None
                 media_url = None
             
             # Validate group_name (already checked at top, but double-check)
@@ -480,7 +488,7 @@ def chores_route(group_name):
                 return jsonify({"error": "Invalid group name. Please select a group first."}), 400
             
             # Verify group exists
-            group = db.groups.find_one({"name": group_name})
+            group = db.groups.find_one({"name": group_name}, {"_id": 1})
             if not group:
                 return jsonify({"error": f"Group '{group_name}' not found"}), 404
             
@@ -488,6 +496,7 @@ def chores_route(group_name):
                 "task": task,
                 "assigned_to": assigned_to,
                 "due_date": due_date,
+                "due_at": to_datetime(due_date),  # Typed copy for range queries
                 "group_name": group_name,
                 "status": "pending",
                 "is_recurring": is_recurring,
@@ -495,10 +504,10 @@ def chores_route(group_name):
                 "media_url": media_url
             }
             
-            result = db.chores.insert_one(chore)
-            saved = db.chores.find_one({"_id": result.inserted_id})
-            if not saved:
-                return jsonify({"error": "Failed to save chore"}), 500
+            saved = insert_document(db.chores, chore)
+            group_changed(db, group_name, "chores", docs=[saved])
+            if media_key:
+                process_in_background(db, media_key)
             
             saved_json = to_json(saved)
             app.logger.info(f"Chore created: {saved_json.get('task')} for group {group_name}")
@@ -511,6 +520,7 @@ def chores_route(group_name):
 def complete_chore_route(chore_id):
     try:
         completed_by = None
+        media_key = None
         completion_media_url = None
         
         # Handle both JSON and FormData requests
@@ -520,108 +530,70 @@ def complete_chore_route(chore_id):
             media_file = request.files.get("media")
             
             if media_file and media_file.filename:
-                # Create uploads directory if it doesn't exist
-                uploads_dir = os.path.join(PROJECT_ROOT, "static", "uploads", "chores", "completions")
-                os.makedirs(uploads_dir, exist_ok=True)
-                
-                # Generate secure filename
-                filename = secure_filename(media_file.filename)
-                timestamp = int(time.time() * 1000)
-                name, ext = os.path.splitext(filename)
-                filename = f"complete_{chore_id}_{timestamp}{ext}"
-                
-                filepath = os.path.join(uploads_dir, filename)
-                media_file.save(filepath)
-                
-                # Store relative URL for serving
-                completion_media_url = f"/static/uploads/chores/completions/{filename}"
+                media_key = save_upload(media_file.stream, media_file.filename, media_file.mimetype)
+                completion_media_url = public_url(media_key)
         else:
             # Handle JSON request
             data = request.json or {}
             completed_by = data.get("completed_by") or request.args.get("completed_by")
         
         result = mark_chore_complete(db, chore_id, completed_by, completion_media_url)
+        if result.get("error") == CHORE_ALREADY_COMPLETED:
+            # Completing twice stays a success (a retry, or a roommate who
+            # got there first); only the first completion counts and rotates
+            return jsonify({"message": "Chore already completed."}), 200
         if "error" in result:
             return jsonify(result), 404
+        if media_key:
+            process_in_background(db, media_key)
+            result["completion_media_url"] = completion_media_url
         return jsonify(result), 200
     except Exception as e:
         app.logger.error(f"Error completing chore: {str(e)}")
         return jsonify({"error": f"Failed to complete chore: {str(e)}"}), 500
 
+@app.route("/api/chores/<chore_id>/reopen", methods=["POST"])
+def reopen_chore_route(chore_id):
+    """Marks a completed chore as not done"""
+    try:
+        result = reopen_chore(db, chore_id)
+        if "error" in result:
+            return jsonify(result), 404 if result["error"] == "Chore not found" else 409
+        return jsonify(result), 200
+    except Exception as e:
+        app.logger.error(f"Error reopening chore: {str(e)}")
+        return jsonify({"error": f"Failed to reopen chore: {str(e)}"}), 400
+
+@app.route("/api/chores/<chore_id>", methods=["DELETE"])
+def delete_chore_route(chore_id):
+    try:
+        result = delete_chore(db, chore_id)
+        if "error" in result:
+            return jsonify(result), 404
+        return jsonify(result), 200
+    except Exception as e:
+        app.logger.error(f"Error deleting chore: {str(e)}")
+        return jsonify({"error": f"Invalid chore ID or operation failed: {str(e)}"}), 400
+
 @app.route("/api/groups/<group_name>/calendar", methods=["GET"])
+@conditional_on_revision(status_sections=("bills", "chores", "rent"))
 def get_calendar_route(group_name):
     """Get calendar events - includes both custom events and aggregated chores/bills"""
     try:
-        # Get current user ID from token
-        user_id = None
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            try:
-                import jwt
-                token = auth_header.split(" ")[1]
-                jwt_secret = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
-                payload = jwt.decode(token, jwt_secret, algorithms=["HS256"])
-                user_id = payload.get("user_id")
-            except Exception:
-                pass
+        user_id = g.user_id
         
-        # Get custom calendar events
-        custom_events = []
-        # Get events visible to this user (or all if no user_id)
-        events_query = {"group_name": group_name}
-        all_events = list(db.calendar_events.find(events_query))
-        
-        for event in all_events:
-            visible_to = event.get("visible_to", [])
-            visibility = event.get("visibility", "all")
-            created_by = event.get("created_by")
-            
-            # Check visibility
-            can_see = False
-            if not user_id:
-                # If no user_id, show all events (for backward compatibility)
-                can_see = True
-            elif visibility == "all":
-                can_see = True
-            elif visibility == "only_me":
-                can_see = (created_by == user_id)
-            else:  # custom
-                can_see = (user_id in visible_to) if visible_to else (created_by == user_id)
-            
-            if can_see:
-                start_dt = event.get("start_datetime", "")
-                end_dt = event.get("end_datetime", start_dt)
-                all_day = event.get("all_day", False)
-                
-                # Ensure we have valid datetime strings
-                if not start_dt:
-                    app.logger.warning(f"Event {event.get('_id')} missing start_datetime")
-                    continue
-                
-                custom_events.append({
-                    "id": str(event["_id"]),
-                    "title": event.get("title", ""),
-                    "start_datetime": start_dt,
-                    "end_datetime": end_dt,
-                    "start": start_dt,
-                    "end": end_dt,
-                    "date": start_dt.split('T')[0] if 'T' in start_dt else start_dt.split(' ')[0],  # For backward compatibility
-                    "description": event.get("description", ""),
-                    "type": "event",
-                    "created_by": event.get("created_by"),
-                    "visibility": visibility,
-                    "visible_to": visible_to,
-                    "allDay": all_day,
-                    "all_day": all_day
-                })
+        # Only read events inside the visible range when the client sends one
+        start = request.args.get("start")
+        end = request.args.get("end")
+        custom_events = get_custom_events(db, group_name, user_id, start, end)
         
         # Get aggregated events (chores, bills, supplies)
-        aggregated_events = get_group_calendar(db, group_name)
+        aggregated_events = get_group_calendar(db, group_name, start, end, user_id)
         
         # Combine and return
         all_events = custom_events + aggregated_events
         app.logger.info(f"Returning {len(all_events)} events for group {group_name}: {len(custom_events)} custom, {len(aggregated_events)} aggregated")
-        return jsonify(all_events), 200
+        return stream_list(all_events), 200
     except Exception as e:
         app.logger.error(f"Error getting calendar: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -639,22 +611,11 @@ def create_event_route(group_name):
             return jsonify({"error": "Missing required fields: title, start_datetime"}), 400
         
         # Verify group exists
-        group = db.groups.find_one({"name": group_name})
+        group = db.groups.find_one({"name": group_name}, {"_id": 1})
         if not group:
             return jsonify({"error": f"Group '{group_name}' not found"}), 404
         
-        # Get creator from Authorization header
-        creator_id = None
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            try:
-                import jwt
-                token = auth_header.split(" ")[1]
-                jwt_secret = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
-                payload = jwt.decode(token, jwt_secret, algorithms=["HS256"])
-                creator_id = payload.get("user_id")
-            except Exception:
-                pass
+        creator_id = g.user_id
         
         event = {
             "title": data["title"],
@@ -669,8 +630,8 @@ def create_event_route(group_name):
             "created_at": datetime.now().isoformat()
         }
         
-        result = db.calendar_events.insert_one(event)
-        saved = db.calendar_events.find_one({"_id": result.inserted_id})
+        saved = insert_document(db.calendar_events, event)
+        group_changed(db, group_name, "events", docs=[saved])
         return jsonify(to_json(saved)), 201
     except Exception as e:
         app.logger.error(f"Error creating event: {str(e)}")
@@ -680,18 +641,7 @@ def create_event_route(group_name):
 def event_route(event_id):
     """Get, update, or delete a specific event"""
     try:
-        # Get current user ID from token
-        user_id = None
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            try:
-                import jwt
-                token = auth_header.split(" ")[1]
-                jwt_secret = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
-                payload = jwt.decode(token, jwt_secret, algorithms=["HS256"])
-                user_id = payload.get("user_id")
-            except Exception:
-                pass
+        user_id = g.user_id
         
         if request.method == "GET":
             event = db.calendar_events.find_one({"_id": ObjectId(event_id)})
@@ -717,7 +667,7 @@ def event_route(event_id):
             return jsonify(to_json(event)), 200
         
         elif request.method == "PATCH":
-            event = db.calendar_events.find_one({"_id": ObjectId(event_id)})
+            event = db.calendar_events.find_one({"_id": ObjectId(event_id)}, {"created_by": 1, "group_name": 1})
             if not event:
                 return jsonify({"error": "Event not found"}), 404
             
@@ -746,19 +696,20 @@ def event_route(event_id):
             if not update_data:
                 return jsonify({"error": "No fields to update"}), 400
             
-            result = db.calendar_events.update_one(
+            updated = update_document(
+                db.calendar_events,
                 {"_id": ObjectId(event_id)},
                 {"$set": update_data}
             )
             
-            if result.matched_count == 0:
+            if not updated:
                 return jsonify({"error": "Event not found"}), 404
+            group_changed(db, event.get("group_name"), "events", docs=[updated])
             
-            updated = db.calendar_events.find_one({"_id": ObjectId(event_id)})
             return jsonify(to_json(updated)), 200
         
         else:  # DELETE
-            event = db.calendar_events.find_one({"_id": ObjectId(event_id)})
+            event = db.calendar_events.find_one({"_id": ObjectId(event_id)}, {"created_by": 1, "group_name": 1})
             if not event:
                 return jsonify({"error": "Event not found"}), 404
             
@@ -769,18 +720,20 @@ def event_route(event_id):
             result = db.calendar_events.delete_one({"_id": ObjectId(event_id)})
             if result.deleted_count == 0:
                 return jsonify({"error": "Event not found"}), 404
+            group_changed(db, event.get("group_name"), "events", removed=[event_id])
             return jsonify({"message": "Event deleted successfully"}), 200
     
     except Exception as e:
         app.logger.error(f"Error with event operation: {str(e)}")
         return jsonify({"error": f"Invalid event ID or operation failed: {str(e)}"}), 400
 
-# Optional: static files served automatically by Flask from static_folder,
-# but this route can help if needed for direct static access
-@app.route("/static/<path:filename>")
-def serve_static(filename):
-    return send_from_directory(app.static_folder, filename)
+@app.route("/files/<path:key>")
+def blob_route(key):
+    """Sends the browser straight to the blob store (a presigned URL on S3)"""
+    return redirect(get_store().url(key), code=302)
 
 if __name__ == "__main__":
+    # Development server only; production runs under gunicorn (api/gunicorn.conf.py)
+    ensure_indexes(db)
     # Default port 8000 matches your previous app.py dev config
-    app.run(host="0.0.0.0", port=int(os.getenv("PORT", 8000)), debug=True)
+    app.run(host="0.0.0.0", port=int(os.getenv("PORT", 8000)), debug=os.getenv("FLASK_DEBUG") == "1")
@@ -0,0 +1,145 @@
+"""
+Static asset fingerprinting and serving. At image build time
+
+    python -m api.assets
+
+copies every file under static/ (except uploads) to
+static/dist/<name>.<hash><ext>, writes gzip and, when the brotli package is
+installed, brotli copies of text assets, and records the mapping in
+static/dist/manifest.json. Templates link assets with asset_url("shared.js"),
+which resolves through the manifest and falls back to the plain file when
+no build has run (development).
+
+Fingerprinted files and content-addressed uploads never change under their
+name, so they are served with an immutable Cache-Control. Everything else
+is revalidated through its ETag. Range requests are honoured throughout,
+so videos can seek.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from flask import current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STATIC_ROOT = os.path.join(PROJECT_ROOT, "static")
+DIST = "dist"
+MANIFEST = "manifest.json"
+# Directories under static/ that are not build inputs
+SKIP_DIRS = {DIST, "uploads"}
+COMPRESSIBLE = {".js", ".css", ".svg", ".json", ".html", ".txt"}
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Paths whose content never changes under the same name
+IMMUTABLE_PREFIXES = (f"{DIST}/", "uploads/media/")
+
+
+def _fingerprint(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _compress(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(f"{path}.gz", "wb") as out:
+        out.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(f"{path}.br", "wb") as out:
+            out.write(brotli.compress(data))
+
+
+def build(static_root=STATIC_ROOT):
+    """Fingerprints and precompresses the static files; returns the manifest."""
+    dist_root = os.path.join(static_root, DIST)
+    shutil.rmtree(dist_root, ignore_errors=True)
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(static_root):
+        if dirpath == static_root:
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+        for filename in filenames:
+            source = os.path.join(dirpath, filename)
+            rel = os.path.relpath(source, static_root).replace(os.sep, "/")
+            name, ext = os.path.splitext(rel)
+            hashed = f"{DIST}/{name}.{_fingerprint(source)}{ext}"
+            target = os.path.join(static_root, *hashed.split("/"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+            if ext in COMPRESSIBLE:
+                _compress(target)
+            manifest[rel] = hashed
+    with open(os.path.join(dist_root, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+_manifest = None
+
+
+def load_manifest(static_root=STATIC_ROOT):
+    """The build manifest, read once per process; {} when there is none."""
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(os.path.join(static_root, DIST, MANIFEST)) as f:
+                _manifest = json.load(f)
+        except FileNotFoundError:
+            _manifest = {}
+    return _manifest
+
+
+def asset_url(filename):
+    """URL of the fingerprinted copy of a static file, if one was built."""
+    return url_for("static", filename=load_manifest().get(filename, filename))
+
+
+def _precompressed(filename):
+    """The best precompressed variant the client accepts, as (file, encoding)."""
+    if os.path.splitext(filename)[1] not in COMPRESSIBLE:
+        return None, None
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        if encoding in request.accept_encodings:
+            candidate = filename + suffix
+            if os.path.exists(os.path.join(current_app.static_folder, *candidate.split("/"))):
+                return candidate, encoding
+    return None, None
+
+
+def serve_static(filename):
+    """Replaces Flask's static view: caching headers, precompression, ranges."""
+    encoded, encoding = _precompressed(filename)
+    if encoded:
+        response = send_from_directory(
+            current_app.static_folder, encoded,
+            mimetype=mimetypes.guess_type(filename)[0], conditional=True
+        )
+        response.headers["Content-Encoding"] = encoding
+    else:
+        response = send_from_directory(current_app.static_folder, filename, conditional=True)
+    if os.path.splitext(filename)[1] in COMPRESSIBLE:
+        response.vary.add("Accept-Encoding")
+    if filename.startswith(IMMUTABLE_PREFIXES):
+        response.headers["Cache-Control"] = IMMUTABLE
+    else:
+        response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def init_assets(app):
+    app.jinja_env.globals["asset_url"] = asset_url
+    app.view_functions["static"] = serve_static
+
+
+if __name__ == "__main__":
+    for source, hashed in build().items():
+        print(f"{source} -> {hashed}")
@@ -0,0 +1,180 @@
+"""
+asyncio serving path for the read-heavy group and invitation endpoints,
+on Quart with PyMongo's async client. Responses match the Flask routes.
+
+    pip install -r api/requirements-async.txt
+    uvicorn api.async_app:app --workers 4 --port 8001
+
+Route /api/groups* and /api/invitations GETs here from the reverse proxy;
+everything else stays on the gunicorn app. Long-lived event streams
+(/api/groups/<name>/stream) belong here too: an idle stream costs a
+coroutine, where on gunicorn it would hold a worker thread.
+"""
+import asyncio
+import os
+from bson import ObjectId
+from quart import Quart, Response, jsonify, request
+from api.auth import verify_token
+from api.utils import dumps, to_json
+from service.changefeed import get_feed
+from service.dashboard import GROUP_RESPONSE_PROJECTION
+from service.mongo import get_async_db
+from service.pagination import fetch_page_async, parse_page_args
+from service.users import resolve_users_async, roommates_info
+
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+
+app = Quart(__name__)
+
+
+def _paged_response(items, next_cursor):
+    """Same contract as api.routes.paged_response: cursor in X-Next-Cursor."""
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return jsonify(items), 200, headers
+
+
+@app.route("/api/groups/<group_id>", methods=["GET"])
+async def get_group(group_id):
+    """Get a group by ID with roommates info"""
+    db = get_async_db()
+    try:
+        group = await db.groups.find_one({"_id": ObjectId(group_id)}, GROUP_RESPONSE_PROJECTION)
+    except Exception:
+        return jsonify({"error": "Invalid group ID"}), 400
+    if not group:
+        return jsonify({"error": "Group not found"}), 404
+
+    group_json = to_json(group)
+    roommate_ids = group.get("roommates", [])
+    users = await resolve_users_async(db, roommate_ids)
+    group_json["roommates_info"] = roommates_info(roommate_ids, users)
+    return jsonify(group_json), 200
+
+
+@app.route("/api/groups", methods=["GET"])
+async def get_groups():
+    """Get all groups (optional: filter by created_by or roommates) with roommates info"""
+    db = get_async_db()
+    query = {}
+    if request.args.get("created_by"):
+        query["created_by"] = request.args["created_by"]
+    if request.args.get("roommate_id"):
+        query["roommates"] = request.args["roommate_id"]
+
+    try:
+        after, limit = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    groups, next_cursor = await fetch_page_async(db.groups, query, after, limit, GROUP_RESPONSE_PROJECTION)
+
+    # Roommates and creators of every group resolved in one query
+    user_ids = set()
+    for g in groups:
+        user_ids.update(g.get("roommates", []))
+        if not g.get("created_by_username") and g.get("created_by"):
+            user_ids.add(g["created_by"])
+    users = await resolve_users_async(db, user_ids)
+
+    groups_json = []
+    for g in groups:
+        group_json = to_json(g)
+        if not group_json.get("created_by_username") and group_json.get("created_by"):
+            creator = users.get(str(group_json["created_by"]))
+            if creator:
+                group_json["created_by_username"] = creator["username"]
+        group_json["roommates_info"] = roommates_info(g.get("roommates", []), users)
+        groups_json.append(group_json)
+    return _paged_response(groups_json, next_cursor)
+
+
+async def _groups_by_id(db, group_ids):
+    if not group_ids:
+        return {}
+    cursor = db.groups.find({"_id": {"$in": group_ids}}, {"name": 1, "created_by_username": 1})
+    return {str(group["_id"]): group async for group in cursor}
+
+
+@app.route("/api/invitations", methods=["GET"])
+async def get_invitations():
+    """Get pending invitations for the current user"""
+    db = get_async_db()
+    user_id = request.args.get("user_id")
+    if not user_id:
+        return jsonify({"error": "user_id required"}), 400
+
+    invitations = await db.group_invitations.find({
+        "invited_user_id": user_id,
+        "status": "pending"
+    }).to_list(None)
+
+    group_ids = []
+    for inv in invitations:
+        try:
+            group_ids.append(ObjectId(inv["group_id"]))
+        except Exception:
+            pass
+    # The group and inviter lookups are independent, so run them together
+    groups, inviters = await asyncio.gather(
+        _groups_by_id(db, group_ids),
+        resolve_users_async(db, [inv.get("inviter_id") for inv in invitations])
+    )
+
+    invitations_json = []
+    for inv in invitations:
+        inv_json = to_json(inv)
+        group = groups.get(str(inv.get("group_id")))
+        if group:
+            inv_json["group"] = {
+                "id": str(group["_id"]),
+                "name": group.get("name", ""),
+                "created_by_username": group.get("created_by_username", "")
+            }
+        inviter = inviters.get(str(inv.get("inviter_id")))
+        if inviter:
+            inv_json["inviter_username"] = inviter["username"]
+        invitations_json.append(inv_json)
+
+    return jsonify(invitations_json), 200
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {dumps(data)}\n\n".encode()
+
+
+@app.route("/api/groups/<group_name>/stream", methods=["GET"])
+async def group_stream(group_name):
+    """Server-sent events with a group's changes (see service.changefeed)"""
+    auth_header = request.headers.get("Authorization", "")
+    user_id = verify_token(auth_header.split(" ", 1)[1]) if auth_header.startswith("Bearer ") else None
+    if not user_id:
+        return jsonify({"error": "Authentication required"}), 401
+
+    db = get_async_db()
+    group = await db.groups.find_one({"name": group_name}, {"roommates": 1, "created_by": 1})
+    if not group:
+        return jsonify({"error": "Group not found"}), 404
+    if user_id not in group.get("roommates", []) and user_id != group.get("created_by"):
+        return jsonify({"error": "Not a member of this group"}), 403
+
+    feed = get_feed()
+
+    async def events():
+        async with feed.subscribe(group_name) as queue:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield b": keepalive\n\n"
+                    continue
+                yield _sse(event, data)
+
+    response = Response(events(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # Tells nginx not to buffer the stream
+        "X-Accel-Buffering": "no"
+    })
+    response.timeout = None
+    return response
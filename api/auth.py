@@ -0,0 +1,108 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import jwt
+from flask import g, request
+
+# Loaded once at import instead of on every request
+JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
+JWT_ALGORITHM = "HS256"
+TOKEN_LIFETIME = timedelta(days=7)
+
+
+class VerifiedTokens:
+    """
+    Bounded LRU of tokens whose signature has already been checked, keyed
+    by SHA-256 of the token so raw tokens never sit in memory. Each entry
+    lives until the token's own exp claim.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, expires_at, user_id):
+        with self._lock:
+            self._entries[key] = (expires_at, user_id)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+verified_tokens = VerifiedTokens(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", 4096)))
+
+
+def issue_token(user):
+    """Signs a login token for a user document."""
+    payload = {
+        "user_id": str(user["_id"]),
+        "username": user["username"],
+        "exp": datetime.utcnow() + TOKEN_LIFETIME
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+
+def verify_token(token):
+    """
+    Returns the token's user_id, or None if it is invalid or expired.
+    Repeat presentations of a valid token skip the signature check.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    user_id = verified_tokens.get(key)
+    if user_id is not None:
+        return user_id
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    user_id = payload.get("user_id")
+    # Tokens without exp are still accepted, but only cached briefly
+    expires_at = payload.get("exp", time.time() + 300)
+    if user_id is not None:
+        verified_tokens.put(key, expires_at, user_id)
+    return user_id
+
+
+def load_current_user():
+    """before_request hook: sets g.user_id from the Bearer token, or None."""
+    g.user_id = None
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        g.user_id = verify_token(auth_header.split(" ", 1)[1])
+
+
+def init_auth(app):
+    app.before_request(load_current_user)
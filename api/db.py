@@ -1,8 +1,2 @@
-import os
-from pymongo import MongoClient
-
-MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
-MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "main_db")
-
-client = MongoClient(MONGO_URL)
-db = client[MONGO_DB_NAME]
+# Shared, fork-safe database handle; see service/mongo.py for pool settings
+from service.mongo import db, get_client, get_db
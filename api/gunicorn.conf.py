@@ -0,0 +1,37 @@
+"""
+Production server settings for the API:
+
+    gunicorn -c api/gunicorn.conf.py api.app:app
+
+Every setting can be overridden from the environment.
+"""
+import multiprocessing
+import os
+from pymongo.errors import PyMongoError
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+keepalive = 5
+# Import the app once in the master so workers fork with it already loaded.
+# service.mongo builds a new client in each worker on first use, so no
+# pool is ever shared across the fork.
+preload_app = True
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    """
+    Creates indexes once in the master instead of once per worker. An
+    unreachable database is logged rather than fatal so the API still
+    comes up while Mongo is starting.
+    """
+    from service.indexes import ensure_indexes
+    from service.mongo import get_db
+    try:
+        ensure_indexes(get_db())
+    except PyMongoError as e:
+        server.log.warning(f"Skipping index creation: {str(e)}")
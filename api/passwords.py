@@ -0,0 +1,153 @@
+"""
+Password hashing off the request thread. Hashes are werkzeug's
+"<method>$<salt>$<hash>" strings, so existing users keep working. The
+method and cost come from PASSWORD_HASH_METHOD, e.g. "scrypt:32768:8:1"
+or "pbkdf2:sha256:600000". A hash made with other parameters still
+verifies and is flagged for rehash on the next successful login.
+
+Hashing runs on a small executor (threads by default, since hashlib
+releases the GIL; PASSWORD_HASH_EXECUTOR=process for processes) behind a
+bounded queue. A login burst therefore waits for a hashing slot, or gets
+a 503 (also when its hash times out), instead of occupying every request
+thread with key derivation.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from werkzeug.security import check_password_hash, generate_password_hash
+
+PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+# Hash jobs allowed in flight (running or queued) before callers are turned away
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
+PASSWORD_HASH_TIMEOUT = float(os.getenv("PASSWORD_HASH_TIMEOUT", "10"))
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue stays full; callers should answer 503."""
+
+
+class PasswordHasherTimeout(PasswordHasherBusy):
+    """Raised when a hash does not finish within PASSWORD_HASH_TIMEOUT."""
+
+
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_QUEUE)
+
+
+def _get_executor():
+    """One executor per process; a forked worker builds its own."""
+    global _executor, _executor_pid
+    pid = os.getpid()
+    with _lock:
+        if _executor is None or _executor_pid != pid:
+            pool = ProcessPoolExecutor if PASSWORD_HASH_EXECUTOR == "process" else ThreadPoolExecutor
+            _executor = pool(max_workers=PASSWORD_HASH_WORKERS)
+            _executor_pid = pid
+        return _executor
+
+
+def _run(fn, *args):
+    if not _slots.acquire(timeout=PASSWORD_HASH_TIMEOUT):
+        raise PasswordHasherBusy("Too many password checks in progress")
+    try:
+        future = _get_executor().submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    # The slot is held until the hash finishes, not until this caller
+    # stops waiting, so timed-out hashes still count against the queue
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT)
+    except FuturesTimeout:
+        # Still queued: drop it (which frees the slot); running: let it finish
+        future.cancel()
+        raise PasswordHasherTimeout("Password check timed out; try again") from None
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, PASSWORD_HASH_METHOD)
+
+
+def needs_rehash(password_hash):
+    """True when a stored hash was made with a different method or cost."""
+    return password_hash.split("$", 1)[0] != PASSWORD_HASH_METHOD
+
+
+def verify_password(password_hash, password):
+    if not password_hash:
+        return False
+    return _run(check_password_hash, password_hash, password)
+
+
+class LoginStats:
+    """Rolling login latency split into hashing and database time."""
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=window)
+        self.count = 0
+        self.rehashed = 0
+        self.rejected_busy = 0
+
+    def record(self, hash_seconds, db_seconds, rehashed=False):
+        with self._lock:
+            self._samples.append((hash_seconds, db_seconds))
+            self.count += 1
+            if rehashed:
+                self.rehashed += 1
+
+    def busy(self):
+        with self._lock:
+            self.rejected_busy += 1
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+            self.count = self.rehashed = self.rejected_busy = 0
+
+    @staticmethod
+    def _summary(values):
+        if not values:
+            return {"avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        values = sorted(values)
+        pick = lambda pct: values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000
+        return {
+            "avg_ms": round(sum(values) / len(values) * 1000, 2),
+            "p50_ms": round(pick(50), 2),
+            "p95_ms": round(pick(95), 2),
+            "max_ms": round(values[-1] * 1000, 2)
+        }
+
+    def stats(self):
+        with self._lock:
+            samples = list(self._samples)
+            stats = {"count": self.count, "rehashed": self.rehashed, "rejected_busy": self.rejected_busy}
+        stats["hash"] = self._summary([h for h, _ in samples])
+        stats["db"] = self._summary([d for _, d in samples])
+        stats["method"] = PASSWORD_HASH_METHOD.split(":", 1)[0]
+        return stats
+
+
+login_stats = LoginStats()
+
+
+class Timer:
+    """Accumulates wall time over several `with timer:` blocks."""
+
+    def __init__(self):
+        self.seconds = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds += time.perf_counter() - self._start
+        return False
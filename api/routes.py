@@ -1,15 +1,35 @@
 from flask import Blueprint, request, jsonify
 from .db import db
-from .utils import to_json  # converts ObjectId → string
+from service.mongo import pool_stats
+from .utils import to_json, stream_list, chunked  # to_json converts ObjectId → string
+from .auth import issue_token, verified_tokens
+from .passwords import (
+    hash_password, verify_password, needs_rehash, login_stats, Timer, PasswordHasherBusy
+)
 from bson import ObjectId
-from werkzeug.security import generate_password_hash, check_password_hash
-import jwt
-import os
-from datetime import datetime, timedelta
+from datetime import datetime
 from service.logic import analyze_chores, mark_chore_complete, get_group_calendar
+from service.users import resolve_users, roommates_info, user_saved, profile_cache, roster_changed
+from service.pagination import fetch_page, parse_page_args
+from service.leaderboard import get_leaderboard
+from service.writes import insert_document, update_document
+from service.dashboard import bump_revision, GROUP_RESPONSE_PROJECTION
 
 routes = Blueprint("routes", __name__)
 
+# What membership checks and invitations read from a group
+GROUP_MEMBERSHIP_FIELDS = {"name": 1, "roommates": 1, "created_by": 1}
+
+
+def paged_response(items, next_cursor):
+    """
+    List endpoints keep returning a plain JSON array, streamed as it is
+    encoded; the cursor for the next page (if any) travels in the
+    X-Next-Cursor header.
+    """
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return stream_list(items, headers), 200
+
 # User Account Routes
 @routes.route("/users", methods=["POST"])
 def create_user():
@@ -22,12 +42,15 @@ def create_user():
         return jsonify({"error": "Missing required fields: username, email, password"}), 400
     
     # Check if user already exists
-    existing_user = db.users.find_one({"$or": [{"username": data["username"]}, {"email": data["email"]}]})
+    existing_user = db.users.find_one({"$or": [{"username": data["username"]}, {"email": data["email"]}]}, {"_id": 1})
     if existing_user:
         return jsonify({"error": "User with this username or email already exists"}), 409
     
     # Hash the password before saving
-    password_hash = generate_password_hash(data["password"])
+    try:
+        password_hash = hash_password(data["password"])
+    except PasswordHasherBusy as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
     
     # Create user document
     user = {
@@ -39,8 +62,8 @@ def create_user():
         "created_at": data.get("created_at")  # Can be set by client or use default
     }
     
-    result = db.users.insert_one(user)
-    saved = db.users.find_one({"_id": result.inserted_id})
+    saved = insert_document(db.users, user)
+    user_saved(saved)
     saved_json = to_json(saved)
     # Remove password_hash from response for security
     saved_json.pop("password_hash", None)
@@ -61,24 +84,41 @@ def login():
     if not username_or_email:
         return jsonify({"error": "Must provide username or email"}), 400
     
+    hash_timer = Timer()
+    db_timer = Timer()
+    
     # Find user by username or email
-    user = db.users.find_one({"$or": [{"username": username_or_email}, {"email": username_or_email}]})
+    with db_timer:
+        user = db.users.find_one(
+            {"$or": [{"username": username_or_email}, {"email": username_or_email}]},
+            {"username": 1, "password_hash": 1}
+        )
     
     if not user:
         return jsonify({"error": "Invalid username/email or password"}), 401
     
     # Check password
-    if not check_password_hash(user.get("password_hash", ""), password):
+    stored_hash = user.get("password_hash", "")
+    try:
+        with hash_timer:
+            valid = verify_password(stored_hash, password)
+            # Upgrade hashes made with an older method or cost while we have the password
+            new_hash = hash_password(password) if valid and needs_rehash(stored_hash) else None
+    except PasswordHasherBusy as e:
+        login_stats.busy()
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "1"}
+    
+    if not valid:
+        login_stats.record(hash_timer.seconds, db_timer.seconds)
         return jsonify({"error": "Invalid username/email or password"}), 401
     
-    # Generate JWT token
-    jwt_secret = os.getenv("JWT_SECRET", "your-secret-key-change-in-production")
-    token_payload = {
-        "user_id": str(user["_id"]),
-        "username": user["username"],
-        "exp": datetime.utcnow() + timedelta(days=7)  # Token expires in 7 days
-    }
-    token = jwt.encode(token_payload, jwt_secret, algorithm="HS256")
+    if new_hash:
+        with db_timer:
+            db.users.update_one({"_id": user["_id"]}, {"$set": {"password_hash": new_hash}})
+    login_stats.record(hash_timer.seconds, db_timer.seconds, rehashed=bool(new_hash))
+    
+    # Generate JWT token (expires in 7 days)
+    token = issue_token(user)
     
     return jsonify({
         "token": token,
@@ -90,7 +130,7 @@ def login():
 def get_user(user_id):
     """Get a user by ID"""
     try:
-        user = db.users.find_one({"_id": ObjectId(user_id)})
+        user = db.users.find_one({"_id": ObjectId(user_id)}, {"password_hash": 0})
         if not user:
             return jsonify({"error": "User not found"}), 404
         user_json = to_json(user)
@@ -112,12 +152,14 @@ def get_users():
     if email:
         query["email"] = email
     
-    users = list(db.users.find(query))
-    users_json = [to_json(u) for u in users]
-    # Remove password_hash from each user for security
-    for user in users_json:
-        user.pop("password_hash", None)
-    return jsonify(users_json), 200
+    try:
+        after, limit = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    # password_hash never leaves the database
+    users, next_cursor = fetch_page(db.users, query, after, limit, {"password_hash": 0})
+    return paged_response(users, next_cursor)
 
 # Group/Roommate Group Routes
 @routes.route("/groups", methods=["POST"])
@@ -132,7 +174,7 @@ def create_group():
     
     # Validate that created_by user exists
     try:
-        creator = db.users.find_one({"_id": ObjectId(data["created_by"])})
+        creator = db.users.find_one({"_id": ObjectId(data["created_by"])}, {"username": 1})
         if not creator:
             return jsonify({"error": "Creator user not found"}), 404
     except Exception:
@@ -148,8 +190,7 @@ def create_group():
         "created_at": data.get("created_at")
     }
     
-    result = db.groups.insert_one(group)
-    saved = db.groups.find_one({"_id": result.inserted_id})
+    saved = insert_document(db.groups, group)
     saved_json = to_json(saved)
     # Include username in response for display
     saved_json["created_by_username"] = creator.get("username", "")
@@ -159,28 +200,16 @@ def create_group():
 def get_group(group_id):
     """Get a group by ID with roommates info"""
     try:
-        group = db.groups.find_one({"_id": ObjectId(group_id)})
+        group = db.groups.find_one({"_id": ObjectId(group_id)}, GROUP_RESPONSE_PROJECTION)
         if not group:
             return jsonify({"error": "Group not found"}), 404
         
         group_json = to_json(group)
         
-        # Get roommate usernames
+        # Get roommate usernames in one query
         roommate_ids = group.get("roommates", [])
-        roommates_info = []
-        for rm_id in roommate_ids:
-            try:
-                user = db.users.find_one({"_id": ObjectId(rm_id)})
-                if user:
-                    roommates_info.append({
-                        "user_id": rm_id,
-                        "username": user.get("username", ""),
-                        "email": user.get("email", "")
-                    })
-            except Exception:
-                pass
-        
-        group_json["roommates_info"] = roommates_info
+        users = resolve_users(db, roommate_ids)
+        group_json["roommates_info"] = roommates_info(roommate_ids, users)
         return jsonify(group_json), 200
     except Exception as e:
         return jsonify({"error": "Invalid group ID"}), 400
@@ -200,43 +229,42 @@ def get_groups():
     if roommate_id:
         query["roommates"] = roommate_id
     
-    groups = list(db.groups.find(query))
-    groups_json = []
-    for g in groups:
-        group_json = to_json(g)
-        # If username not stored, look it up
-        if not group_json.get("created_by_username") and group_json.get("created_by"):
-            try:
-                creator = db.users.find_one({"_id": ObjectId(group_json["created_by"])})
-                if creator:
-                    group_json["created_by_username"] = creator.get("username", "")
-            except Exception:
-                pass
-        
-        # Get roommate usernames
-        roommate_ids = g.get("roommates", [])
-        roommates_info = []
-        for rm_id in roommate_ids:
-            try:
-                user = db.users.find_one({"_id": ObjectId(rm_id)})
-                if user:
-                    roommates_info.append({
-                        "user_id": rm_id,
-                        "username": user.get("username", ""),
-                        "email": user.get("email", "")
-                    })
-            except Exception:
-                pass
+    try:
+        after, limit = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    groups, next_cursor = fetch_page(db.groups, query, after, limit, GROUP_RESPONSE_PROJECTION)
+    return paged_response(_with_roommates_info(groups), next_cursor)
+
+
+def _with_roommates_info(groups):
+    """
+    Adds roommates_info and creator usernames while the groups stream
+    out. Every roommate and creator in a chunk is resolved in one query.
+    """
+    for chunk in chunked(groups):
+        user_ids = set()
+        for g in chunk:
+            user_ids.update(g.get("roommates", []))
+            if not g.get("created_by_username") and g.get("created_by"):
+                user_ids.add(g["created_by"])
+        users = resolve_users(db, user_ids)
         
-        group_json["roommates_info"] = roommates_info
-        groups_json.append(group_json)
-    return jsonify(groups_json), 200
+        for g in chunk:
+            # If username not stored, look it up
+            if not g.get("created_by_username") and g.get("created_by"):
+                creator = users.get(str(g["created_by"]))
+                if creator:
+                    g["created_by_username"] = creator["username"]
+            g["roommates_info"] = roommates_info(g.get("roommates", []), users)
+            yield g
 
 @routes.route("/groups/<group_id>/roommates", methods=["POST"])
 def add_roommate(group_id):
     """Send an invitation to join a group. Accepts user_id, email, or username."""
     try:
-        group = db.groups.find_one({"_id": ObjectId(group_id)})
+        group = db.groups.find_one({"_id": ObjectId(group_id)}, GROUP_MEMBERSHIP_FIELDS)
         if not group:
             return jsonify({"error": "Group not found"}), 404
     except Exception:
@@ -253,7 +281,7 @@ def add_roommate(group_id):
     user = None
     try:
         # First try as ObjectId
-        user = db.users.find_one({"_id": ObjectId(user_identifier)})
+        user = db.users.find_one({"_id": ObjectId(user_identifier)}, {"username": 1})
     except Exception:
         pass
     
@@ -264,7 +292,7 @@ def add_roommate(group_id):
                 {"email": user_identifier},
                 {"username": user_identifier}
             ]
-        })
+        }, {"username": 1})
     
     if not user:
         return jsonify({"error": "User not found. Please check the user ID, email, or username."}), 404
@@ -281,7 +309,7 @@ def add_roommate(group_id):
         "group_id": group_id,
         "invited_user_id": user_id,
         "status": "pending"
-    })
+    }, {"_id": 1})
     
     if existing_invite:
         return jsonify({"error": "Invitation already sent to this user"}), 409
@@ -313,13 +341,13 @@ def accept_invitation(group_id, user_id):
             "group_id": group_id,
             "invited_user_id": user_id,
             "status": "pending"
-        })
+        }, {"_id": 1})
         
         if not invitation:
             return jsonify({"error": "Invitation not found or already processed"}), 404
         
         # Get group
-        group = db.groups.find_one({"_id": ObjectId(group_id)})
+        group = db.groups.find_one({"_id": ObjectId(group_id)}, GROUP_MEMBERSHIP_FIELDS)
         if not group:
             return jsonify({"error": "Group not found"}), 404
         
@@ -333,10 +361,16 @@ def accept_invitation(group_id, user_id):
             return jsonify({"error": "User is already a roommate in this group"}), 409
         
         # Add roommate to group
-        db.groups.update_one(
+        updated_group = update_document(
+            db.groups,
             {"_id": ObjectId(group_id)},
-            {"$addToSet": {"roommates": user_id}}
+            {"$addToSet": {"roommates": user_id}},
+            GROUP_RESPONSE_PROJECTION
         )
+        if not updated_group:
+            return jsonify({"error": "Group not found"}), 404
+        roster_changed(group.get("name"))
+        bump_revision(db, group.get("name"), sections=("members",))
         
         # Mark invitation as accepted
         db.group_invitations.update_one(
@@ -344,7 +378,6 @@ def accept_invitation(group_id, user_id):
             {"$set": {"status": "accepted", "accepted_at": datetime.now().isoformat()}}
         )
         
-        updated_group = db.groups.find_one({"_id": ObjectId(group_id)})
         return jsonify(to_json(updated_group)), 200
     except Exception as e:
         return jsonify({"error": f"Invalid group ID or user ID: {str(e)}"}), 400
@@ -357,7 +390,7 @@ def decline_invitation(group_id, user_id):
             "group_id": group_id,
             "invited_user_id": user_id,
             "status": "pending"
-        })
+        }, {"_id": 1})
         
         if not invitation:
             return jsonify({"error": "Invitation not found or already processed"}), 404
@@ -379,45 +412,52 @@ def get_invitations():
     if not user_id:
         return jsonify({"error": "user_id required"}), 400
     
-    invitations = list(db.group_invitations.find({
+    invitations = db.group_invitations.find({
         "invited_user_id": user_id,
         "status": "pending"
-    }))
-    
-    # Enrich with group and inviter info
-    invitations_json = []
-    for inv in invitations:
-        inv_json = to_json(inv)
-        # Get group info
-        try:
-            group = db.groups.find_one({"_id": ObjectId(inv["group_id"])})
+    })
+    return stream_list(_with_invitation_details(invitations)), 200
+
+
+def _with_invitation_details(invitations):
+    """
+    Adds group and inviter info while the invitations stream out,
+    fetching each collection once per chunk.
+    """
+    for chunk in chunked(invitations):
+        group_ids = []
+        for inv in chunk:
+            try:
+                group_ids.append(ObjectId(inv["group_id"]))
+            except Exception:
+                pass
+        groups = {}
+        if group_ids:
+            for group in db.groups.find({"_id": {"$in": group_ids}}, {"name": 1, "created_by_username": 1}):
+                groups[str(group["_id"])] = group
+        inviters = resolve_users(db, [inv.get("inviter_id") for inv in chunk])
+        
+        for inv in chunk:
+            # Get group info
+            group = groups.get(str(inv.get("group_id")))
             if group:
-                inv_json["group"] = {
+                inv["group"] = {
                     "id": str(group["_id"]),
                     "name": group.get("name", ""),
                     "created_by_username": group.get("created_by_username", "")
                 }
-        except Exception:
-            pass
-        
-        # Get inviter info
-        if inv.get("inviter_id"):
-            try:
-                inviter = db.users.find_one({"_id": ObjectId(inv["inviter_id"])})
-                if inviter:
-                    inv_json["inviter_username"] = inviter.get("username", "")
-            except Exception:
-                pass
-        
-        invitations_json.append(inv_json)
-    
-    return jsonify(invitations_json), 200
+            
+            # Get inviter info
+            inviter = inviters.get(str(inv.get("inviter_id")))
+            if inviter:
+                inv["inviter_username"] = inviter["username"]
+            yield inv
 
 @routes.route("/groups/<group_id>/roommates/<user_id>", methods=["DELETE"])
 def remove_roommate(group_id, user_id):
     """Remove a roommate from a group"""
     try:
-        group = db.groups.find_one({"_id": ObjectId(group_id)})
+        group = db.groups.find_one({"_id": ObjectId(group_id)}, GROUP_MEMBERSHIP_FIELDS)
         if not group:
             return jsonify({"error": "Group not found"}), 404
         
@@ -430,12 +470,17 @@ def remove_roommate(group_id, user_id):
             return jsonify({"error": "Cannot remove the group creator"}), 403
         
         # Remove roommate
-        db.groups.update_one(
+        updated_group = update_document(
+            db.groups,
             {"_id": ObjectId(group_id)},
-            {"$pull": {"roommates": user_id}}
+            {"$pull": {"roommates": user_id}},
+            GROUP_RESPONSE_PROJECTION
         )
+        if not updated_group:
+            return jsonify({"error": "Group not found"}), 404
+        roster_changed(group.get("name"))
+        bump_revision(db, group.get("name"), sections=("members",))
         
-        updated_group = db.groups.find_one({"_id": ObjectId(group_id)})
         return jsonify(to_json(updated_group)), 200
     except Exception:
         return jsonify({"error": "Invalid group ID or user ID"}), 400
@@ -444,7 +489,7 @@ def remove_roommate(group_id, user_id):
 def delete_group(group_id):
     """Delete a group. Only the creator can delete it."""
     try:
-        group = db.groups.find_one({"_id": ObjectId(group_id)})
+        group = db.groups.find_one({"_id": ObjectId(group_id)}, GROUP_MEMBERSHIP_FIELDS)
         if not group:
             return jsonify({"error": "Group not found"}), 404
         
@@ -456,8 +501,10 @@ def delete_group(group_id):
         if creator_id and str(group.get("created_by")) != str(creator_id):
             return jsonify({"error": "Only the group creator can delete the group"}), 403
         
-        # Delete the group
+        # Delete the group and its dashboard snapshot
         db.groups.delete_one({"_id": ObjectId(group_id)})
+        db.group_dashboards.delete_one({"group_name": group.get("name")})
+        roster_changed(group.get("name"))
         
         return jsonify({"message": "Group deleted successfully"}), 200
     except Exception as e:
@@ -469,41 +516,20 @@ def delete_group(group_id):
 def leaderboard_route(group_name):
     """Get chore completion statistics for the leaderboard"""
     try:
-        pipeline = [
-            {"$match": {
-                "group_name": group_name,
-                "status": "completed", 
-                "completed_by": {"$exists": True, "$ne": None}
-            }},
-            {"$group": {
-                "_id": "$completed_by", 
-                "count": {"$sum": 1}
-            }},
-            {"$sort": {"count": -1}}
-        ]
+        # ?period=week|month ranks only the current week or month
+        try:
+            results = get_leaderboard(db, group_name, request.args.get("period", "all"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        results = list(db.chores.aggregate(pipeline))
+        users = resolve_users(db, [item["user_id"] for item in results])
         
         leaderboard = []
-        
         for item in results:
-            user_identifier = item["_id"]
-            count = item["count"]
-            username = "Unknown"
-            
-            # 4. Try to find the username
-            try:
-                user = db.users.find_one({"_id": ObjectId(user_identifier)})
-                if user:
-                    username = user.get("username", "Unknown")
-                else:
-                    username = str(user_identifier)
-            except:
-                username = str(user_identifier)
-            
+            user = users.get(item["user_id"])
             leaderboard.append({
-                "name": username,
-                "count": count
+                "name": user["username"] if user else item["user_id"],
+                "count": item["count"]
             })
             
         return jsonify(leaderboard), 200
@@ -513,5 +539,16 @@ def leaderboard_route(group_name):
         return jsonify({"error": str(e)}), 500
 
 
+@routes.route("/metrics", methods=["GET"])
+def metrics_route():
+    """Expose in-process cache and connection pool counters for monitoring"""
+    return jsonify({
+        "user_cache": profile_cache.stats(),
+        "token_cache": verified_tokens.stats(),
+        "login": login_stats.stats(),
+        "mongo_pool": pool_stats()
+    }), 200
+
+
 # Note: Routes using @app.route should be registered in app.py after blueprint import
 # to avoid circular imports. These are moved to app.py.
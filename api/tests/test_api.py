@@ -4,6 +4,10 @@ from bson import ObjectId
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash
 from api.app import app
+from service.users import profile_cache, roster_cache
+from api.auth import issue_token, verified_tokens
+from service.dashboard import SNAPSHOT_VERSION, group_changed
+from api.passwords import login_stats, PASSWORD_HASH_METHOD
 
 
 @pytest.fixture
@@ -14,6 +18,18 @@ def client():
         yield client
 
 
+@pytest.fixture(autouse=True)
+def clear_profile_cache():
+    """Keep cached user profiles from leaking between tests"""
+    profile_cache.clear()
+    roster_cache.clear()
+    verified_tokens.clear()
+    yield
+    profile_cache.clear()
+    roster_cache.clear()
+    verified_tokens.clear()
+
+
 @pytest.fixture
 def mock_db():
     """Create a mock database"""
@@ -205,6 +221,9 @@ def test_create_chore(client, mock_db):
         assert response.status_code == 201
         data = response.get_json()
         assert data["task"] == "Clean bathroom"
+        assert data["_id"] == str(fake_id)
+        # The response is built from the inserted document, not re-read
+        assert not mock_db.chores.find_one.called
 
 
 def test_get_chores(client, mock_db):
@@ -241,3 +260,550 @@ def test_complete_chore(client, mock_db):
             assert response.status_code == 200
             data = response.get_json()
             assert "message" in data
+
+
+def test_complete_chore_twice_succeeds(client, mock_db):
+    """Test that completing an already completed chore is still a success"""
+    with patch('api.app.db', mock_db):
+        fake_id = ObjectId()
+        
+        with patch('api.app.mark_chore_complete') as mock_complete:
+            mock_complete.return_value = {"error": "Chore already completed"}
+            
+            response = client.post(f'/api/chores/{fake_id}/complete', json={})
+            
+            assert response.status_code == 200
+            assert response.get_json() == {"message": "Chore already completed."}
+            
+            mock_complete.return_value = {"error": "Chore not found"}
+            response = client.post(f'/api/chores/{fake_id}/complete', json={})
+            assert response.status_code == 404
+
+
+def test_get_groups_resolves_users_in_one_query(client, mock_db):
+    """Test that listing groups looks up all roommates with a single query"""
+    with patch('api.routes.db', mock_db):
+        alice, bob, carol = ObjectId(), ObjectId(), ObjectId()
+        mock_db.groups.find.return_value = [
+            {"_id": ObjectId(), "name": "Group 1", "created_by": str(alice), "roommates": [str(alice), str(bob)]},
+            {"_id": ObjectId(), "name": "Group 2", "created_by": str(carol), "roommates": [str(bob), str(carol)]},
+            {"_id": ObjectId(), "name": "Group 3", "created_by": str(alice), "roommates": [str(alice), str(carol)]}
+        ]
+        mock_db.users.find.return_value = [
+            {"_id": alice, "username": "alice", "email": "a@test.com"},
+            {"_id": bob, "username": "bob", "email": "b@test.com"},
+            {"_id": carol, "username": "carol", "email": "c@test.com"}
+        ]
+        
+        response = client.get(f'/api/groups?roommate_id={bob}')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert mock_db.users.find.call_count == 1
+        assert not mock_db.users.find_one.called
+        assert data[0]["created_by_username"] == "alice"
+        assert [r["username"] for r in data[1]["roommates_info"]] == ["bob", "carol"]
+
+
+def test_get_invitations_batches_lookups(client, mock_db):
+    """Test that invitations are enriched with one groups query and one users query"""
+    with patch('api.routes.db', mock_db):
+        user_id, inviter_id = ObjectId(), ObjectId()
+        group_ids = [ObjectId(), ObjectId()]
+        mock_db.group_invitations.find.return_value = [
+            {"_id": ObjectId(), "group_id": str(gid), "invited_user_id": str(user_id),
+             "inviter_id": str(inviter_id), "status": "pending"}
+            for gid in group_ids
+        ]
+        mock_db.groups.find.return_value = [
+            {"_id": gid, "name": f"Group {i}", "created_by_username": "owner"}
+            for i, gid in enumerate(group_ids)
+        ]
+        mock_db.users.find.return_value = [{"_id": inviter_id, "username": "inviter", "email": "i@test.com"}]
+        
+        response = client.get(f'/api/invitations?user_id={user_id}')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert mock_db.groups.find.call_count == 1
+        assert mock_db.users.find.call_count == 1
+        assert not mock_db.groups.find_one.called
+        assert not mock_db.users.find_one.called
+        assert data[1]["group"]["name"] == "Group 1"
+        assert data[0]["inviter_username"] == "inviter"
+
+
+def test_dashboard_served_from_snapshot(client, mock_db):
+    """Test that the dashboard is one snapshot read and never runs the analyzers"""
+    with patch('api.app.db', mock_db):
+        overdue = datetime.now() - timedelta(days=2)
+        soon = datetime.now() + timedelta(days=2)
+        mock_db.group_dashboards.find_one.return_value = {
+            "group_name": "TestGroup",
+            "version": SNAPSHOT_VERSION,
+            "bills": {"items": {"b1": overdue, "b2": soon}},
+            "chores": {"items": {"c1": soon}},
+            "events": {"items": {"e1": soon.isoformat()}},
+            "supplies": {"items": {}}
+        }
+        mock_db.groups.count_documents.return_value = 2
+        
+        response = client.get('/api/groups/TestGroup/dashboard?user_id=abc')
+        
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["bills"] == {"unpaid": 2, "overdue": 1, "due_soon": 1}
+        assert data["chores"]["due_this_week"] == 1
+        assert data["events"]["this_week"] == 1
+        assert data["group_count"] == 2
+        assert not mock_db.bills.find.called
+        assert not mock_db.chores.find.called
+
+
+def test_dashboard_adds_callers_private_items(client, mock_db):
+    """Test that bills only some members see are counted per user, not snapshotted"""
+    with patch('api.app.db', mock_db):
+        user_id = str(ObjectId())
+        mock_db.group_dashboards.find_one.return_value = {
+            "group_name": "TestGroup", "version": SNAPSHOT_VERSION,
+            "bills": {"items": {}}, "chores": {"items": {}}, "events": {"items": {}}, "supplies": {"items": {}}
+        }
+        mock_db.bills.find.return_value = [{"_id": ObjectId(), "due_at": datetime.now() - timedelta(days=1)}]
+        mock_db.calendar_events.find.return_value = []
+        token = issue_token({"_id": user_id, "username": "alice"})
+        
+        response = client.get('/api/groups/TestGroup/dashboard', headers={"Authorization": f"Bearer {token}"})
+        
+        assert response.get_json()["bills"] == {"unpaid": 1, "overdue": 1, "due_soon": 0}
+        query = mock_db.bills.find.call_args[0][0]
+        assert query["$and"][1] == {"$nor": [{"visibility": "all"}, {"visibility": {"$exists": False}}]}
+        assert {"visibility": "only_me", "created_by": user_id} in query["$and"][2]["$or"]
+
+
+def test_snapshot_shares_list_visibility_rule():
+    """Test that the snapshot holds what every member's bill list shows, null visibility excluded"""
+    from service.dashboard import _section_query, update_dashboard_items
+    from service.logic import bill_visibility_filter
+    shared = _section_query("TestGroup", "bills")["$or"]
+    assert shared == bill_visibility_filter("anyone")["$or"][:2]
+    
+    db = MagicMock()
+    ids = [ObjectId() for _ in range(3)]
+    update_dashboard_items(db, "TestGroup", "bills", docs=[
+        {"_id": ids[0], "due_at": datetime(2030, 1, 1), "visibility": "all"},
+        {"_id": ids[1], "due_at": datetime(2030, 1, 1)},
+        {"_id": ids[2], "due_at": datetime(2030, 1, 1), "visibility": None}
+    ])
+    update = db.group_dashboards.update_one.call_args[0][1]
+    assert f"bills.items.{ids[0]}" in update["$set"] and f"bills.items.{ids[1]}" in update["$set"]
+    assert update["$unset"] == {f"bills.items.{ids[2]}": ""}
+
+
+def test_create_chore_updates_dashboard_entry(client, mock_db):
+    """Test that writing a chore sets just its entry in the snapshot"""
+    with patch('api.app.db', mock_db):
+        fake_id = ObjectId()
+        mock_db.chores.insert_one.return_value.inserted_id = fake_id
+        
+        response = client.post('/api/groups/TestGroup/chores', json={
+            "task": "Vacuum",
+            "due_date": "2030-01-01"
+        })
+        
+        assert response.status_code == 201
+        query, update = mock_db.group_dashboards.update_one.call_args[0]
+        assert query == {"group_name": "TestGroup", "version": SNAPSHOT_VERSION}
+        assert update["$set"][f"chores.items.{fake_id}"] == datetime(2030, 1, 1)
+        # A delta: the section is not re-read
+        assert not mock_db.chores.find.called
+
+
+def test_paid_bill_leaves_dashboard():
+    """Test that a write taking a bill off the dashboard unsets its entry"""
+    db = MagicMock()
+    bill_id = ObjectId()
+    
+    group_changed(db, "TestGroup", "bills", docs=[{"_id": bill_id, "paid": True, "due_date": "2030-01-01"}])
+    
+    update = db.group_dashboards.update_one.call_args[0][1]
+    assert update["$unset"] == {f"bills.items.{bill_id}": ""}
+
+
+def test_get_users_paginated(client, mock_db):
+    """Test that a limited user listing returns the next cursor in a header"""
+    with patch('api.routes.db', mock_db):
+        ids = [ObjectId() for _ in range(3)]
+        cursor = mock_db.users.find.return_value.sort.return_value.limit
+        cursor.return_value = [{"_id": i, "username": "u", "password_hash": "x"} for i in ids]
+        
+        response = client.get('/api/users?limit=2')
+        
+        assert response.status_code == 200
+        assert len(response.get_json()) == 2
+        assert response.headers["X-Next-Cursor"] == str(ids[1])
+        cursor.assert_called_once_with(3)
+        
+        response = client.get('/api/users?after=not-an-id&limit=2')
+        assert response.status_code == 400
+
+
+def test_chores_page_cursor_in_header(client, mock_db):
+    """Test that group lists page like the other list endpoints: cursor in X-Next-Cursor"""
+    with patch('api.app.db', mock_db):
+        ids = [ObjectId() for _ in range(2)]
+        mock_db.chores.find.return_value.sort.return_value.limit.return_value = [
+            {"_id": i, "task": "Dishes", "assigned_to": "a", "due_date": "2030-01-01", "status": "pending"}
+            for i in ids
+        ]
+        
+        response = client.get('/api/groups/TestGroup/chores?limit=1')
+        
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == str(ids[0])
+        assert "next_cursor" not in response.get_json()
+
+
+def test_leaderboard_reads_counters(client, mock_db):
+    """Test that the leaderboard is served from the per-period counters"""
+    with patch('api.routes.db', mock_db):
+        alice, bob = ObjectId(), ObjectId()
+        mock_db.leaderboard_counters.find.return_value.sort.return_value = [
+            {"user_id": str(bob), "count": 5},
+            {"user_id": str(alice), "count": 3}
+        ]
+        mock_db.users.find.return_value = [
+            {"_id": alice, "username": "alice", "email": "a@x.com"},
+            {"_id": bob, "username": "bob", "email": "b@x.com"}
+        ]
+        
+        response = client.get('/api/groups/TestGroup/leaderboard?period=month')
+        
+        assert response.status_code == 200
+        assert response.get_json() == [
+            {"name": "bob", "count": 5},
+            {"name": "alice", "count": 3}
+        ]
+        query = mock_db.leaderboard_counters.find.call_args[0][0]
+        assert query == {"group_name": "TestGroup", "period": datetime.now().strftime("%Y-%m")}
+        assert not mock_db.chores.aggregate.called
+        # Backfilling is the jobs process's business, never a read's
+        assert not mock_db.chores.find.called
+        
+        response = client.get('/api/groups/TestGroup/leaderboard?period=decade')
+        assert response.status_code == 400
+
+
+def test_paying_recurring_bill_only_flips_paid(client, mock_db):
+    """Test that paying a recurring bill no longer creates the next one inline"""
+    with patch('api.app.db', mock_db):
+        bill_id = ObjectId()
+        mock_db.bills.find_one.return_value = {
+            "_id": bill_id, "name": "Internet", "group_name": "TestGroup",
+            "editable_visibility": "all", "is_recurring": True, "recurring_days": 30,
+            "series_id": str(bill_id), "due_date": "2030-01-01"
+        }
+        mock_db.bills.find_one_and_update.return_value = {"_id": bill_id, "name": "Internet", "paid": True}
+        
+        response = client.patch(f'/api/bills/{bill_id}', json={"paid": True})
+        
+        assert response.status_code == 200
+        assert response.get_json()["paid"] is True
+        assert not mock_db.bills.insert_one.called
+        assert not mock_db.bills.bulk_write.called
+        # The updated bill comes back from the write itself
+        assert mock_db.bills.find_one.call_count == 1
+        update = mock_db.bills.find_one_and_update.call_args[0][1]
+        assert update["$set"]["paid"] is True
+
+
+def test_deleting_recurring_bill_ends_series(client, mock_db):
+    """Test that deleting a bill of a series stops the series and its unpaid future bills"""
+    with patch('api.app.db', mock_db):
+        bill_id = ObjectId()
+        mock_db.bills.find_one.return_value = {
+            "_id": bill_id, "group_name": "TestGroup", "deletable_visibility": "all",
+            "series_id": "s1", "due_date": "2030-01-01", "due_at": datetime(2030, 1, 1)
+        }
+        mock_db.bills.delete_one.return_value.deleted_count = 1
+        
+        response = client.delete(f'/api/bills/{bill_id}')
+        
+        assert response.status_code == 200
+        mock_db.bill_series.update_one.assert_called_once_with({"_id": "s1"}, {"$set": {"active": False}})
+        mock_db.bills.delete_many.assert_called_once_with(
+            {"series_id": "s1", "paid": {"$ne": True}, "due_at": {"$gt": datetime(2030, 1, 1)}}
+        )
+
+
+
+def test_deleting_past_paid_occurrence_keeps_series(client, mock_db):
+    """Test that cleaning up a paid past bill of a series leaves the series running"""
+    with patch('api.app.db', mock_db):
+        bill_id = ObjectId()
+        mock_db.bills.find_one.return_value = {
+            "_id": bill_id, "group_name": "TestGroup", "deletable_visibility": "all",
+            "series_id": "s1", "paid": True, "due_date": "2020-01-01", "due_at": datetime(2020, 1, 1)
+        }
+        mock_db.bills.delete_one.return_value.deleted_count = 1
+        
+        response = client.delete(f'/api/bills/{bill_id}')
+        
+        assert response.status_code == 200
+        mock_db.bills.delete_one.assert_called_once_with({"_id": bill_id})
+        assert not mock_db.bill_series.update_one.called
+        assert not mock_db.bills.delete_many.called
+        # Only the deleted bill leaves the dashboard
+        dashboard_update = mock_db.group_dashboards.update_one.call_args[0][1]
+        assert dashboard_update["$unset"] == {f"bills.items.{bill_id}": ""}
+
+
+def test_bearer_token_verified_once(client, mock_db):
+    """Test that the auth layer sets the user from the token and caches the verification"""
+    with patch('api.app.db', mock_db):
+        mock_db.bills.find_one.return_value = None
+        user_id = ObjectId()
+        token = issue_token({"_id": user_id, "username": "alice"})
+        headers = {"Authorization": f"Bearer {token}"}
+        
+        with patch('api.auth.jwt.decode', wraps=__import__('jwt').decode) as decode:
+            client.get('/api/groups/TestGroup/bills', headers=headers)
+            client.get('/api/groups/TestGroup/bills', headers=headers)
+            assert decode.call_count == 1
+        
+        query = mock_db.bills.find.call_args[0][0]
+        assert {"visibility": "only_me", "created_by": str(user_id)} in query["$or"]
+        assert verified_tokens.stats()["hits"] == 1
+
+
+def test_invalid_token_is_anonymous(client, mock_db):
+    """Test that a bad token leaves the request unauthenticated instead of failing it"""
+    with patch('api.app.db', mock_db):
+        mock_db.bills.find_one.return_value = None
+        response = client.get('/api/groups/TestGroup/bills', headers={"Authorization": "Bearer not-a-jwt"})
+        
+        assert response.status_code == 200
+        assert mock_db.bills.find.call_args[0][0] == {"group_name": "TestGroup"}
+        assert verified_tokens.stats()["size"] == 0
+
+
+def test_login_rehashes_outdated_hash(client, mock_db):
+    """Test that a hash made with old parameters is upgraded on successful login"""
+    with patch('api.routes.db', mock_db):
+        fake_id = ObjectId()
+        mock_db.users.find_one.return_value = {
+            "_id": fake_id,
+            "username": "testuser",
+            "password_hash": generate_password_hash("test123", method="pbkdf2:sha256:1000")
+        }
+        login_stats.clear()
+        
+        response = client.post('/api/login', json={"username": "testuser", "password": "test123"})
+        
+        assert response.status_code == 200
+        query, update = mock_db.users.update_one.call_args[0]
+        assert query == {"_id": fake_id}
+        assert update["$set"]["password_hash"].startswith(PASSWORD_HASH_METHOD + "$")
+        stats = client.get('/api/metrics').get_json()["login"]
+        assert stats["count"] == 1 and stats["rehashed"] == 1
+        assert stats["hash"]["max_ms"] > 0
+        
+        # A current hash is left alone
+        mock_db.users.update_one.reset_mock()
+        mock_db.users.find_one.return_value["password_hash"] = update["$set"]["password_hash"]
+        assert client.post('/api/login', json={"username": "testuser", "password": "test123"}).status_code == 200
+        assert not mock_db.users.update_one.called
+
+
+def test_hash_slot_held_until_hash_finishes(monkeypatch):
+    """Test that a timed-out hash keeps its queue slot until it actually finishes"""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from api import passwords
+    pool = ThreadPoolExecutor(max_workers=1)
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(passwords, "_get_executor", lambda: pool)
+    monkeypatch.setattr(passwords, "_slots", slots)
+    monkeypatch.setattr(passwords, "PASSWORD_HASH_TIMEOUT", 0.05)
+    finish = threading.Event()
+    
+    with pytest.raises(passwords.PasswordHasherTimeout):
+        passwords._run(finish.wait)
+    assert not slots.acquire(blocking=False)
+    
+    finish.set()
+    pool.shutdown(wait=True)
+    assert slots.acquire(blocking=False)
+
+
+def test_login_hash_timeout_answers_503(client, mock_db, monkeypatch):
+    """Test that a hash outlasting PASSWORD_HASH_TIMEOUT gets a 503, not a 500"""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from api import passwords
+    pool = ThreadPoolExecutor(max_workers=1)
+    finish = threading.Event()
+    monkeypatch.setattr(passwords, "_get_executor", lambda: pool)
+    monkeypatch.setattr(passwords, "_slots", threading.BoundedSemaphore(4))
+    monkeypatch.setattr(passwords, "PASSWORD_HASH_TIMEOUT", 0.05)
+    monkeypatch.setattr(passwords, "check_password_hash", lambda *args: finish.wait())
+    with patch('api.routes.db', mock_db):
+        mock_db.users.find_one.return_value = {"_id": ObjectId(), "username": "testuser", "password_hash": "x"}
+        login_stats.clear()
+        
+        response = client.post('/api/login', json={"username": "testuser", "password": "test123"})
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        assert login_stats.stats()["rejected_busy"] == 1
+    finish.set()
+    pool.shutdown(wait=True)
+
+
+def test_get_users_streams_ndjson(client, mock_db):
+    """Test that list endpoints stream NDJSON on request and encode BSON types"""
+    with patch('api.routes.db', mock_db):
+        ids = [ObjectId() for _ in range(3)]
+        created = datetime(2024, 5, 1, 12, 30)
+        mock_db.users.find.return_value = [
+            {"_id": i, "username": f"u{n}", "created_at": created} for n, i in enumerate(ids)
+        ]
+        
+        response = client.get('/api/users')
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [u["_id"] for u in data] == [str(i) for i in ids]
+        assert data[0]["created_at"] == "2024-05-01T12:30:00"
+        assert mock_db.users.find.call_args[0][1] == {"password_hash": 0}
+        
+        response = client.get('/api/users', headers={"Accept": "application/x-ndjson"})
+        assert response.mimetype == "application/x-ndjson"
+        lines = response.get_data(as_text=True).splitlines()
+        assert len(lines) == 3
+        assert '"username":"u2"' in lines[2]
+
+
+def test_stream_list_failures_keep_valid_json():
+    """Test that a failing cursor raises before the 200, or closes the array after it"""
+    import json
+    from api.utils import stream_list, STREAM_CHUNK_SIZE
+
+    def failing(count):
+        for n in range(count):
+            yield {"_id": ObjectId(), "n": n}
+        raise RuntimeError("cursor died")
+
+    with app.test_request_context('/api/users'):
+        with pytest.raises(RuntimeError):
+            stream_list(failing(0))
+        
+        response = stream_list(failing(STREAM_CHUNK_SIZE + 5))
+        data = json.loads(response.get_data(as_text=True))
+        assert [d["n"] for d in data] == list(range(STREAM_CHUNK_SIZE))
+
+
+def test_json_provider_passes_options_through():
+    """Test that jsonify-level options such as indent reach the encoder"""
+    oid = ObjectId()
+    assert app.json.dumps({"_id": oid}, indent=2) == '{\n  "_id": "%s"\n}' % oid
+    assert app.json.dumps({"_id": oid}) == '{"_id":"%s"}' % oid
+
+
+def test_group_reads_answer_if_none_match(client, mock_db):
+    """Test that an unchanged group revision gets a 304 without recomputing the list"""
+    with patch('api.app.db', mock_db):
+        mock_db.groups.find_one.return_value = {"_id": ObjectId(), "revision": 4}
+        mock_db.chores.find.return_value = []
+        
+        response = client.get('/api/groups/TestGroup/chores')
+        etag = response.headers["ETag"]
+        assert response.status_code == 200
+        assert etag.startswith('"r4-')
+        
+        mock_db.chores.find.reset_mock()
+        response = client.get('/api/groups/TestGroup/chores', headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert not mock_db.chores.find.called
+        
+        # A different query string is a different representation
+        response = client.get('/api/groups/TestGroup/chores?view=all', headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        
+        mock_db.groups.find_one.return_value = {"_id": ObjectId(), "revision": 5}
+        response = client.get('/api/groups/TestGroup/chores', headers={"If-None-Match": etag})
+        assert response.status_code == 200
+
+
+def test_group_read_etag_expires_when_a_status_flips(client, mock_db):
+    """Test that a chore passing its due time invalidates the cached chores list"""
+    with patch('api.app.db', mock_db):
+        now = datetime.now()
+        mock_db.groups.find_one.return_value = {"_id": ObjectId(), "revision": 4}
+        mock_db.chores.find.return_value = []
+        mock_db.chores.find_one.return_value = {"due_at": now + timedelta(hours=2)}
+        
+        etag = client.get('/api/groups/TestGroup/chores').headers["ETag"]
+        assert client.get('/api/groups/TestGroup/chores', headers={"If-None-Match": etag}).status_code == 304
+        
+        # That chore is now OVERDUE: the next change is a later chore's due time
+        mock_db.chores.find_one.return_value = {"due_at": now + timedelta(days=1)}
+        response = client.get('/api/groups/TestGroup/chores', headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+def test_next_status_change_of_bills():
+    """Test that bill status boundaries come from indexed due_at lookups, not a scan"""
+    from service.logic import next_status_change
+    db = MagicMock()
+    now = datetime(2030, 1, 1, 12, 0)
+    db.bills.find_one.side_effect = [
+        {"due_at": datetime(2030, 1, 9, 18, 0)},   # next to turn OVERDUE
+        {"due_at": datetime(2030, 1, 6, 15, 30)}   # next to turn DUE_SOON (4 days earlier)
+    ]
+    
+    assert next_status_change(db, "TestGroup", ("bills",), now) == datetime(2030, 1, 2, 15, 30)
+    assert not db.bills.find.called
+    query, projection = db.bills.find_one.call_args_list[0][0]
+    assert query == {"group_name": "TestGroup", "paid": {"$ne": True}, "due_at": {"$gt": now}}
+    assert db.bills.find_one.call_args_list[0][1]["sort"] == [("due_at", 1)]
+    
+    db.bills.find_one.side_effect = [None, None]
+    assert next_status_change(db, "TestGroup", ("bills",), now) is None
+
+def test_roster_changes_bump_revision_without_leaking_it(client, mock_db):
+    """Test that accepting and removing roommates use bump_revision and hide its fields"""
+    with patch('api.routes.db', mock_db):
+        group_id, owner, user = ObjectId(), str(ObjectId()), str(ObjectId())
+        mock_db.group_invitations.find_one.return_value = {"_id": ObjectId()}
+        mock_db.groups.find_one.return_value = {"_id": group_id, "name": "TestGroup", "roommates": [owner], "created_by": owner}
+        mock_db.groups.find_one_and_update.return_value = {"_id": group_id, "name": "TestGroup", "roommates": [owner, user]}
+        
+        response = client.post(f'/api/groups/{group_id}/roommates/{user}/accept')
+        
+        assert response.status_code == 200
+        _, update = mock_db.groups.find_one_and_update.call_args[0]
+        assert update == {"$addToSet": {"roommates": user}}
+        assert mock_db.groups.find_one_and_update.call_args[1]["projection"] == {"revision": 0, "changed": 0}
+        mock_db.groups.update_many.assert_called_once_with(
+            {"name": {"$in": ["TestGroup"]}}, {"$inc": {"revision": 1}, "$set": {"changed": ["members"]}}
+        )
+        
+        mock_db.groups.update_many.reset_mock()
+        mock_db.groups.find_one.return_value["roommates"] = [owner, user]
+        response = client.delete(f'/api/groups/{group_id}/roommates/{user}')
+        assert response.status_code == 200
+        _, update = mock_db.groups.find_one_and_update.call_args[0]
+        assert update == {"$pull": {"roommates": user}}
+        assert mock_db.groups.update_many.called
+
+
+def test_writes_bump_group_revision(client, mock_db):
+    """Test that a write to a group's chores advances its revision"""
+    with patch('api.app.db', mock_db):
+        mock_db.chores.insert_one.return_value.inserted_id = ObjectId()
+        
+        client.post('/api/groups/TestGroup/chores', json={"task": "Mop", "due_date": "2030-01-01"})
+        
+        mock_db.groups.update_many.assert_called_once_with(
+            {"name": {"$in": ["TestGroup"]}}, {"$inc": {"revision": 1}, "$set": {"changed": ["chores"]}}
+        )
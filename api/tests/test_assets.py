@@ -0,0 +1,54 @@
+import os
+import pytest
+from api import assets
+from api.app import app
+
+
+@pytest.fixture
+def static_root(tmp_path, monkeypatch):
+    """A built copy of a small static tree served by the app"""
+    (tmp_path / "shared.js").write_text("console.log('hi');\n" * 50)
+    (tmp_path / "uploads" / "media").mkdir(parents=True)
+    (tmp_path / "uploads" / "media" / "clip.mp4").write_bytes(bytes(range(256)) * 4)
+    monkeypatch.setattr(app, "static_folder", str(tmp_path))
+    monkeypatch.setattr(assets, "_manifest", assets.build(str(tmp_path)))
+    app.config["TESTING"] = True
+    yield tmp_path
+
+
+def test_build_fingerprints_and_compresses(static_root):
+    manifest = assets.load_manifest()
+    hashed = manifest["shared.js"]
+
+    assert hashed.startswith("dist/shared.") and hashed.endswith(".js")
+    assert os.path.exists(static_root / f"{hashed}.gz")
+    # Uploads are not build inputs
+    assert not any(key.startswith("uploads/") for key in manifest)
+    with app.test_request_context():
+        assert assets.asset_url("shared.js") == f"/static/{hashed}"
+        assert assets.asset_url("missing.css") == "/static/missing.css"
+
+
+def test_fingerprinted_assets_are_immutable_and_precompressed(static_root):
+    hashed = assets.load_manifest()["shared.js"]
+    with app.test_client() as client:
+        response = client.get(f"/static/{hashed}", headers={"Accept-Encoding": "gzip"})
+        assert response.status_code == 200
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.mimetype == "text/javascript"
+        assert "immutable" in response.headers["Cache-Control"]
+        assert "Accept-Encoding" in response.headers["Vary"]
+
+        # Unhashed files are revalidated through their ETag
+        response = client.get("/static/shared.js")
+        assert response.headers["Cache-Control"] == "no-cache"
+        response = client.get("/static/shared.js", headers={"If-None-Match": response.headers["ETag"]})
+        assert response.status_code == 304
+
+
+def test_media_supports_range_requests(static_root):
+    with app.test_client() as client:
+        response = client.get("/static/uploads/media/clip.mp4", headers={"Range": "bytes=0-99"})
+        assert response.status_code == 206
+        assert len(response.data) == 100
+        assert "immutable" in response.headers["Cache-Control"]
@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from bson import ObjectId
+from api.auth import issue_token
+from service.changefeed import ChangeFeed
+from service.users import profile_cache
+
+pytest.importorskip("quart")
+from api.async_app import app  # noqa: E402
+
+
+class AsyncCursor:
+    """Minimal async cursor over a list of documents"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def limit(self, n):
+        self.docs = self.docs[:n]
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+    def __aiter__(self):
+        self._iter = iter(self.docs)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.fixture(autouse=True)
+def clear_profile_cache():
+    profile_cache.clear()
+    yield
+    profile_cache.clear()
+
+
+def _get(db, path):
+    async def request():
+        with patch("api.async_app.get_async_db", return_value=db):
+            response = await app.test_client().get(path)
+            return response.status_code, await response.get_json(), response.headers
+    return asyncio.run(request())
+
+
+def test_async_invitations_enriched():
+    """Test that the async invitations route fetches groups and inviters once each"""
+    db = MagicMock()
+    inviter, group_id = ObjectId(), ObjectId()
+    db.group_invitations.find.return_value = AsyncCursor([
+        {"_id": ObjectId(), "group_id": str(group_id), "inviter_id": str(inviter), "status": "pending"}
+    ])
+    db.groups.find.return_value = AsyncCursor([{"_id": group_id, "name": "Apt A"}])
+    db.users.find.return_value = AsyncCursor([{"_id": inviter, "username": "alice", "email": "a@x.com"}])
+
+    status, data, _ = _get(db, "/api/invitations?user_id=u1")
+
+    assert status == 200
+    assert data[0]["group"]["name"] == "Apt A"
+    assert data[0]["inviter_username"] == "alice"
+    assert db.groups.find.call_count == 1
+    assert db.users.find.call_count == 1
+
+
+def test_async_groups_paginated():
+    """Test that the async groups route keeps the sync paging contract"""
+    db = MagicMock()
+    ids = [ObjectId() for _ in range(3)]
+    db.groups.find.return_value = AsyncCursor([{"_id": i, "name": "g", "roommates": []} for i in ids])
+    db.users.find.return_value = AsyncCursor([])
+
+    status, data, headers = _get(db, "/api/groups?limit=2")
+
+    assert status == 200
+    assert len(data) == 2
+    assert headers["X-Next-Cursor"] == str(ids[1])
+
+
+def test_group_stream_pushes_changes():
+    """Test that members get the group's changes as server-sent events"""
+    user_id = str(ObjectId())
+    token = issue_token({"_id": user_id, "username": "alice"})
+    db = MagicMock()
+    db.groups.find_one = AsyncMock(return_value={"_id": ObjectId(), "roommates": [user_id]})
+
+    async def request():
+        feed = ChangeFeed(db)
+        # No watcher: the test publishes itself
+        feed._task = asyncio.get_running_loop().create_future()
+        with patch("api.async_app.get_async_db", return_value=db), \
+                patch("api.async_app.get_feed", return_value=feed):
+            client = app.test_client()
+            response = await client.get("/api/groups/Apt%20A/stream")
+            assert response.status_code == 401
+
+            async with client.request(
+                "/api/groups/Apt%20A/stream", headers={"Authorization": f"Bearer {token}"}
+            ) as connection:
+                await connection.send_complete()
+                assert await connection.receive() == b"retry: 5000\n\n"
+                feed.publish("Apt A", "revision", {"revision": 2, "sections": ["bills"]})
+                chunk = await asyncio.wait_for(connection.receive(), 1)
+                assert chunk == b'event: revision\ndata: {"revision":2,"sections":["bills"]}\n\n'
+                assert connection.status_code == 200
+                assert connection.headers["Content-Type"].startswith("text/event-stream")
+                await connection.disconnect()
+
+            db.groups.find_one.return_value = {"_id": ObjectId(), "roommates": []}
+            response = await client.get("/api/groups/Apt%20A/stream", headers={"Authorization": f"Bearer {token}"})
+            assert response.status_code == 403
+        feed._task.cancel()
+    asyncio.run(request())
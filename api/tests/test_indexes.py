@@ -0,0 +1,118 @@
+import os
+import pytest
+from pymongo import MongoClient
+from service.indexes import INDEXES, ensure_indexes
+from service.logic import bill_visibility_filter, event_visibility_filter, date_window_filter
+
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+TEST_DB_NAME = os.getenv("MONGO_DB_NAME", "main_db") + "_index_check"
+
+GROUP = "Index Apartment"
+USER_ID = "64b7f0c2a1b2c3d4e5f60718"
+WINDOW = date_window_filter("2025-12-01", "2026-01-01")
+
+
+@pytest.fixture(scope="module")
+def live_db():
+    """A scratch database on a real mongod; skipped when none is running"""
+    client = MongoClient(MONGO_URL, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command("ping")
+    except Exception:
+        pytest.skip("MongoDB is not reachable for query plan checks")
+    client.drop_database(TEST_DB_NAME)
+    db = client[TEST_DB_NAME]
+    ensure_indexes(db)
+    # A few documents so the planner has something to choose between
+    for collection in INDEXES:
+        db[collection].insert_many([{"group_name": f"{GROUP} {i}"} for i in range(5)])
+    yield db
+    client.drop_database(TEST_DB_NAME)
+    client.close()
+
+
+# (collection, filter) for every hot find() in the API and service layers
+HOT_QUERIES = [
+    ("users", {"$or": [{"username": "alice"}, {"email": "alice"}]}),
+    ("groups", {"name": GROUP}),
+    ("groups", {"roommates": USER_ID}),
+    ("groups", {"created_by": USER_ID}),
+    ("chores", {"group_name": GROUP}),
+    ("chores", {"media_url": "/static/uploads/media/ab/ab.jpg"}),
+    ("chores", {"completion_media.media_url": "/static/uploads/media/ab/ab.jpg"}),
+    ("chores", {"group_name": GROUP, "status": {"$ne": "completed"}, "due_date": WINDOW}),
+    ("bills", {"group_name": GROUP, **bill_visibility_filter(USER_ID)}),
+    ("bills", {"group_name": GROUP, "paid": {"$ne": True}, "due_date": WINDOW}),
+    ("calendar_events", {"$and": [
+        {"group_name": GROUP},
+        {"start_datetime": {"$lt": "2026-01-01"}},
+        event_visibility_filter(USER_ID)
+    ]}),
+    ("supplies", {"group_name": GROUP}),
+    ("rent", {"group_name": GROUP, "due_date": WINDOW}),
+    ("roommates", {"group_name": GROUP}),
+    ("group_invitations", {"invited_user_id": USER_ID, "status": "pending"}),
+    ("group_invitations", {"group_id": "g1", "invited_user_id": USER_ID, "status": "pending"}),
+    ("group_dashboards", {"group_name": GROUP}),
+    ("chores", {"status": "completed", "completed_at": {"$lt": "2026-01-01"}}),
+    ("bills", {"paid": True, "paid_at": {"$lt": "2026-01-01"}}),
+]
+
+
+def _winning_stages(explain):
+    """Yields every stage name under any winningPlan in an explain document"""
+    def stages(node):
+        if isinstance(node, dict):
+            if "stage" in node:
+                yield node["stage"]
+            for value in node.values():
+                yield from stages(value)
+        elif isinstance(node, list):
+            for value in node:
+                yield from stages(value)
+
+    def plans(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key == "winningPlan":
+                    yield value
+                else:
+                    yield from plans(value)
+        elif isinstance(node, list):
+            for value in node:
+                yield from plans(value)
+
+    for plan in plans(explain):
+        yield from stages(plan)
+
+
+@pytest.mark.parametrize("collection,query", HOT_QUERIES)
+def test_hot_query_uses_index(live_db, collection, query):
+    """Fail if a hot query would scan the whole collection"""
+    explain = live_db[collection].find(query).explain()
+    assert "COLLSCAN" not in list(_winning_stages(explain)), f"{collection} {query} is a COLLSCAN"
+
+
+def test_leaderboard_read_uses_index(live_db):
+    """Fail if the leaderboard read scans or sorts the counters in memory"""
+    explain = live_db.leaderboard_counters.find(
+        {"group_name": GROUP, "period": "all"}
+    ).sort("count", -1).explain()
+    stages = list(_winning_stages(explain))
+    assert "COLLSCAN" not in stages
+    assert "SORT" not in stages
+
+
+def test_ensure_indexes_is_idempotent(live_db):
+    """Running ensure_indexes again must not fail or add indexes"""
+    before = {name: len(live_db[name].index_information()) for name in INDEXES}
+    ensure_indexes(live_db)
+    after = {name: len(live_db[name].index_information()) for name in INDEXES}
+    assert before == after
+
+
+def test_registry_covers_hot_collections():
+    """Every collection the API queries by group or user has indexes registered"""
+    for collection in ["users", "groups", "chores", "bills", "calendar_events",
+                       "supplies", "rent", "group_invitations"]:
+        assert INDEXES.get(collection), f"no indexes registered for {collection}"
@@ -1,8 +1,114 @@
+import json
+import logging
+from datetime import date, datetime
 from bson import ObjectId
+from flask import Response, request
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Documents encoded per chunk written to the socket
+STREAM_CHUNK_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+
+def _default(value):
+    """Encodes the BSON types Mongo documents carry."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    """Encodes a document straight to JSON text, ObjectIds and datetimes included."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, default=_default, separators=(",", ":"))
+
+
+class MongoJSONProvider(JSONProvider):
+    """App-wide JSON provider so jsonify() handles Mongo documents as-is."""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Formatting options (indent, sort_keys, ...) need the stdlib encoder
+            kwargs.setdefault("default", _default)
+            return json.dumps(obj, **kwargs)
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return json.loads(s)
+
 
 def to_json(doc):
+    """
+    Copy of a document with a string _id. Only needed where the result is
+    edited before responding; jsonify and stream_list encode ObjectIds
+    themselves.
+    """
     if not doc:
         return doc
     d = dict(doc)
     d["_id"] = str(d["_id"])
     return d
+
+
+def wants_ndjson():
+    return request.accept_mimetypes.best == "application/x-ndjson"
+
+
+def stream_list(items, headers=None):
+    """
+    Streams an iterable of documents (a cursor, a generator or a list) as
+    a chunked JSON array, or as NDJSON when the client asks for
+    application/x-ndjson. Nothing is buffered beyond one chunk, so large
+    responses start immediately and never exist as a whole in memory.
+
+    The first chunk is read before the response is returned, so a query
+    that fails up front raises in the view like any other error. A failure
+    after the 200 has been sent is logged and the array is still closed,
+    so the client gets valid JSON.
+    """
+    ndjson = wants_ndjson()
+    iterator = iter(items)
+
+    def encode(chunk, first):
+        if ndjson:
+            return "".join(dumps(item) + "\n" for item in chunk)
+        return ("" if first else ",") + ",".join(dumps(item) for item in chunk)
+
+    first_chunk = next(chunked(iterator), [])
+
+    def generate():
+        if not ndjson:
+            yield "["
+        if first_chunk:
+            yield encode(first_chunk, True)
+        try:
+            for chunk in chunked(iterator):
+                yield encode(chunk, False)
+        except Exception:
+            logger.exception("List stream failed after the response started")
+        if not ndjson:
+            yield "]"
+
+    mimetype = "application/x-ndjson" if ndjson else "application/json"
+    return Response(generate(), mimetype=mimetype, headers=headers)
+
+
+def chunked(iterable, size=STREAM_CHUNK_SIZE):
+    """Yields lists of up to size items from any iterable."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
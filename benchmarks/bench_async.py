@@ -0,0 +1,39 @@
+"""
+Benchmark: sync (gunicorn + Flask) vs async (uvicorn + Quart) serving of
+the same read endpoint under high concurrency. Start both servers against
+the same database first, e.g.
+
+    gunicorn -c api/gunicorn.conf.py api.app:app                 # :8000
+    uvicorn api.async_app:app --workers 4 --port 8001
+
+then run:
+
+    python -m benchmarks.bench_async --user-id <id> --concurrency 500
+"""
+import argparse
+from benchmarks.load_test import run
+
+PATHS = ["/api/invitations?user_id={user_id}", "/api/groups?roommate_id={user_id}"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sync-base", default="http://localhost:8000")
+    parser.add_argument("--async-base", default="http://localhost:8001")
+    parser.add_argument("--user-id", required=True)
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args()
+
+    print(f"{args.concurrency} concurrent clients, {args.duration:.0f}s per run")
+    print(f"{'path':<40} {'server':>6} {'req/s':>9} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for path in PATHS:
+        path = path.format(user_id=args.user_id)
+        for label, base in (("sync", args.sync_base), ("async", args.async_base)):
+            result = run(base + path, args.concurrency, args.duration)
+            print(f"{path:<40} {label:>6} {result['rps']:>9.1f} {result['errors']:>7} "
+                  f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: bill visibility filtering in Mongo vs. in Python.
+
+Seeds a scratch database with a group holding a fixed number of bills the
+user can see and a growing number of other members' private bills, then
+times analyze_bills (filter pushed into the query) against the old approach
+of reading every bill and filtering in Python.
+
+Usage:
+    MONGO_URL=mongodb://localhost:27017 python -m benchmarks.bench_visibility
+"""
+import os
+import time
+from datetime import datetime, timedelta
+from pymongo import MongoClient
+from service.indexes import ensure_indexes
+from service.logic import analyze_bills
+
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+BENCH_DB_NAME = os.getenv("BENCH_DB_NAME", "bench_visibility")
+GROUP = "Bench Apartment"
+USER_ID = "bench-user"
+VISIBLE_BILLS = 20
+PRIVATE_BILL_COUNTS = [0, 1000, 5000, 20000, 50000]
+REPEATS = 20
+
+
+def _bill(i, visibility, created_by):
+    return {
+        "name": f"Bill {i}",
+        "amount": 10.0,
+        "due_date": (datetime.now() + timedelta(days=i % 30)).strftime("%Y-%m-%d"),
+        "group_name": GROUP,
+        "paid": False,
+        "visibility": visibility,
+        "visible_to": [],
+        "created_by": created_by
+    }
+
+
+def legacy_visible_bills(db):
+    """The pre-pushdown behaviour: read the whole group, filter in Python."""
+    bills = []
+    for bill in db.bills.find({"group_name": GROUP}):
+        visibility = bill.get("visibility", "all")
+        if visibility == "all":
+            bills.append(bill)
+        elif visibility == "only_me" and bill.get("created_by") == USER_ID:
+            bills.append(bill)
+        elif visibility == "custom" and USER_ID in bill.get("visible_to", []):
+            bills.append(bill)
+    return bills
+
+
+def _time(fn):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - start) / REPEATS * 1000
+
+
+def main():
+    client = MongoClient(MONGO_URL)
+    client.drop_database(BENCH_DB_NAME)
+    db = client[BENCH_DB_NAME]
+    ensure_indexes(db)
+
+    db.bills.insert_many([_bill(i, "all", USER_ID) for i in range(VISIBLE_BILLS)])
+
+    print(f"{'private bills':>14} {'pushdown ms':>12} {'legacy ms':>10}")
+    seeded = 0
+    for count in PRIVATE_BILL_COUNTS:
+        if count > seeded:
+            db.bills.insert_many([_bill(i, "only_me", "someone-else") for i in range(seeded, count)])
+            seeded = count
+        pushed = _time(lambda: analyze_bills(db, GROUP, USER_ID))
+        legacy = _time(lambda: legacy_visible_bills(db))
+        print(f"{count:>14} {pushed:>12.2f} {legacy:>10.2f}")
+
+    client.drop_database(BENCH_DB_NAME)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Load test: requests/sec and latency percentiles for one endpoint under
+concurrency, e.g. to compare the Flask dev server with gunicorn.
+
+Usage:
+    python -m benchmarks.load_test --url http://localhost:8000/api/groups \
+        --concurrency 32 --duration 20 [--token <jwt>]
+"""
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.request
+
+
+def _worker(url, headers, deadline, latencies, errors, lock):
+    while time.perf_counter() < deadline:
+        request = urllib.request.Request(url, headers=headers)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+            failed = False
+        except (urllib.error.URLError, OSError):
+            failed = True
+        elapsed = time.perf_counter() - start
+        with lock:
+            if failed:
+                errors[0] += 1
+            else:
+                latencies.append(elapsed)
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))
+    return sorted_values[index]
+
+
+def run(url, concurrency, duration, token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=_worker, args=(url, headers, deadline, latencies, errors, lock))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000/api/groups")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--token", help="JWT sent as a Bearer token")
+    args = parser.parse_args()
+
+    result = run(args.url, args.concurrency, args.duration, args.token)
+    print(f"{args.url} with {args.concurrency} concurrent clients for {args.duration:.0f}s")
+    print(f"{'requests':>10} {'errors':>8} {'req/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    print(f"{result['requests']:>10} {result['errors']:>8} {result['rps']:>10.1f} "
+          f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Backfills BSON datetime fields next to the legacy ISO string dates:
+
+    chores.due_date      -> chores.due_at
+    bills.due_date       -> bills.due_at
+    rent.due_date        -> rent.due_at
+    supplies.last_bought -> supplies.last_bought_at
+
+Only documents missing the typed field are touched, so the script can be
+re-run safely (e.g. after seeding). Use --dry-run to only report counts.
+
+    python mongo/migrate_dates.py [--dry-run]
+"""
+import os
+import sys
+from datetime import datetime
+from pymongo import MongoClient, UpdateOne
+
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+DB_NAME = os.getenv("MONGO_DB_NAME", "main_db")
+BATCH_SIZE = 500
+
+# Kept in sync with service/dates.py DATE_FIELDS
+DATE_FIELDS = {
+    "chores": ("due_date", "due_at"),
+    "bills": ("due_date", "due_at"),
+    "rent": ("due_date", "due_at"),
+    "supplies": ("last_bought", "last_bought_at"),
+}
+
+
+def parse(value):
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=None)
+
+
+def migrate_collection(collection, source, target, dry_run=False):
+    """Returns (migrated, unparseable) counts for one collection."""
+    migrated = 0
+    unparseable = 0
+    batch = []
+    cursor = collection.find(
+        {target: {"$exists": False}, source: {"$type": "string"}},
+        {source: 1}
+    )
+    for doc in cursor:
+        value = parse(doc[source])
+        if value is None:
+            unparseable += 1
+            continue
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {target: value}}))
+        if len(batch) >= BATCH_SIZE:
+            if not dry_run:
+                collection.bulk_write(batch, ordered=False)
+            migrated += len(batch)
+            batch = []
+    if batch:
+        if not dry_run:
+            collection.bulk_write(batch, ordered=False)
+        migrated += len(batch)
+    return migrated, unparseable
+
+
+def migrate(db, dry_run=False):
+    results = {}
+    for name, (source, target) in DATE_FIELDS.items():
+        results[name] = migrate_collection(db[name], source, target, dry_run)
+    return results
+
+
+if __name__ == "__main__":
+    dry_run = "--dry-run" in sys.argv
+    client = MongoClient(MONGO_URL)
+    results = migrate(client[DB_NAME], dry_run=dry_run)
+    for name, (migrated, unparseable) in results.items():
+        verb = "would migrate" if dry_run else "migrated"
+        print(f"{name}: {verb} {migrated}, skipped {unparseable} unparseable")
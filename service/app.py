@@ -1,13 +1,9 @@
 from flask import Flask, request, jsonify
-from pymongo import MongoClient
 import os
 from service.logic import compute_recommendations
-
-MONGO_URL = os.getenv("MONGO_URL", "mongodb://mongo:27017")
-MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "main_db")
-
-client = MongoClient(MONGO_URL)
-db = client[MONGO_DB_NAME]
+from service.indexes import ensure_indexes
+from service.jobs import start_jobs
+from service.mongo import db
 
 # when decide idea --> change item_x to whatever 
 def create_app():
@@ -31,4 +27,8 @@ def create_app():
 app = create_app()
 
 if __name__ == "__main__":
+    # Development server; production runs under gunicorn (service/gunicorn.conf.py)
+    # with the jobs in their own process (python -m service.jobs)
+    ensure_indexes(db)
+    start_jobs(db)
     app.run(host="0.0.0.0", port=8100)
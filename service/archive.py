@@ -0,0 +1,86 @@
+"""
+Moves completed chores and paid bills older than a horizon out of the hot
+collections into chores_archive / bills_archive. The leaderboard reads
+the counters in service/leaderboard.py, so archived completions still
+count there.
+
+    python -m service.archive [--horizon-days N] [--dry-run]
+"""
+import os
+import sys
+from datetime import datetime, timedelta
+from pymongo.errors import BulkWriteError
+from service.dashboard import bump_revision
+from service.mongo import get_db
+
+ARCHIVE_HORIZON_DAYS = int(os.getenv("ARCHIVE_HORIZON_DAYS", "90"))
+BATCH_SIZE = 500
+
+# Hot collection -> (archive collection, filter for finished items, finished timestamp field)
+ARCHIVE_RULES = {
+    "chores": ("chores_archive", {"status": "completed"}, "completed_at"),
+    "bills": ("bills_archive", {"paid": True}, "paid_at"),
+}
+
+
+def _archive_query(rule, cutoff):
+    _, finished, timestamp = rule
+    # completed_at / paid_at are ISO strings, which sort chronologically
+    return {**finished, timestamp: {"$lt": cutoff.isoformat()}}
+
+
+def _copy_to_archive(archive, docs):
+    """
+    Inserts docs under their original _id. Documents already copied by an
+    interrupted earlier run are skipped rather than failing the batch.
+    """
+    try:
+        archive.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+
+
+def archive_collection(db, name, cutoff, dry_run=False):
+    """
+    Moves one collection's finished items older than cutoff in batches.
+    Returns the number of documents moved.
+    """
+    archive_name = ARCHIVE_RULES[name][0]
+    query = _archive_query(ARCHIVE_RULES[name], cutoff)
+    if dry_run:
+        return db[name].count_documents(query)
+
+    moved = 0
+    while True:
+        docs = list(db[name].find(query).limit(BATCH_SIZE))
+        if not docs:
+            break
+        # Copy first, then delete: a crash in between leaves duplicates
+        # that the next run skips, never lost documents
+        _copy_to_archive(db[archive_name], docs)
+        db[name].delete_many({"_id": {"$in": [d["_id"] for d in docs]}})
+        bump_revision(db, *{d.get("group_name") for d in docs})
+        moved += len(docs)
+    return moved
+
+
+def run_archive(db, horizon_days=None, dry_run=False):
+    """Archives everything finished more than horizon_days ago."""
+    horizon_days = ARCHIVE_HORIZON_DAYS if horizon_days is None else horizon_days
+    cutoff = datetime.now() - timedelta(days=horizon_days)
+    results = {}
+    for name in ARCHIVE_RULES:
+        results[name] = archive_collection(db, name, cutoff, dry_run)
+    return results
+
+
+if __name__ == "__main__":
+    dry_run = "--dry-run" in sys.argv
+    horizon_days = None
+    if "--horizon-days" in sys.argv:
+        horizon_days = int(sys.argv[sys.argv.index("--horizon-days") + 1])
+    db = get_db()
+    for name, moved in run_archive(db, horizon_days, dry_run).items():
+        verb = "would archive" if dry_run else "archived"
+        print(f"{name}: {verb} {moved}")
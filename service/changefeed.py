@@ -0,0 +1,157 @@
+"""
+Live change feed for the group pages. One watcher per process follows the
+database and fans changes out to per-group subscriber queues as
+(event, data) pairs:
+
+    chore     a chore, formatted as the chores list returns it, after
+              every insert or update
+    revision  the group's revision moved; data["sections"] names what
+              changed ("bills", "chores", "events", "members"), or is
+              empty when that is unknown and pages should refetch
+
+With a replica set the watcher follows a change stream. A standalone
+mongod has no change streams, so it falls back to polling the revision
+counters of groups that have subscribers every CHANGE_POLL_SECONDS.
+Only chores are sent as deltas: bills and events are filtered per member,
+so their pages refetch on revision events, which the ETags make cheap.
+
+    async with get_feed().subscribe("Apt A") as queue:
+        event, data = await queue.get()
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+from pymongo.errors import OperationFailure
+from service.logic import chore_item
+from service.mongo import get_async_db
+
+CHANGE_POLL_SECONDS = float(os.getenv("CHANGE_POLL_SECONDS", "2"))
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SUBSCRIBER_QUEUE_SIZE", "100"))
+
+# Sections whose changes the change stream delivers as deltas
+DELTA_SECTIONS = {"chores"}
+WATCH_PIPELINE = [{"$match": {"$or": [
+    {"ns.coll": "chores", "operationType": {"$in": ["insert", "update", "replace"]}},
+    {"ns.coll": "groups", "operationType": "update",
+     "updateDescription.updatedFields.revision": {"$exists": True}},
+]}}]
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeFeed:
+    """Per-group fan-out of database changes to asyncio queues."""
+
+    def __init__(self, db, poll_seconds=CHANGE_POLL_SECONDS):
+        self.db = db
+        self.poll_seconds = poll_seconds
+        self.subscribers = {}
+        # "watch" or "poll" once the watcher has started
+        self.mode = None
+        self._task = None
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, group_name):
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        self.subscribers.setdefault(group_name, set()).add(queue)
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+        try:
+            yield queue
+        finally:
+            queues = self.subscribers.get(group_name, set())
+            queues.discard(queue)
+            if not queues:
+                self.subscribers.pop(group_name, None)
+
+    def publish(self, group_name, event, data):
+        for queue in list(self.subscribers.get(group_name, ())):
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                # A subscriber this far behind gets one "refetch everything"
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(("revision", {"sections": []}))
+
+    def resync(self):
+        """Tells every subscriber to refetch, after changes may have been missed."""
+        for group_name in list(self.subscribers):
+            self.publish(group_name, "revision", {"sections": []})
+
+    async def _run(self):
+        while True:
+            try:
+                if self.mode == "poll":
+                    await self.poll()
+                else:
+                    await self.watch()
+            except OperationFailure as e:
+                # Standalone servers reject $changeStream
+                logger.info("Change streams unavailable (%s); polling revisions", e)
+                self.mode = "poll"
+            except Exception:
+                logger.exception("Change feed interrupted; reconnecting")
+                await asyncio.sleep(self.poll_seconds)
+                self.resync()
+
+    async def watch(self):
+        stream = await self.db.watch(WATCH_PIPELINE, full_document="updateLookup")
+        async with stream:
+            self.mode = "watch"
+            async for change in stream:
+                self.dispatch(change)
+
+    def dispatch(self, change):
+        """Publishes one change stream event to the group it belongs to."""
+        doc = change.get("fullDocument")
+        if not doc:
+            # Deleted before the lookup; the revision bump that follows covers it
+            return
+        if change["ns"]["coll"] == "chores":
+            # Lists only carry the latest completion's media
+            doc["completion_media"] = doc.get("completion_media", [])[-1:]
+            self.publish(doc.get("group_name"), "chore", chore_item(doc))
+            return
+        sections = doc.get("changed", [])
+        if sections and set(sections) <= DELTA_SECTIONS:
+            return
+        self.publish(doc["name"], "revision", {"revision": doc.get("revision", 0), "sections": sections})
+
+    async def poll(self):
+        seen = {}
+        while True:
+            names = list(self.subscribers)
+            revisions = {}
+            if names:
+                cursor = self.db.groups.find({"name": {"$in": names}}, {"name": 1, "revision": 1, "changed": 1})
+                async for group in cursor:
+                    name, revision = group["name"], group.get("revision", 0)
+                    revisions[name] = revision
+                    last = seen.get(name)
+                    if last is None or revision == last:
+                        continue
+                    # Only the latest write's sections are stored
+                    sections = group.get("changed", []) if revision == last + 1 else []
+                    self.publish(name, "revision", {"revision": revision, "sections": sections})
+            seen = revisions
+            await asyncio.sleep(self.poll_seconds)
+
+
+_lock = threading.Lock()
+_feed = None
+_feed_pid = None
+
+
+def get_feed():
+    """This process's change feed on the async client, created on first use."""
+    global _feed, _feed_pid
+    pid = os.getpid()
+    with _lock:
+        if _feed is None or _feed_pid != pid:
+            _feed = ChangeFeed(get_async_db())
+            _feed_pid = pid
+        return _feed
@@ -0,0 +1,260 @@
+from datetime import datetime, timedelta
+from service.dates import to_datetime, doc_datetime
+from service.visibility import VISIBLE_TO_ALL, visible_to_all, bill_visibility_filter, event_visibility_filter
+
+# Sections of the per-group dashboard snapshot, one per source collection
+DASHBOARD_SECTIONS = ("bills", "chores", "events", "supplies")
+
+# Bumped when the snapshot layout or contents change; older snapshots are rebuilt
+SNAPSHOT_VERSION = 3
+
+# Source collection and projection of each section
+SECTION_SOURCES = {
+    "bills": ("bills", {"due_date": 1, "due_at": 1}),
+    "chores": ("chores", {"due_date": 1, "due_at": 1}),
+    "events": ("calendar_events", {"start_datetime": 1}),
+    "supplies": ("supplies", {"item": 1, "last_bought": 1, "last_bought_at": 1, "avg_days_between": 1}),
+}
+
+
+def _section_query(group_name, section):
+    """The documents a section of the shared snapshot summarizes."""
+    # Only items everyone in the group can see go into the shared snapshot,
+    # by the same rule the bill and event lists apply
+    if section == "bills":
+        return {"group_name": group_name, "paid": {"$ne": True}, "$or": VISIBLE_TO_ALL}
+    if section == "chores":
+        return {"group_name": group_name, "status": {"$ne": "completed"}}
+    if section == "events":
+        today = datetime.now().strftime("%Y-%m-%d")
+        return {"group_name": group_name, "$or": VISIBLE_TO_ALL, "start_datetime": {"$gte": today}}
+    if section == "supplies":
+        return {"group_name": group_name}
+    raise ValueError(f"Unknown dashboard section: {section}")
+
+
+def _entry(section, doc):
+    """
+    What a section stores for one document, or None when it stores nothing.
+    Due dates are stored rather than counts so the summary stays correct as
+    time passes without any writes to the group.
+    """
+    if section in ("bills", "chores"):
+        return doc_datetime(doc, "due_date", "due_at")
+    if section == "events":
+        return doc.get("start_datetime") or None
+    last_bought = doc_datetime(doc, "last_bought", "last_bought_at")
+    if not last_bought:
+        return None
+    return {"item": doc["item"], "last_bought": last_bought, "avg_days_between": doc.get("avg_days_between", 14)}
+
+
+def _build_section(db, group_name, section):
+    """Reads a whole section: its entries keyed by document id."""
+    collection, fields = SECTION_SOURCES[section]
+    items = {}
+    for doc in getattr(db, collection).find(_section_query(group_name, section), fields):
+        entry = _entry(section, doc)
+        if entry is not None:
+            items[str(doc["_id"])] = entry
+    return {"items": items}
+
+
+def refresh_dashboard(db, group_name, *sections):
+    """
+    Recomputes the given sections of an existing snapshot, or builds the
+    whole snapshot when no sections are given.
+    """
+    update = {section: _build_section(db, group_name, section) for section in sections or DASHBOARD_SECTIONS}
+    update["updated_at"] = datetime.now().isoformat()
+    if sections:
+        db.group_dashboards.update_one({"group_name": group_name, "version": SNAPSHOT_VERSION}, {"$set": update})
+    else:
+        update["version"] = SNAPSHOT_VERSION
+        db.group_dashboards.update_one({"group_name": group_name}, {"$set": update}, upsert=True)
+    return update
+
+
+def _shows(section, doc):
+    """Whether a document belongs in its section; mirrors _section_query."""
+    if section == "bills":
+        return doc.get("paid") is not True and visible_to_all(doc)
+    if section == "chores":
+        return doc.get("status") != "completed"
+    if section == "events":
+        today = datetime.now().strftime("%Y-%m-%d")
+        return visible_to_all(doc) and (doc.get("start_datetime") or "") >= today
+    return True
+
+
+def update_dashboard_items(db, group_name, section, docs=(), removed=()):
+    """
+    Applies writes to single documents as a delta, from the documents the
+    write returned: each one's entry is set, or unset once it no longer
+    shows (paid, completed or not visible to everyone). removed are ids of
+    deleted documents. Snapshots that do not exist yet are left alone; the
+    next read builds them whole.
+    """
+    update = {"$set": {"updated_at": datetime.now().isoformat()}}
+    unset = {f"{section}.items.{doc_id}": "" for doc_id in removed}
+    for doc in docs:
+        path = f"{section}.items.{doc['_id']}"
+        entry = _entry(section, doc) if _shows(section, doc) else None
+        if entry is None:
+            unset[path] = ""
+        else:
+            update["$set"][path] = entry
+    if unset:
+        update["$unset"] = unset
+    db.group_dashboards.update_one({"group_name": group_name, "version": SNAPSHOT_VERSION}, update)
+
+
+# Bookkeeping fields bump_revision keeps on group documents; group
+# responses leave them out
+GROUP_RESPONSE_PROJECTION = {"revision": 0, "changed": 0}
+
+
+def bump_revision(db, *group_names, sections=()):
+    """
+    Advances the groups' revision counters. Read endpoints derive their
+    ETags from the counter, so every write to a group's data must bump it.
+    sections records what the write touched for the change feed; none
+    means it is unknown.
+    """
+    names = [name for name in group_names if name]
+    if names:
+        db.groups.update_many(
+            {"name": {"$in": names}},
+            {"$inc": {"revision": 1}, "$set": {"changed": list(sections)}}
+        )
+
+
+def group_revision(db, group_name):
+    """The group's revision counter, or None if there is no such group."""
+    group = db.groups.find_one({"name": group_name}, {"revision": 1})
+    if not group:
+        return None
+    return group.get("revision", 0)
+
+
+def group_changed(db, group_name, *sections, docs=None, removed=None):
+    """
+    Hook for every write to a group's bills, chores, events or supplies.
+    Keeps the materialized dashboard snapshot in step with the data and
+    bumps the group's revision. Writes to single documents of one section
+    pass the written documents (or the ids of deleted ones) and update just
+    their entries; otherwise the sections are recomputed.
+    """
+    if not group_name:
+        return
+    if (docs or removed) and len(sections) == 1:
+        update_dashboard_items(db, group_name, sections[0], docs or (), removed or ())
+    else:
+        refresh_dashboard(db, group_name, *sections)
+    # The change feed cannot tell which group a deleted document was in, so
+    # deletes are announced as unknown changes and every page refetches
+    bump_revision(db, group_name, sections=() if removed else sections)
+
+
+def _day(value):
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _values(snapshot, section):
+    return list(snapshot.get(section, {}).get("items", {}).values())
+
+
+def private_items(db, group_name, user_id):
+    """
+    Unpaid bills and upcoming events that only some members see and that
+    user_id is one of. They never enter the shared snapshot, so they are
+    read per request, through the visibility indexes.
+    """
+    # Everything the shared snapshot leaves out
+    restricted = {"$nor": VISIBLE_TO_ALL}
+    bills = db.bills.find(
+        {"$and": [
+            {"group_name": group_name, "paid": {"$ne": True}}, restricted,
+            bill_visibility_filter(user_id)
+        ]},
+        SECTION_SOURCES["bills"][1]
+    )
+    today = datetime.now().strftime("%Y-%m-%d")
+    events = db.calendar_events.find(
+        {"$and": [
+            {"group_name": group_name, "start_datetime": {"$gte": today}}, restricted,
+            event_visibility_filter(user_id)
+        ]},
+        SECTION_SOURCES["events"][1]
+    )
+    return {
+        "bills": [d for d in (_entry("bills", b) for b in bills) if d],
+        "events": [d for d in (_entry("events", e) for e in events) if d]
+    }
+
+
+def summarize_dashboard(snapshot, now=None, private=None):
+    """
+    Turns a stored snapshot, plus the caller's private items if given,
+    into the counts shown on the home page.
+    """
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    private = private or {}
+
+    bill_dates = [to_datetime(d) for d in _values(snapshot, "bills") + private.get("bills", [])]
+    bill_days_left = [(d - now).days for d in bill_dates if d]
+
+    chore_dates = [to_datetime(d) for d in _values(snapshot, "chores")]
+    chores_overdue = [d for d in chore_dates if d and now > d]
+    chores_this_week = [
+        d for d in chore_dates
+        if d and now <= d and 0 <= (_day(d) - today).days <= 7
+    ]
+
+    week_end = today + timedelta(days=7)
+    event_dates = [to_datetime(d) for d in _values(snapshot, "events") + private.get("events", [])]
+    events_this_week = [d for d in event_dates if d and today <= _day(d) <= week_end]
+
+    low_items = []
+    for s in _values(snapshot, "supplies"):
+        last = to_datetime(s["last_bought"])
+        if last and now - last > timedelta(days=s["avg_days_between"]):
+            low_items.append(s["item"])
+
+    return {
+        "group_name": snapshot.get("group_name"),
+        "bills": {
+            "unpaid": len(bill_dates),
+            "overdue": sum(1 for d in bill_days_left if d < 0),
+            "due_soon": sum(1 for d in bill_days_left if 0 <= d <= 3)
+        },
+        "chores": {
+            "pending": len(chore_dates),
+            "overdue": len(chores_overdue),
+            "due_this_week": len(chores_this_week)
+        },
+        "events": {
+            "this_week": len(events_this_week)
+        },
+        "supplies": {
+            "low": len(low_items),
+            "low_items": low_items
+        },
+        "updated_at": snapshot.get("updated_at")
+    }
+
+
+def get_dashboard(db, group_name, user_id=None):
+    """
+    Serves the home page summary from the group's snapshot with a single
+    read, building the snapshot first if it does not exist yet. With a
+    user_id, the bills and events only some members see are added for
+    that user.
+    """
+    snapshot = db.group_dashboards.find_one({"group_name": group_name})
+    if not snapshot or snapshot.get("version") != SNAPSHOT_VERSION:
+        snapshot = refresh_dashboard(db, group_name)
+        snapshot["group_name"] = group_name
+    private = private_items(db, group_name, user_id) if user_id else None
+    return summarize_dashboard(snapshot, private=private)
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+# BSON datetime field stored next to each ISO string date field. The string
+# stays the display value in API responses; the datetime is what queries
+# range over and what status classification compares against.
+DATE_FIELDS = {
+    "chores": ("due_date", "due_at"),
+    "bills": ("due_date", "due_at"),
+    "rent": ("due_date", "due_at"),
+    "supplies": ("last_bought", "last_bought_at"),
+}
+
+
+def to_datetime(value):
+    """
+    Parses an ISO date/datetime string into a naive datetime for storage.
+    Returns None for anything that cannot be parsed so a bad client value
+    never blocks a write.
+    """
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed.replace(tzinfo=None)
+
+
+def doc_datetime(doc, field, typed_field):
+    """
+    Returns the typed datetime for a document, falling back to parsing the
+    legacy string for documents the migration has not reached yet.
+    """
+    value = doc.get(typed_field)
+    if isinstance(value, datetime):
+        return value
+    return to_datetime(doc.get(field))
@@ -0,0 +1,20 @@
+"""
+Production server settings for the service layer:
+
+    gunicorn -c service/gunicorn.conf.py service.app:app
+
+Every setting can be overridden from the environment. The scheduled jobs
+run in their own process (python -m service.jobs), not in the workers.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8100')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() + 1))
+threads = int(os.getenv("GUNICORN_THREADS", "2"))
+worker_class = "gthread"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+preload_app = True
+accesslog = "-"
+errorlog = "-"
+
@@ -0,0 +1,102 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# Declarative registry of every index the API and service layers rely on,
+# keyed by collection. ensure_indexes() applies it on startup; each entry
+# backs one or more of the hot queries noted next to it.
+INDEXES = {
+    "users": [
+        # login / create_user / add_roommate: $or on username or email
+        IndexModel([("username", ASCENDING)]),
+        IndexModel([("email", ASCENDING)]),
+    ],
+    "groups": [
+        # chores/bills/events/members routes look groups up by name
+        IndexModel([("name", ASCENDING)]),
+        # GET /api/groups?roommate_id= (multikey)
+        IndexModel([("roommates", ASCENDING)]),
+        # GET /api/groups?created_by=
+        IndexModel([("created_by", ASCENDING)]),
+    ],
+    "chores": [
+        # analyze_chores, calendar open chores (status $ne + due_date window)
+        IndexModel([("group_name", ASCENDING), ("status", ASCENDING), ("due_date", ASCENDING)]),
+        # overdue / due-soon range queries on the typed due date
+        IndexModel([("group_name", ASCENDING), ("status", ASCENDING), ("due_at", ASCENDING)]),
+        # leaderboard aggregation over completed chores
+        IndexModel([("group_name", ASCENDING), ("status", ASCENDING), ("completed_by", ASCENDING)]),
+        # archive job scan for old completed chores
+        IndexModel([("status", ASCENDING), ("completed_at", ASCENDING)]),
+        # media worker attaching thumbnail URLs to chores showing an upload
+        IndexModel([("media_url", ASCENDING)], sparse=True),
+        IndexModel([("completion_media.media_url", ASCENDING)], sparse=True),
+    ],
+    "bills": [
+        # bill_visibility_filter branches
+        IndexModel([("group_name", ASCENDING), ("visibility", ASCENDING), ("created_by", ASCENDING)]),
+        IndexModel([("group_name", ASCENDING), ("visible_to", ASCENDING)]),
+        # calendar unpaid bills inside a due_date window
+        IndexModel([("group_name", ASCENDING), ("paid", ASCENDING), ("due_date", ASCENDING)]),
+        # count_due overdue / due-soon range queries
+        IndexModel([("group_name", ASCENDING), ("paid", ASCENDING), ("due_at", ASCENDING)]),
+        # archive job scan for old paid bills
+        IndexModel([("paid", ASCENDING), ("paid_at", ASCENDING)]),
+        # recurrence idempotency key; bills outside a series have none
+        IndexModel(
+            [("occurrence_key", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"occurrence_key": {"$exists": True}}
+        ),
+        # series_edited: unpaid future occurrences of a series
+        IndexModel([("series_id", ASCENDING), ("due_at", ASCENDING)]),
+    ],
+    "bill_series": [
+        IndexModel([("active", ASCENDING)]),
+    ],
+    "calendar_events": [
+        # event_visibility_filter branches
+        IndexModel([("group_name", ASCENDING), ("visibility", ASCENDING), ("created_by", ASCENDING)]),
+        IndexModel([("group_name", ASCENDING), ("visible_to", ASCENDING)]),
+        # calendar date window
+        IndexModel([("group_name", ASCENDING), ("start_datetime", ASCENDING)]),
+    ],
+    "supplies": [
+        IndexModel([("group_name", ASCENDING)]),
+    ],
+    "rent": [
+        IndexModel([("group_name", ASCENDING), ("due_date", ASCENDING)]),
+        IndexModel([("group_name", ASCENDING), ("due_at", ASCENDING)]),
+    ],
+    "roommates": [
+        IndexModel([("group_name", ASCENDING)]),
+    ],
+    "group_invitations": [
+        # GET /api/invitations pending list
+        IndexModel([("invited_user_id", ASCENDING), ("status", ASCENDING)]),
+        # duplicate check / accept / decline
+        IndexModel([("group_id", ASCENDING), ("invited_user_id", ASCENDING), ("status", ASCENDING)]),
+    ],
+    "chores_archive": [
+        IndexModel([("group_name", ASCENDING), ("status", ASCENDING), ("completed_by", ASCENDING)]),
+    ],
+    "bills_archive": [
+        IndexModel([("group_name", ASCENDING)]),
+    ],
+    "leaderboard_counters": [
+        # record_completion upserts
+        IndexModel([("group_name", ASCENDING), ("period", ASCENDING), ("user_id", ASCENDING)], unique=True),
+        # get_leaderboard: one period, highest count first
+        IndexModel([("group_name", ASCENDING), ("period", ASCENDING), ("count", DESCENDING)]),
+    ],
+    "group_dashboards": [
+        IndexModel([("group_name", ASCENDING)], unique=True),
+    ],
+}
+
+
+def ensure_indexes(db):
+    """
+    Creates every registered index. create_indexes is a no-op for indexes
+    that already exist with the same spec, so this is safe on each startup.
+    """
+    for collection, indexes in INDEXES.items():
+        db[collection].create_indexes(indexes)
@@ -0,0 +1,88 @@
+"""
+Scheduled background jobs of the service layer, plus the one-time startup
+work (indexes, leaderboard backfill). They run in their own process, so
+they run once however many web workers there are and no scheduler thread
+or client is forked into a worker:
+
+    python -m service.jobs
+"""
+import logging
+import os
+import signal
+import threading
+from pymongo.errors import PyMongoError
+from service.archive import run_archive
+from service.indexes import ensure_indexes
+from service.leaderboard import backfill_counters
+from service.mongo import get_db
+from service.recurrence import materialize_recurring_bills
+
+# Hours between archive runs; 0 disables the background job
+ARCHIVE_INTERVAL_HOURS = float(os.getenv("ARCHIVE_INTERVAL_HOURS", "24"))
+# Hours between recurring bill materializer runs; 0 disables it
+RECURRENCE_INTERVAL_HOURS = float(os.getenv("RECURRENCE_INTERVAL_HOURS", "6"))
+
+logger = logging.getLogger(__name__)
+
+
+def start_periodic(name, interval_hours, job, *args):
+    """
+    Runs job(*args) now and then every interval_hours on a daemon thread.
+    Failures are logged and the next run still happens. Returns an Event
+    that stops the loop when set.
+    """
+    def loop():
+        while True:
+            try:
+                logger.info("%s: %s", name, job(*args))
+            except Exception:
+                logger.exception("%s run failed", name)
+            if stop.wait(interval_hours * 3600):
+                return
+
+    stop = threading.Event()
+    threading.Thread(target=loop, name=name, daemon=True).start()
+    return stop
+
+
+def start_jobs(db):
+    """Starts the scheduled background jobs that are enabled."""
+    stops = []
+    if ARCHIVE_INTERVAL_HOURS > 0:
+        stops.append(start_periodic("archiver", ARCHIVE_INTERVAL_HOURS, run_archive, db))
+    if RECURRENCE_INTERVAL_HOURS > 0:
+        stops.append(start_periodic("recurrence", RECURRENCE_INTERVAL_HOURS, materialize_recurring_bills, db))
+    return stops
+
+
+def main():
+    """
+    Creates the indexes and backfills the leaderboard counters, then runs
+    the jobs until SIGTERM or Ctrl-C.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    db = get_db()
+    try:
+        ensure_indexes(db)
+    except PyMongoError as e:
+        logger.warning("Skipping index creation: %s", e)
+    try:
+        logger.info("leaderboard backfill: %s groups", backfill_counters(db))
+    except Exception:
+        logger.exception("Leaderboard backfill failed; it is retried on the next start")
+    stops = start_jobs(db)
+    if not stops:
+        logger.info("No jobs enabled")
+        return
+    done = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: done.set())
+    try:
+        done.wait()
+    except KeyboardInterrupt:
+        pass
+    for stop in stops:
+        stop.set()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Per-group, per-user chore completion counters. mark_chore_complete bumps
+one counter per period bucket, so the leaderboard is a single indexed read
+instead of an aggregation over every completed chore.
+
+Completions from before the counters existed are counted from chores and
+chores_archive once per group, by the jobs process at startup
+(backfill_counters). A full rebuild can also be run by hand:
+
+    python -m service.leaderboard --rebuild [group_name]
+"""
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+from pymongo import DESCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from service.dates import to_datetime
+from service.mongo import get_db
+
+LEADERBOARD_PERIODS = ("all", "month", "week")
+# Period of the per-group document recording that its counters were backfilled
+BACKFILLED = "backfilled"
+# A backfill claim older than this is taken to be from a crashed process
+BACKFILL_CLAIM_TIMEOUT = timedelta(hours=1)
+
+
+def period_keys(when=None):
+    """Returns the bucket key of every leaderboard period for a timestamp."""
+    when = when or datetime.now()
+    year, week, _ = when.isocalendar()
+    return {
+        "all": "all",
+        "month": when.strftime("%Y-%m"),
+        "week": f"{year}-W{week:02d}"
+    }
+
+
+def record_completion(db, group_name, user_id, when=None):
+    """Atomically counts one completion in every period bucket."""
+    if not group_name or not user_id:
+        return
+    db.leaderboard_counters.bulk_write([
+        UpdateOne(
+            {"group_name": group_name, "period": key, "user_id": str(user_id)},
+            {"$inc": {"count": 1}},
+            upsert=True
+        )
+        for key in period_keys(when).values()
+    ], ordered=False)
+
+
+def unrecord_completion(db, group_name, user_id, when=None):
+    """
+    Takes back a completion counted by record_completion, for a chore that
+    was reopened or deleted. when is the original completion time.
+    """
+    if not group_name or not user_id:
+        return
+    user_id = str(user_id)
+    db.leaderboard_counters.bulk_write([
+        UpdateOne(
+            {"group_name": group_name, "period": key, "user_id": user_id, "count": {"$gt": 0}},
+            {"$inc": {"count": -1}}
+        )
+        for key in period_keys(when).values()
+    ], ordered=False)
+    db.leaderboard_counters.delete_many({"group_name": group_name, "user_id": user_id, "count": {"$lte": 0}})
+
+
+def get_leaderboard(db, group_name, period="all", when=None):
+    """
+    Returns [{"user_id", "count"}] for one period, highest count first.
+    Raises ValueError for an unknown period.
+    """
+    if period not in LEADERBOARD_PERIODS:
+        raise ValueError(f"period must be one of {', '.join(LEADERBOARD_PERIODS)}")
+    counters = db.leaderboard_counters.find(
+        {"group_name": group_name, "period": period_keys(when)[period]},
+        {"user_id": 1, "count": 1}
+    ).sort("count", DESCENDING)
+    return [{"user_id": c["user_id"], "count": c["count"]} for c in counters]
+
+
+def _count_completions(db, group_name=None):
+    """Counts the completed chores in chores and chores_archive per counter key."""
+    query = {"status": "completed", "completed_by": {"$exists": True, "$ne": None}}
+    if group_name:
+        query["group_name"] = group_name
+
+    counts = Counter()
+    for collection in (db.chores, db.chores_archive):
+        for c in collection.find(query, {"group_name": 1, "completed_by": 1, "completed_at": 1}):
+            when = to_datetime(c.get("completed_at"))
+            keys = period_keys(when).values() if when else ["all"]
+            for key in keys:
+                counts[(c["group_name"], key, str(c["completed_by"]))] += 1
+    return counts
+
+
+def _apply_counts(db, counts, operator):
+    """Writes counts with one upsert per counter; $max merges, $set overwrites."""
+    if counts:
+        db.leaderboard_counters.bulk_write([
+            UpdateOne(
+                {"group_name": group, "period": key, "user_id": user_id},
+                {operator: {"count": count}},
+                upsert=True
+            )
+            for (group, key, user_id), count in counts.items()
+        ], ordered=False)
+
+
+def backfill_group(db, group_name, now=None):
+    """
+    Counts one group's completions from before the counters existed.
+    Counts are merged with $max, so completions recorded meanwhile are
+    kept: the chores scanned include every completion a live counter has
+    seen. The group's marker document is claimed first, marked done only
+    after the counts are written, and released if that fails. Returns
+    whether this call did the backfill.
+    """
+    now = now or datetime.now()
+    marker = {"group_name": group_name, "period": BACKFILLED}
+    try:
+        db.leaderboard_counters.update_one(
+            {**marker, "done": {"$ne": True}, "$or": [
+                {"claimed_at": {"$exists": False}},
+                {"claimed_at": {"$lt": now - BACKFILL_CLAIM_TIMEOUT}}
+            ]},
+            {"$set": {"claimed_at": now}, "$setOnInsert": {"user_id": None, "count": 0}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Already done, or another process holds a fresh claim
+        return False
+    try:
+        _apply_counts(db, _count_completions(db, group_name), "$max")
+    except Exception:
+        db.leaderboard_counters.update_one(marker, {"$unset": {"claimed_at": ""}})
+        raise
+    db.leaderboard_counters.update_one(marker, {"$set": {"done": True}, "$unset": {"claimed_at": ""}})
+    return True
+
+
+def backfill_counters(db):
+    """
+    One-time job run by the jobs process at startup: backfills every group
+    that has not been backfilled yet. Returns the number of groups done.
+    """
+    done = {m["group_name"] for m in db.leaderboard_counters.find(
+        {"period": BACKFILLED, "done": True}, {"group_name": 1}
+    )}
+    return sum(1 for name in db.groups.distinct("name") if name not in done and backfill_group(db, name))
+
+
+def rebuild_counters(db, group_name=None):
+    """
+    Recomputes the counters from the completed chores in chores and
+    chores_archive, overwriting drifted counts and removing counters no
+    completion backs, and marks the groups as backfilled. Completions
+    recorded while this runs may be lost, so only run it by hand.
+    """
+    counts = _count_completions(db, group_name)
+    _apply_counts(db, counts, "$set")
+
+    scope = {"period": {"$ne": BACKFILLED}}
+    if group_name:
+        scope["group_name"] = group_name
+    stale = [
+        c["_id"] for c in db.leaderboard_counters.find(scope, {"group_name": 1, "period": 1, "user_id": 1})
+        if (c["group_name"], c["period"], c["user_id"]) not in counts
+    ]
+    if stale:
+        db.leaderboard_counters.delete_many({"_id": {"$in": stale}})
+
+    groups = {group for group, _, _ in counts} | ({group_name} if group_name else set())
+    if groups:
+        db.leaderboard_counters.bulk_write([
+            UpdateOne(
+                {"group_name": group, "period": BACKFILLED},
+                {"$set": {"done": True}, "$unset": {"claimed_at": ""}, "$setOnInsert": {"user_id": None, "count": 0}},
+                upsert=True
+            )
+            for group in groups
+        ], ordered=False)
+    return len(counts)
+
+
+if __name__ == "__main__":
+    if "--rebuild" not in sys.argv:
+        print("usage: python -m service.leaderboard --rebuild [group_name]")
+        sys.exit(1)
+    args = [a for a in sys.argv[1:] if a != "--rebuild"]
+    db = get_db()
+    print(f"Rebuilt {rebuild_counters(db, args[0] if args else None)} leaderboard counters")
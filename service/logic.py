@@ -1,5 +1,33 @@
 from datetime import datetime, timedelta
 from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from service.users import resolve_users, get_username, group_roster
+from service.dashboard import group_changed
+from service.visibility import bill_visibility_filter, event_visibility_filter
+from service.dates import to_datetime, doc_datetime
+from service.pagination import fetch_page
+from service.leaderboard import record_completion, unrecord_completion
+
+# Projections: each read fetches only the fields its caller uses
+RENT_FIELDS = {"total_rent": 1, "due_date": 1, "due_at": 1}
+BILL_LIST_FIELDS = {
+    "name": 1, "amount": 1, "due_date": 1, "due_at": 1, "category": 1,
+    "paid": 1, "paid_by": 1, "paid_at": 1, "assigned_to": 1, "assigned_to_username": 1,
+    "is_recurring": 1, "recurring_frequency": 1, "visibility": 1, "visible_to": 1, "notes": 1
+}
+# completion_media grows with every completion of a recurring chore; lists show the latest
+CHORE_LIST_FIELDS = {
+    "task": 1, "assigned_to": 1, "due_date": 1, "due_at": 1, "status": 1,
+    "is_recurring": 1, "media_url": 1, "thumbnail_url": 1, "web_url": 1,
+    "completion_media": {"$slice": -1},
+    "completed_by": 1, "completed_by_username": 1, "completed_at": 1
+}
+CHORE_ROTATION_FIELDS = {"task": 1, "group_name": 1, "assigned_to": 1, "is_recurring": 1, "frequency_days": 1}
+SUPPLY_FIELDS = {"item": 1, "last_bought": 1, "last_bought_at": 1, "avg_days_between": 1}
+EVENT_LIST_FIELDS = {
+    "title": 1, "description": 1, "start_datetime": 1, "end_datetime": 1, "all_day": 1,
+    "created_by": 1, "visibility": 1, "visible_to": 1
+}
 
 def compute_recommendations(db, tag):
     """
@@ -19,17 +47,15 @@ def compute_recommendations(db, tag):
     return results
 
 def analyze_rent(db, group_name):
-    rent_doc = db.rent.find_one({"group_name": group_name})
+    rent_doc = db.rent.find_one({"group_name": group_name}, RENT_FIELDS)
     if not rent_doc:
         return {"error": "no rent record found"}
 
-    roommates = list(db.roommates.find({"group_name": group_name}))
+    roommates = list(db.roommates.find({"group_name": group_name}, {"name": 1, "rent_share": 1}))
     if not roommates:
         return {"error": "no roommates found"}
 
-    from datetime import datetime
-
-    due = datetime.fromisoformat(rent_doc["due_date"])
+    due = doc_datetime(rent_doc, "due_date", "due_at")
     now = datetime.now()
     days_left = (due - now).days
 
@@ -60,7 +86,7 @@ def analyze_rent(db, group_name):
         "shares": shares
     }
 
-def analyze_bills(db, group_name, user_id=None):
+def analyze_bills(db, group_name, user_id=None, after=None, limit=None):
     """
     Analyzes all bills for a group and calculates notifications.
     Returns bills with status and notification info.
@@ -68,33 +94,11 @@ def analyze_bills(db, group_name, user_id=None):
     - If synchronized=True: all group members see it
     - If synchronized=False: only creator sees it
     """
-    # Get all bills for the group
-    all_bills = list(db.bills.find({"group_name": group_name}))
-    
-    # Filter bills based on visibility
-    bills = []
-    for bill in all_bills:
-        visibility = bill.get("visibility", "all")
-        visible_to = bill.get("visible_to", [])
-        created_by = bill.get("created_by")
-        assigned_to = bill.get("assigned_to")
-        
-        # If visibility is "all", everyone in group sees it
-        # If visibility is "only_me", only creator sees it
-        # If visibility is "custom", check if user is in visible_to list
-        if visibility == "all":
-            bills.append(bill)
-        elif visibility == "only_me":
-            # Only creator sees it
-            if user_id and created_by and created_by == user_id:
-                bills.append(bill)
-        elif visibility == "custom" and user_id:
-            # Check if user is in visible_to list
-            if visible_to and user_id in visible_to:
-                bills.append(bill)
-        elif not user_id:
-            # If no user_id provided, show all bills (for backward compatibility)
-            bills.append(bill)
+    # Only bills visible to this user are read from the database
+    query = {"group_name": group_name}
+    query.update(bill_visibility_filter(user_id))
+    bills, next_cursor = fetch_page(db.bills, query, after, limit, BILL_LIST_FIELDS)
+    now = datetime.now()
     
     bill_data = []
     for bill in bills:
@@ -122,8 +126,7 @@ def analyze_bills(db, group_name, user_id=None):
             })
             continue
         
-        due = datetime.fromisoformat(bill["due_date"])
-        now = datetime.now()
+        due = doc_datetime(bill, "due_date", "due_at")
         days_left = (due - now).days
         
         status = "OVERDUE" if days_left < 0 else ("DUE_SOON" if days_left <= 3 else "PENDING")
@@ -162,28 +165,70 @@ def analyze_bills(db, group_name, user_id=None):
         x["days_left"] if x["days_left"] is not None else 9999
     ))
     
+    unpaid_query = {**query, "paid": {"$ne": True}}
+    counts = count_due(db.bills, unpaid_query, now)
+    if limit is None:
+        total_unpaid = sum(b["amount"] for b in bill_data if not b.get("paid", False))
+    else:
+        # A page only holds some of the bills, so total them in Mongo
+        total_unpaid = 0
+        for result in db.bills.aggregate([
+            {"$match": unpaid_query},
+            {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
+        ]):
+            total_unpaid = result["total"]
+    
     return {
         "group_name": group_name,
         "bills": bill_data,
-        "total_unpaid": sum(b["amount"] for b in bill_data if not b.get("paid", False)),
-        "overdue_count": sum(1 for b in bill_data if b["status"] == "OVERDUE"),
-        "due_soon_count": sum(1 for b in bill_data if b["status"] == "DUE_SOON")
+        "total_unpaid": total_unpaid,
+        "overdue_count": counts["overdue"],
+        "due_soon_count": counts["due_soon"],
+        "next_cursor": next_cursor
     }
 
-def analyze_supplies(db, group_name):
-    supplies = list(db.supplies.find({"group_name": group_name}))
+def count_due(collection, query, now=None):
+    """
+    Counts overdue and due-soon items server-side with range queries on the
+    indexed due_at field, matching the days_left rules used for statuses:
+    overdue is due_at < now, due soon is 0 <= days_left <= 3. Documents not
+    yet migrated to due_at are converted from their due_date string in the
+    pipeline so they are still counted.
+    """
+    now = now or datetime.now()
+    soon = now + timedelta(days=4)
+    due_at = {"$ifNull": ["$due_at", {"$dateFromString": {"dateString": "$due_date", "onError": None}}]}
+    pipeline = [
+        {"$match": {"$and": [query, {"$or": [
+            {"due_at": {"$lt": soon}},
+            {"due_at": {"$exists": False}}
+        ]}]}},
+        {"$project": {"due": due_at}},
+        {"$match": {"due": {"$lt": soon}}},
+        {"$group": {
+            "_id": None,
+            "overdue": {"$sum": {"$cond": [{"$lt": ["$due", now]}, 1, 0]}},
+            "due_soon": {"$sum": {"$cond": [{"$gte": ["$due", now]}, 1, 0]}}
+        }}
+    ]
+    for result in collection.aggregate(pipeline):
+        return {"overdue": result["overdue"], "due_soon": result["due_soon"]}
+    return {"overdue": 0, "due_soon": 0}
+
 
-    from datetime import datetime, timedelta
+def analyze_supplies(db, group_name):
+    supplies = list(db.supplies.find({"group_name": group_name}, SUPPLY_FIELDS))
 
     low_items = []
     notifications = []
+    now = datetime.now()
 
     for s in supplies:
-        last = datetime.fromisoformat(s["last_bought"])
+        last = doc_datetime(s, "last_bought", "last_bought_at")
 
         avg_days = s.get("avg_days_between", 14)
 
-        if datetime.now() - last > timedelta(days=avg_days):
+        if now - last > timedelta(days=avg_days):
             low_items.append({
                 "item": s["item"],
                 "status": "LOW SOON"
@@ -198,102 +243,154 @@ def analyze_supplies(db, group_name):
     }
 
 
-def analyze_chores(db, group_name):
+def _next_due(collection, query, after):
+    """The earliest due_at after the given time among matching documents, or None."""
+    doc = collection.find_one({**query, "due_at": {"$gt": after}}, {"due_at": 1}, sort=[("due_at", 1)])
+    return doc["due_at"] if doc else None
+
+
+# A bill is DUE_SOON while days_left <= 3, i.e. from 4 days before it is due
+DUE_SOON_WINDOW = timedelta(days=4)
+
+
+def next_status_change(db, group_name, sections, now=None):
+    """
+    Earliest time after now at which a status derived from due dates
+    changes in the given sections ("bills", "chores", "rent"), or None.
+    Chores and bills turn OVERDUE at their due time, bills turn DUE_SOON
+    4 days before. Each boundary is one indexed lookup; day counts such
+    as days_left move with the date, which ETags cover separately.
+    """
+    now = now or datetime.now()
+    changes = []
+    if "chores" in sections:
+        changes.append(_next_due(db.chores, {"group_name": group_name, "status": {"$ne": "completed"}}, now))
+    if "bills" in sections:
+        unpaid = {"group_name": group_name, "paid": {"$ne": True}}
+        changes.append(_next_due(db.bills, unpaid, now))
+        due_soon = _next_due(db.bills, unpaid, now + DUE_SOON_WINDOW)
+        changes.append(due_soon - DUE_SOON_WINDOW if due_soon else None)
+    if "rent" in sections:
+        rent = db.rent.find_one({"group_name": group_name}, {"due_date": 1, "due_at": 1})
+        due = doc_datetime(rent, "due_date", "due_at") if rent else None
+        changes.append(due if due and due > now else None)
+    changes = [c for c in changes if c]
+    return min(changes) if changes else None
+
+
+def chore_item(c, now=None):
+    """
+    A chore document as the chores list returns it, with OVERDUE status
+    and the latest completion's media.
+    """
+    now = now or datetime.now()
+    due = doc_datetime(c, "due_date", "due_at")
+    is_overdue = now > due and c["status"] != "completed"
+
+    # Get completion media (latest one if multiple)
+    completion_media = c.get("completion_media", [])
+    latest_completion_media = completion_media[-1] if completion_media else None
+    media = latest_completion_media or c
+    media_url = media.get("media_url")
+
+    return {
+        "id": str(c["_id"]),
+        "task": c["task"],
+        "assigned_to": c["assigned_to"],
+        "due_date": c["due_date"],
+        "status": "OVERDUE" if is_overdue else c["status"],
+        "is_recurring": c.get("is_recurring", False),
+        "media_url": media_url,
+        # Lists show the thumbnail; the original until it has been rendered
+        "thumbnail_url": media.get("thumbnail_url") or media_url,
+        "web_url": media.get("web_url") or media_url,
+        "completion_media": completion_media,
+        "completed_by": c.get("completed_by"),
+        "completed_by_username": c.get("completed_by_username"),
+        "completed_at": c.get("completed_at")
+    }
+
+
+def analyze_chores(db, group_name, after=None, limit=None):
     """
     Fetches chores and checks if they are overdue.
+    Pass limit (and the previous page's next_cursor as after) to page
+    through a group's history newest first.
     """
-    chores = list(db.chores.find({"group_name": group_name}))
-    chore_data = []
-    
-    for c in chores:
-        due = datetime.fromisoformat(c["due_date"])
-        is_overdue = datetime.now() > due and c["status"] != "completed"
-        
-        # Get completion media (latest one if multiple)
-        completion_media = c.get("completion_media", [])
-        latest_completion_media = completion_media[-1] if completion_media else None
-        media_url = latest_completion_media.get("media_url") if latest_completion_media else c.get("media_url")
-        
-        chore_data.append({
-            "id": str(c["_id"]),
-            "task": c["task"],
-            "assigned_to": c["assigned_to"],
-            "due_date": c["due_date"],
-            "status": "OVERDUE" if is_overdue else c["status"],
-            "is_recurring": c.get("is_recurring", False),
-            "media_url": media_url,
-            "completion_media": completion_media,
-            "completed_by": c.get("completed_by"),
-            "completed_by_username": c.get("completed_by_username"),
-            "completed_at": c.get("completed_at")
-        })
+    chores, next_cursor = fetch_page(db.chores, {"group_name": group_name}, after, limit, CHORE_LIST_FIELDS)
+    now = datetime.now()
+    chore_data = [chore_item(c, now) for c in chores]
 
     return {
         "group_name": group_name,
-        "chores": chore_data
+        "chores": chore_data,
+        "next_cursor": next_cursor
     }
 
+CHORE_ALREADY_COMPLETED = "Chore already completed"
+
+
 def mark_chore_complete(db, chore_id, completed_by_user_id=None, completion_media_url=None):
     """
     Marks chore as complete. If recurring, assigns to next roommate.
-    Uses group.roommates array to get actual roommates.
+    The status precondition on find_one_and_update makes completion
+    atomic: of two concurrent completions only one wins and rotates.
     """
-    chore = db.chores.find_one({"_id": ObjectId(chore_id)})
-    if not chore:
-        return {"error": "Chore not found"}
-
-    # Update chore with completion info
+    now = datetime.now().isoformat()
     update_data = {
         "status": "completed",
-        "completed_at": datetime.now().isoformat()
+        "completed_at": now
     }
     if completed_by_user_id:
         update_data["completed_by"] = completed_by_user_id
         # Get username for display
-        try:
-            user = db.users.find_one({"_id": ObjectId(completed_by_user_id)})
-            if user:
-                update_data["completed_by_username"] = user.get("username", "")
-        except Exception:
-            pass
+        username = get_username(db, completed_by_user_id)
+        if username is not None:
+            update_data["completed_by_username"] = username
+    update = {"$set": update_data}
     
     # Add completion media URL if provided
     if completion_media_url:
         # Store completion media (can have multiple completions for recurring chores)
-        completion_media = chore.get("completion_media", [])
-        completion_media.append({
+        update["$push"] = {"completion_media": {
             "media_url": completion_media_url,
-            "completed_at": datetime.now().isoformat(),
+            "completed_at": now,
             "completed_by": completed_by_user_id
-        })
-        update_data["completion_media"] = completion_media
+        }}
         update_data["media_url"] = completion_media_url  # Also set main media_url for backward compatibility
     
-    db.chores.update_one({"_id": ObjectId(chore_id)}, {"$set": update_data})
+    chore = db.chores.find_one_and_update(
+        {"_id": ObjectId(chore_id), "status": {"$ne": "completed"}},
+        update,
+        projection=CHORE_ROTATION_FIELDS,
+        return_document=ReturnDocument.BEFORE
+    )
+    if not chore:
+        if db.chores.count_documents({"_id": ObjectId(chore_id)}, limit=1):
+            return {"error": CHORE_ALREADY_COMPLETED}
+        return {"error": "Chore not found"}
+    record_completion(db, chore.get("group_name"), completed_by_user_id)
 
     if not chore.get("is_recurring"):
+        group_changed(db, chore.get("group_name"), "chores", docs=[{"_id": chore["_id"], "status": "completed"}])
         return {"message": "Chore marked as done."}
 
-    # Get group and its roommates (user IDs)
+    # Roommates (user IDs) come from the cached group roster
     group_name = chore["group_name"]
-    group = db.groups.find_one({"name": group_name})
+    roommate_ids = group_roster(db, group_name)
     
-    if not group:
+    if roommate_ids is None:
         return {"error": "Group not found"}
     
-    roommate_ids = group.get("roommates", [])
     if not roommate_ids:
         return {"error": "No roommates found in group"}
     
     # Get usernames for all roommates
+    users = resolve_users(db, roommate_ids)
     roommate_users = {}
     for rm_id in roommate_ids:
-        try:
-            user = db.users.find_one({"_id": ObjectId(rm_id)})
-            if user:
-                roommate_users[rm_id] = user.get("username", "")
-        except Exception:
-            pass
+        if str(rm_id) in users:
+            roommate_users[rm_id] = users[str(rm_id)]["username"]
     
     # Find current assigned user ID (match by username or user_id)
     current_assigned = chore.get("assigned_to", "")
@@ -328,92 +425,213 @@ def mark_chore_complete(db, chore_id, completed_by_user_id=None, completion_medi
         "assigned_to_user_id": str(next_user_id),  # Store user ID for tracking
         "status": "pending",
         "due_date": new_due_date.isoformat(),
+        "due_at": new_due_date,
         "frequency_days": chore["frequency_days"],
         "is_recurring": True
     }
-    db.chores.insert_one(new_chore)
+    new_chore["_id"] = db.chores.insert_one(new_chore).inserted_id
+    # The completed chore leaves the dashboard, its next occurrence joins it
+    group_changed(db, group_name, "chores", docs=[{"_id": chore["_id"], "status": "completed"}, new_chore])
     
     return {"message": f"Chore finished! Next up: {next_username}"}
 
-def get_group_calendar(db, group_name):
-    from datetime import datetime
+def reopen_chore(db, chore_id):
+    """
+    Sets a completed chore back to pending and takes its completion off the
+    leaderboard. The next occurrence of a recurring chore stays scheduled.
+    """
+    chore = db.chores.find_one_and_update(
+        {"_id": ObjectId(chore_id), "status": "completed"},
+        {"$set": {"status": "pending"}, "$unset": {"completed_by": "", "completed_by_username": "", "completed_at": ""}},
+        return_document=ReturnDocument.BEFORE
+    )
+    if not chore:
+        if db.chores.count_documents({"_id": ObjectId(chore_id)}, limit=1):
+            return {"error": "Chore is not completed"}
+        return {"error": "Chore not found"}
+    unrecord_completion(db, chore.get("group_name"), chore.get("completed_by"), to_datetime(chore.get("completed_at")))
+    chore["status"] = "pending"
+    group_changed(db, chore.get("group_name"), "chores", docs=[chore])
+    return {"message": "Chore reopened."}
+
+def delete_chore(db, chore_id):
+    """Deletes a chore; a completed one is taken off the leaderboard."""
+    chore = db.chores.find_one_and_delete(
+        {"_id": ObjectId(chore_id)},
+        projection={"group_name": 1, "status": 1, "completed_by": 1, "completed_at": 1}
+    )
+    if not chore:
+        return {"error": "Chore not found"}
+    if chore.get("status") == "completed":
+        unrecord_completion(db, chore.get("group_name"), chore.get("completed_by"), to_datetime(chore.get("completed_at")))
+    group_changed(db, chore.get("group_name"), "chores", removed=[chore_id])
+    return {"message": "Chore deleted."}
+
+def _window_day(value):
+    """Normalizes a window bound (date or ISO datetime string) to YYYY-MM-DD."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+def date_window_filter(start=None, end=None):
+    """
+    Builds a range filter for ISO date string fields: start <= field < end.
+    ISO strings sort lexicographically, so "2025-12-01T10:00:00" falls
+    inside a window ending "2025-12-02". Returns None for an open window.
+    """
+    start = _window_day(start)
+    end = _window_day(end)
+    window = {}
+    if start:
+        window["$gte"] = start
+    if end:
+        window["$lt"] = end
+    return window or None
+
+
+def _in_window(day, start=None, end=None):
+    start = _window_day(start)
+    end = _window_day(end)
+    return (not start or day >= start) and (not end or day < end)
+
+
+def _calendar_entry(title, due_date, event_type, assignee, status, event_id=None):
+    # Ensure date is in YYYY-MM-DD format
+    day = due_date.split('T')[0]
+    entry = {
+        "title": title,
+        "date": day,
+        "start": day,
+        "start_datetime": day + "T00:00:00",
+        "type": event_type,
+        "assignee": assignee,
+        "status": status,
+        "allDay": True,
+        "all_day": True
+    }
+    if event_id is not None:
+        entry["id"] = event_id
+    return entry
+
+
+def get_group_calendar(db, group_name, start=None, end=None, user_id=None):
+    """
+    Builds the aggregated calendar (rent, unpaid bills, low supplies and open
+    chores) for a group. The optional start/end window is pushed into each
+    Mongo query so only events in the visible range are read, and bills are
+    limited to those visible to user_id.
+    """
+    window = date_window_filter(start, end)
+    now = datetime.now()
+    today = now.strftime("%Y-%m-%d")
+
+    def scoped(query):
+        if window:
+            query["due_date"] = window
+        return query
 
     events = []
 
     # Add rent
-    rent_data = analyze_rent(db, group_name)
-    if rent_data and "due_date" in rent_data:
-        events.append({
-            "title": f"Rent Due (${rent_data['total_rent']})",
-            "date": rent_data["due_date"],
-            "start": rent_data["due_date"],
-            "start_datetime": rent_data["due_date"] + "T00:00:00",
-            "type": "bill",
-            "assignee": "Everyone",
-            "status": rent_data.get("status", "pending"),
-            "allDay": True,
-            "all_day": True
-        })
-    
-    # Add all bills from bills collection
-    bills_data = analyze_bills(db, group_name)
-    for bill in bills_data.get("bills", []):
-        if not bill.get("paid", False):  # Only show unpaid bills
-            due_date = bill.get("due_date", "")
-            if due_date:
-                # Ensure date is in YYYY-MM-DD format
-                if 'T' in due_date:
-                    due_date = due_date.split('T')[0]
-                events.append({
-                    "id": bill.get("id", ""),
-                    "title": f"{bill['name']} - ${bill['amount']}",
-                    "date": due_date,
-                    "start": due_date,
-                    "start_datetime": due_date + "T00:00:00",
-                    "type": "bill",
-                    "assignee": bill.get("assigned_to_username", bill.get("assigned_to", "Unassigned")),
-                    "status": bill.get("status", "PENDING"),
-                    "allDay": True,
-                    "all_day": True
-                })
-        
-    # Add supplies (shopping items)
-    supplies_data = analyze_supplies(db, group_name)
-    for item in supplies_data.get("low_items", []):
-         events.append({
-            "title": f"Buy {item['item']}",
-            "date": datetime.now().strftime("%Y-%m-%d"),
-            "start": datetime.now().strftime("%Y-%m-%d"),
-            "start_datetime": datetime.now().strftime("%Y-%m-%d") + "T00:00:00",
-            "type": "shopping",
-            "assignee": "Any",
-            "status": "URGENT",
-            "allDay": True,
-            "all_day": True
-        })
+    rent_doc = db.rent.find_one(scoped({"group_name": group_name}), RENT_FIELDS)
+    if rent_doc and rent_doc.get("due_date"):
+        days_left = (doc_datetime(rent_doc, "due_date", "due_at") - now).days
+        events.append(_calendar_entry(
+            f"Rent Due (${rent_doc['total_rent']})",
+            rent_doc["due_date"], "bill", "Everyone",
+            "OVERDUE" if days_left < 0 else "OK"
+        ))
 
-    # Add chores
-    chores_data = analyze_chores(db, group_name)
-    for c in chores_data.get("chores", []):
-        if c["status"] != "completed":
-            due_date = c.get("due_date", "")
-            if due_date:
-                # Ensure date is in YYYY-MM-DD format
-                if 'T' in due_date:
-                    due_date = due_date.split('T')[0]
-                events.append({
-                    "id": c.get("id", ""),
-                    "title": c["task"],
-                    "date": due_date,
-                    "start": due_date,
-                    "start_datetime": due_date + "T00:00:00",
-                    "type": "chore",
-                    "assignee": c.get("assigned_to", "Unassigned"),
-                    "status": c["status"],
-                    "allDay": True,
-                    "all_day": True
-                })
+    # Add unpaid bills from bills collection
+    bills_query = scoped({"group_name": group_name, "paid": {"$ne": True}})
+    bills_query.update(bill_visibility_filter(user_id))
+    for bill in db.bills.find(bills_query, BILL_LIST_FIELDS):
+        if not bill.get("due_date"):
+            continue
+        days_left = (doc_datetime(bill, "due_date", "due_at") - now).days
+        status = "OVERDUE" if days_left < 0 else ("DUE_SOON" if days_left <= 3 else "PENDING")
+        events.append(_calendar_entry(
+            f"{bill['name']} - ${bill['amount']}",
+            bill["due_date"], "bill",
+            bill.get("assigned_to_username", bill.get("assigned_to", "Unassigned")),
+            status, str(bill["_id"])
+        ))
+
+    # Low supplies are always shown on today's date
+    if _in_window(today, start, end):
+        supplies_data = analyze_supplies(db, group_name)
+        for item in supplies_data.get("low_items", []):
+            events.append(_calendar_entry(
+                f"Buy {item['item']}", today, "shopping", "Any", "URGENT"
+            ))
+
+    # Add open chores
+    for c in db.chores.find(
+        scoped({"group_name": group_name, "status": {"$ne": "completed"}}),
+        {"task": 1, "assigned_to": 1, "due_date": 1, "due_at": 1, "status": 1}
+    ):
+        if not c.get("due_date"):
+            continue
+        is_overdue = now > doc_datetime(c, "due_date", "due_at")
+        events.append(_calendar_entry(
+            c["task"], c["due_date"], "chore",
+            c.get("assigned_to", "Unassigned"),
+            "OVERDUE" if is_overdue else c["status"], str(c["_id"])
+        ))
 
     events.sort(key=lambda x: x.get("date", ""))
     
-    return events
\ No newline at end of file
+    return events
+
+
+def get_custom_events(db, group_name, user_id=None, start=None, end=None):
+    """
+    Returns the group's custom calendar events visible to user_id that
+    overlap the optional start/end window.
+    """
+    start = _window_day(start)
+    end = _window_day(end)
+    clauses = [{"group_name": group_name}]
+    if end:
+        clauses.append({"start_datetime": {"$lt": end}})
+    if start:
+        clauses.append({"$or": [
+            {"end_datetime": {"$gte": start}},
+            {"end_datetime": {"$exists": False}, "start_datetime": {"$gte": start}}
+        ]})
+    # Visibility is applied by the query, so hidden events never leave Mongo
+    visibility_filter = event_visibility_filter(user_id)
+    if visibility_filter:
+        clauses.append(visibility_filter)
+    query = {"$and": clauses} if len(clauses) > 1 else clauses[0]
+
+    events = []
+    for event in db.calendar_events.find(query, EVENT_LIST_FIELDS):
+        start_dt = event.get("start_datetime", "")
+        end_dt = event.get("end_datetime", start_dt)
+        all_day = event.get("all_day", False)
+        
+        # Skip events without a valid start datetime
+        if not start_dt:
+            continue
+        
+        events.append({
+            "id": str(event["_id"]),
+            "title": event.get("title", ""),
+            "start_datetime": start_dt,
+            "end_datetime": end_dt,
+            "start": start_dt,
+            "end": end_dt,
+            "date": start_dt.split('T')[0] if 'T' in start_dt else start_dt.split(' ')[0],  # For backward compatibility
+            "description": event.get("description", ""),
+            "type": "event",
+            "created_by": event.get("created_by"),
+            "visibility": event.get("visibility", "all"),
+            "visible_to": event.get("visible_to", []),
+            "allDay": all_day,
+            "all_day": all_day
+        })
+    return events
@@ -0,0 +1,144 @@
+"""
+Chore photo uploads. An upload is streamed to a local temp file and hashed
+on the way, then stored in the blob store (service/storage.py) under its
+SHA-256, so the same file uploaded twice is stored once. The request
+returns as soon as the bytes are stored. A small background pool then
+renders a thumbnail and a web-sized copy of each image and records their
+URLs on the chores that show it.
+
+Variants need Pillow; without it uploads are still stored and served, and
+lists fall back to the original.
+"""
+import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from service.storage import get_store
+from service.dashboard import bump_revision
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "2"))
+CHUNK_SIZE = 64 * 1024
+
+# Variant name -> longest edge in pixels
+VARIANTS = {"thumbnail": 320, "web": 1600}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+
+
+def _extension(filename):
+    ext = os.path.splitext(filename or "")[1].lower()
+    return ext if re.fullmatch(r"\.[a-z0-9]{1,5}", ext) else ""
+
+
+def public_url(key, store=None):
+    return (store or get_store()).public_url(key)
+
+
+def variant_key(key, name):
+    return f"{os.path.splitext(key)[0]}_{name}.jpg"
+
+
+def save_upload(stream, filename, content_type=None, store=None):
+    """
+    Streams an upload into the blob store and returns its key,
+    "media/<2 hex>/<sha256><ext>". Identical content maps to the same key
+    and is stored once.
+    """
+    store = store or get_store()
+    digest = hashlib.sha256()
+    with tempfile.TemporaryFile() as spool:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            spool.write(chunk)
+        hexdigest = digest.hexdigest()
+        key = f"media/{hexdigest[:2]}/{hexdigest}{_extension(filename)}"
+        if not store.exists(key):
+            spool.seek(0)
+            store.put(key, spool, content_type)
+    return key
+
+
+def render_variants(key, store=None):
+    """
+    Stores any missing variants of an image upload and returns
+    {variant: key}. Returns {} for videos, or when Pillow is not installed.
+    """
+    if Image is None or os.path.splitext(key)[1] not in IMAGE_EXTENSIONS:
+        return {}
+    store = store or get_store()
+    variants = {}
+    with store.open(key) as original_file, Image.open(original_file) as original:
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        for name, edge in VARIANTS.items():
+            vkey = variant_key(key, name)
+            if not store.exists(vkey):
+                resized = image.copy()
+                resized.thumbnail((edge, edge))
+                buffer = io.BytesIO()
+                resized.save(buffer, "JPEG", quality=82, optimize=True, progressive=True)
+                buffer.seek(0)
+                store.put(vkey, buffer, "image/jpeg")
+            variants[name] = vkey
+    return variants
+
+
+def attach_variants(db, media_url, variants, store=None):
+    """Records variant URLs on every chore and completion that shows media_url."""
+    fields = {f"{name}_url": public_url(vkey, store) for name, vkey in variants.items()}
+    query = {"$or": [{"media_url": media_url}, {"completion_media.media_url": media_url}]}
+    groups = db.chores.distinct("group_name", query)
+    db.chores.update_many({"media_url": media_url}, {"$set": fields})
+    db.chores.update_many(
+        {"completion_media.media_url": media_url},
+        {"$set": {f"completion_media.$[m].{field}": url for field, url in fields.items()}},
+        array_filters=[{"m.media_url": media_url}]
+    )
+    # Cached chore lists of these groups now have newer thumbnails to show
+    bump_revision(db, *groups, sections=("chores",))
+
+
+def process_upload(db, key, store=None):
+    try:
+        variants = render_variants(key, store)
+    except Exception:
+        logger.exception("Could not render variants for %s", key)
+        return {}
+    if variants:
+        attach_variants(db, public_url(key, store), variants, store)
+    return variants
+
+
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+
+
+def _get_executor():
+    """One pool per process; a forked worker builds its own."""
+    global _executor, _executor_pid
+    pid = os.getpid()
+    with _lock:
+        if _executor is None or _executor_pid != pid:
+            _executor = ThreadPoolExecutor(max_workers=MEDIA_WORKERS, thread_name_prefix="media")
+            _executor_pid = pid
+        return _executor
+
+
+def process_in_background(db, key):
+    """
+    Queues variant rendering for an upload. Call it after the document
+    referencing the upload is written, so the worker finds it.
+    """
+    return _get_executor().submit(process_upload, db, key)
@@ -0,0 +1,173 @@
+"""
+The one MongoClient factory for the api and service layers. Pool size,
+timeouts, read preference and write concern come from the environment.
+get_client() keeps one client per process. It builds a fresh client when
+it finds itself in a forked child, so pools are never shared across
+gunicorn workers.
+
+Modules import the lazy `db` handle, which resolves to the current
+process's database on every attribute access:
+
+    from service.mongo import db
+    db.chores.find(...)
+"""
+import os
+import threading
+from pymongo import MongoClient
+from pymongo.monitoring import ConnectionPoolListener
+
+MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "main_db")
+
+
+def _int_env(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def client_settings():
+    """MongoClient keyword arguments built from the environment."""
+    settings = {
+        "maxPoolSize": _int_env("MONGO_MAX_POOL_SIZE", 50),
+        "minPoolSize": _int_env("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": _int_env("MONGO_MAX_IDLE_TIME_MS", 60000),
+        "waitQueueTimeoutMS": _int_env("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000),
+        "serverSelectionTimeoutMS": _int_env("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000),
+        "connectTimeoutMS": _int_env("MONGO_CONNECT_TIMEOUT_MS", 5000),
+        "socketTimeoutMS": _int_env("MONGO_SOCKET_TIMEOUT_MS", 20000),
+        "readPreference": os.getenv("MONGO_READ_PREFERENCE", "primary"),
+        "retryWrites": True,
+    }
+    write_concern = os.getenv("MONGO_WRITE_CONCERN")
+    if write_concern:
+        settings["w"] = int(write_concern) if write_concern.isdigit() else write_concern
+    return settings
+
+
+class PoolStats(ConnectionPoolListener):
+    """Counts connection pool events for the current process's client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {
+            "connections_created": 0,
+            "connections_closed": 0,
+            "checked_out": 0,
+            "checkout_failures": 0,
+            "pool_clears": 0,
+        }
+
+    def _bump(self, key, amount=1):
+        with self._lock:
+            self.counts[key] += amount
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self.counts)
+        counts["connections_open"] = counts["connections_created"] - counts["connections_closed"]
+        return counts
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._bump("pool_clears")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._bump("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._bump("connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._bump("checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._bump("checked_out")
+
+    def connection_checked_in(self, event):
+        self._bump("checked_out", -1)
+
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+_stats = None
+
+
+def get_client():
+    """Returns this process's shared MongoClient, creating it on first use."""
+    global _client, _client_pid, _stats
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    with _lock:
+        if _client is None or _client_pid != pid:
+            # A client inherited across fork is dropped, not closed: its
+            # sockets belong to the parent
+            _stats = PoolStats()
+            _client = MongoClient(MONGO_URL, connect=False, event_listeners=[_stats], **client_settings())
+            _client_pid = pid
+        return _client
+
+
+def get_db(name=None):
+    return get_client()[name or MONGO_DB_NAME]
+
+
+def pool_stats():
+    """Pool settings and event counters for this process."""
+    if _client is None or _client_pid != os.getpid():
+        return {"pid": os.getpid(), "connected": False}
+    settings = client_settings()
+    return {
+        "pid": _client_pid,
+        "connected": True,
+        "max_pool_size": settings["maxPoolSize"],
+        "min_pool_size": settings["minPoolSize"],
+        **_stats.snapshot()
+    }
+
+
+_async_client = None
+_async_client_pid = None
+
+
+def get_async_db(name=None):
+    """
+    Database handle on this process's AsyncMongoClient, for the asyncio
+    serving path. Same settings and fork handling as get_client().
+    """
+    global _async_client, _async_client_pid
+    from pymongo import AsyncMongoClient
+    pid = os.getpid()
+    with _lock:
+        if _async_client is None or _async_client_pid != pid:
+            _async_client = AsyncMongoClient(MONGO_URL, connect=False, **client_settings())
+            _async_client_pid = pid
+    return _async_client[name or MONGO_DB_NAME]
+
+
+class LazyDatabase:
+    """Module-level stand-in for a Database that resolves per process."""
+
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+    def __getitem__(self, name):
+        return get_db()[name]
+
+
+db = LazyDatabase()
@@ -0,0 +1,64 @@
+from bson.objectid import ObjectId
+from pymongo import DESCENDING
+
+MAX_PAGE_SIZE = 200
+
+
+def parse_page_args(args):
+    """
+    Reads keyset pagination arguments (after=<_id>, limit=) from a request's
+    query string. Returns (after, limit); limit is None when the caller did
+    not ask for paging. Raises ValueError for malformed values.
+    """
+    after = args.get("after") or None
+    limit = args.get("limit")
+    if after is not None and not ObjectId.is_valid(after):
+        raise ValueError("Invalid 'after' cursor")
+    if limit is None or limit == "":
+        return after, None
+    limit = int(limit)
+    if limit < 1:
+        raise ValueError("'limit' must be a positive integer")
+    return after, min(limit, MAX_PAGE_SIZE)
+
+
+def _page_query(query, after):
+    if after:
+        return {**query, "_id": {"$lt": ObjectId(after)}}
+    return query
+
+
+def _split_page(docs, limit):
+    if len(docs) > limit:
+        docs = docs[:limit]
+        return docs, str(docs[-1]["_id"])
+    return docs, None
+
+
+def fetch_page(collection, query, after=None, limit=None, projection=None):
+    """
+    Keyset pagination over _id, newest first. Returns (docs, next_cursor)
+    where next_cursor is the _id to pass as `after` for the following page,
+    or None on the last page. Without a limit the plain find() cursor over
+    everything after `after` is returned, so callers can stream it; iterate
+    it only once.
+    """
+    if limit is None:
+        cursor = collection.find(_page_query(query, after), projection)
+        return (cursor.sort("_id", DESCENDING) if after else cursor), None
+
+    # Read one extra document to learn whether another page exists
+    docs = list(collection.find(_page_query(query, after), projection).sort("_id", DESCENDING).limit(limit + 1))
+    return _split_page(docs, limit)
+
+
+async def fetch_page_async(collection, query, after=None, limit=None, projection=None):
+    """fetch_page for an async collection."""
+    if limit is None:
+        cursor = collection.find(_page_query(query, after), projection)
+        if after:
+            cursor = cursor.sort("_id", DESCENDING)
+        return await cursor.to_list(None), None
+
+    cursor = collection.find(_page_query(query, after), projection).sort("_id", DESCENDING).limit(limit + 1)
+    return _split_page(await cursor.to_list(None), limit)
@@ -0,0 +1,216 @@
+"""
+Recurring bills. Each recurring bill belongs to a bill_series document that
+holds the template fields, the interval and materialized_through (the due
+date of the newest occurrence slot handled so far). materialize_recurring_bills
+creates every occurrence due within RECURRENCE_LEAD_DAYS ahead of time;
+slots already in the past are skipped.
+Each occurrence carries an occurrence_key "<series_id>:<YYYY-MM-DD>" under a
+unique index, so repeated or concurrent runs never create duplicates.
+
+    python -m service.recurrence
+"""
+import os
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from service.dashboard import group_changed
+from service.dates import doc_datetime
+from service.mongo import get_db
+
+RECURRENCE_LEAD_DAYS = int(os.getenv("RECURRENCE_LEAD_DAYS", "7"))
+# Upper bound per series and run, so a long outage cannot flood a group
+MAX_OCCURRENCES_PER_RUN = 60
+
+# Same mapping the bills page uses when recurring_days is not set
+FREQUENCY_DAYS = {
+    "daily": 1,
+    "weekly": 7,
+    "biweekly": 14,
+    "monthly": 30,
+    "yearly": 365,
+}
+
+# Bill fields copied from the series template into each occurrence
+TEMPLATE_FIELDS = (
+    "name", "amount", "group_name", "category", "assigned_to", "assigned_to_username",
+    "recurring_frequency", "recurring_days", "notification_frequency",
+    "notification_days_before", "visibility", "visible_to", "editable_visibility",
+    "editable_by", "deletable_visibility", "deletable_by", "notes", "created_by",
+)
+
+
+def interval_days(bill):
+    """Returns the recurrence interval in days, or None if it has none."""
+    days = bill.get("recurring_days") or FREQUENCY_DAYS.get(bill.get("recurring_frequency"))
+    try:
+        days = int(days)
+    except (TypeError, ValueError):
+        return None
+    return days if days > 0 else None
+
+
+def _midnight(value):
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def create_series(db, bill):
+    """
+    Starts a series from a saved recurring bill, which becomes its first
+    occurrence. Returns the series document, or None if the bill has no
+    usable interval or due date.
+    """
+    due = doc_datetime(bill, "due_date", "due_at")
+    if not bill.get("is_recurring") or not interval_days(bill) or not due:
+        return None
+    series_id = str(bill["_id"])
+    series = {
+        "_id": series_id,
+        "group_name": bill["group_name"],
+        "template": {field: bill.get(field) for field in TEMPLATE_FIELDS},
+        "interval_days": interval_days(bill),
+        "materialized_through": _midnight(due),
+        "active": True,
+        "created_at": datetime.now().isoformat()
+    }
+    db.bill_series.update_one({"_id": series_id}, {"$setOnInsert": series}, upsert=True)
+    db.bills.update_one({"_id": bill["_id"]}, {"$set": {"series_id": series_id}})
+    return series
+
+
+def _occurrence(series, due):
+    bill = dict(series["template"])
+    bill.update({
+        "due_date": due.strftime("%Y-%m-%d"),
+        "due_at": due,
+        "paid": False,
+        "is_recurring": True,
+        "series_id": series["_id"],
+        "occurrence_key": f"{series['_id']}:{due.strftime('%Y-%m-%d')}",
+        "created_at": datetime.now().isoformat()
+    })
+    return bill
+
+
+def materialize_series(db, series, now=None, lead_days=None):
+    """
+    Creates the series' upcoming occurrences, due from today up to
+    now + lead_days, and advances materialized_through. Slots that are
+    already past (a series adopted or back-dated long ago, or one the job
+    has not reached for a while) are skipped, not created as overdue
+    bills. Returns the number of occurrences created.
+    """
+    now = now or datetime.now()
+    lead_days = RECURRENCE_LEAD_DAYS if lead_days is None else lead_days
+    horizon = now + timedelta(days=lead_days)
+    step = timedelta(days=series["interval_days"])
+
+    due = series["materialized_through"]
+    today = _midnight(now)
+    if due + step < today:
+        # Whole steps so that the next slot is the first on or after today
+        due = due + step * ((today - due - timedelta.resolution) // step)
+    upserts = []
+    while due + step <= horizon and len(upserts) < MAX_OCCURRENCES_PER_RUN:
+        due = due + step
+        occurrence = _occurrence(series, due)
+        upserts.append(UpdateOne(
+            {"occurrence_key": occurrence["occurrence_key"]},
+            {"$setOnInsert": occurrence},
+            upsert=True
+        ))
+    if due == series["materialized_through"]:
+        return 0
+
+    created = db.bills.bulk_write(upserts, ordered=False).upserted_count if upserts else 0
+    db.bill_series.update_one(
+        {"_id": series["_id"], "materialized_through": {"$lt": due}},
+        {"$set": {"materialized_through": due}}
+    )
+    return created
+
+
+def adopt_legacy_bills(db):
+    """
+    Bills made recurring before series existed were chained by creating the
+    next bill on payment. The unpaid tail of each such chain starts a series.
+    """
+    adopted = 0
+    for bill in db.bills.find({"is_recurring": True, "paid": {"$ne": True}, "series_id": {"$exists": False}}):
+        if create_series(db, bill):
+            adopted += 1
+    return adopted
+
+
+def materialize_recurring_bills(db, now=None, lead_days=None):
+    """Scheduled entry point: materializes every active series."""
+    adopted = adopt_legacy_bills(db)
+    created = 0
+    groups = set()
+    for series in db.bill_series.find({"active": True}):
+        count = materialize_series(db, series, now, lead_days)
+        if count:
+            created += count
+            groups.add(series["group_name"])
+    for group_name in groups:
+        group_changed(db, group_name, "bills")
+    return {"adopted": adopted, "created": created}
+
+
+def is_upcoming(bill, now=None):
+    """
+    Whether a bill is an unpaid occurrence due today or later. Deleting one
+    of those stops its series; deleting a past or paid occurrence is just
+    cleaning up history.
+    """
+    due = doc_datetime(bill, "due_date", "due_at")
+    return bool(due) and bill.get("paid") is not True and due >= _midnight(now or datetime.now())
+
+
+def end_series(db, series_id, after=None):
+    """
+    Deactivates a series and deletes its unpaid occurrences due after
+    after (all of them when it is None). Returns how many were deleted.
+    """
+    db.bill_series.update_one({"_id": series_id}, {"$set": {"active": False}})
+    query = {"series_id": series_id, "paid": {"$ne": True}}
+    if after:
+        query["due_at"] = {"$gt": after}
+    return db.bills.delete_many(query).deleted_count
+
+
+def series_edited(db, bill, update_data):
+    """
+    Applies a bill edit to its series. Turning recurrence off ends the
+    series and removes its unpaid future occurrences; other template
+    edits apply to occurrences materialized from now on. A bill made
+    recurring by the edit starts a new series, which is returned.
+    """
+    edited = {**bill, **update_data}
+    series_id = bill.get("series_id")
+    if not series_id:
+        if edited.get("is_recurring"):
+            series = create_series(db, edited)
+            if series:
+                materialize_series(db, series)
+            return series
+        return
+
+    if not edited.get("is_recurring"):
+        end_series(db, series_id, doc_datetime(edited, "due_date", "due_at"))
+        return
+
+    if "is_recurring" in update_data:
+        # Recurrence switched back on: restart the series from this bill
+        db.bill_series.update_one(
+            {"_id": series_id, "active": False},
+            {"$set": {"active": True, "materialized_through": _midnight(doc_datetime(edited, "due_date", "due_at"))}}
+        )
+    changes = {f"template.{field}": edited.get(field) for field in TEMPLATE_FIELDS if field in update_data}
+    if interval_days(edited):
+        changes["interval_days"] = interval_days(edited)
+    if changes:
+        db.bill_series.update_one({"_id": series_id}, {"$set": changes})
+
+
+if __name__ == "__main__":
+    db = get_db()
+    print(materialize_recurring_bills(db))
@@ -0,0 +1,159 @@
+"""
+Blob storage for uploads. BLOB_STORE picks the backend:
+
+    filesystem  files under MEDIA_ROOT, served as static files (default)
+    s3          any S3-compatible store (AWS S3, MinIO), via boto3
+
+Every replica sharing one S3 bucket sees the same files, so the API can
+run on more than one host. Writes are streamed (multipart above 8 MB).
+Reads never pass through Flask: public_url() points at the static
+handler or a public bucket, or at /files/<key>, which redirects to a
+presigned URL.
+
+    from service.storage import get_store
+    get_store().put("media/ab/abc.jpg", fileobj, "image/jpeg")
+"""
+import mimetypes
+import os
+import shutil
+import tempfile
+import threading
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BLOB_STORE = os.getenv("BLOB_STORE", "filesystem")
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join(PROJECT_ROOT, "static", "uploads"))
+MEDIA_URL = os.getenv("MEDIA_URL", "/static/uploads")
+S3_BUCKET = os.getenv("S3_BUCKET", "uploads")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # e.g. http://minio:9000
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+# Set when the bucket is publicly readable (or fronted by a CDN)
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")
+S3_PRESIGN_SECONDS = int(os.getenv("S3_PRESIGN_SECONDS", "3600"))
+
+# Stored objects never change under a key, so they may be cached forever
+IMMUTABLE = "public, max-age=31536000, immutable"
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def _content_type(key, content_type=None):
+    return content_type or mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+class FileSystemStore:
+    """Blobs as files under root, served from url_prefix."""
+
+    def __init__(self, root, url_prefix):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def put(self, key, fileobj, content_type=None):
+        """Copies fileobj into place; readers never see a partial file."""
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(fileobj, out, 64 * 1024)
+            # mkstemp creates 0600; the web server must be able to read it
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def open(self, key):
+        return open(self.path(key), "rb")
+
+    def delete(self, key):
+        if self.exists(key):
+            os.remove(self.path(key))
+
+    def public_url(self, key):
+        return f"{self.url_prefix}/{key}"
+
+    def url(self, key):
+        return self.public_url(key)
+
+
+class S3Store:
+    """Blobs in an S3-compatible bucket, read through presigned URLs."""
+
+    def __init__(self, client, bucket, public_base_url=None, presign_seconds=3600):
+        self.client = client
+        self.bucket = bucket
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.presign_seconds = presign_seconds
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except Exception as e:
+            # botocore's ClientError, without importing botocore here
+            code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if code in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def put(self, key, fileobj, content_type=None):
+        """Streams fileobj to the bucket, in parts when it is large."""
+        from boto3.s3.transfer import TransferConfig
+        self.client.upload_fileobj(
+            fileobj, self.bucket, key,
+            ExtraArgs={"ContentType": _content_type(key, content_type), "CacheControl": IMMUTABLE},
+            Config=TransferConfig(multipart_threshold=MULTIPART_CHUNK_SIZE, multipart_chunksize=MULTIPART_CHUNK_SIZE)
+        )
+
+    def open(self, key):
+        """Downloads to a temp file (spilling to disk past 8 MB) and returns it."""
+        out = tempfile.SpooledTemporaryFile(max_size=MULTIPART_CHUNK_SIZE)
+        self.client.download_fileobj(self.bucket, key, out)
+        out.seek(0)
+        return out
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def public_url(self, key):
+        """Stable URL to store in documents; presigned URLs expire."""
+        if self.public_base_url:
+            return f"{self.public_base_url}/{key}"
+        return f"/files/{key}"
+
+    def url(self, key):
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=self.presign_seconds
+        )
+
+
+def _s3_client():
+    import boto3
+    return boto3.client("s3", endpoint_url=S3_ENDPOINT_URL, region_name=S3_REGION)
+
+
+_lock = threading.Lock()
+_store = None
+_store_pid = None
+
+
+def get_store():
+    """This process's blob store, built from the environment on first use."""
+    global _store, _store_pid
+    pid = os.getpid()
+    with _lock:
+        if _store is None or _store_pid != pid:
+            if BLOB_STORE == "s3":
+                _store = S3Store(_s3_client(), S3_BUCKET, S3_PUBLIC_URL, S3_PRESIGN_SECONDS)
+            else:
+                _store = FileSystemStore(MEDIA_ROOT, MEDIA_URL)
+            _store_pid = pid
+        return _store
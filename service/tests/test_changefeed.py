@@ -0,0 +1,115 @@
+import asyncio
+from datetime import datetime
+from bson import ObjectId
+from service.changefeed import ChangeFeed
+
+
+class AsyncCursor:
+    """Async iteration over a list of documents"""
+
+    def __init__(self, docs):
+        self._iter = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._iter)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeGroups:
+    """groups collection whose revisions the test moves between polls"""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        names = query["name"]["$in"]
+        return AsyncCursor([dict(d) for d in self.docs if d["name"] in names])
+
+
+def _chore_change(group_name, task):
+    return {
+        "ns": {"coll": "chores"},
+        "operationType": "update",
+        "fullDocument": {
+            "_id": ObjectId(), "group_name": group_name, "task": task, "assigned_to": "sam",
+            "due_date": "2030-01-01", "due_at": datetime(2030, 1, 1), "status": "completed",
+            "completion_media": [{"media_url": "/old.jpg"}, {"media_url": "/new.jpg"}]
+        }
+    }
+
+
+def _revision_change(group_name, revision, changed):
+    return {
+        "ns": {"coll": "groups"},
+        "operationType": "update",
+        "fullDocument": {"name": group_name, "revision": revision, "changed": changed}
+    }
+
+
+def test_changes_fan_out_to_their_group():
+    async def run():
+        feed = ChangeFeed(db=None)
+        # Keep the watcher from starting; the test feeds changes itself
+        feed._task = asyncio.get_running_loop().create_future()
+        async with feed.subscribe("Apt A") as a, feed.subscribe("Apt A") as a2, feed.subscribe("Apt B") as b:
+            feed.dispatch(_chore_change("Apt A", "Mop"))
+            # The chore delta already told clients; no refetch for it
+            feed.dispatch(_revision_change("Apt A", 7, ["chores"]))
+            feed.dispatch(_revision_change("Apt A", 8, ["members"]))
+
+            event, chore = a.get_nowait()
+            assert event == "chore"
+            assert chore["task"] == "Mop" and chore["media_url"] == "/new.jpg"
+            assert chore["completion_media"] == [{"media_url": "/new.jpg"}]
+            assert a.get_nowait() == ("revision", {"revision": 8, "sections": ["members"]})
+            assert a.empty() and a2.qsize() == 2 and b.empty()
+        assert feed.subscribers == {}
+        feed._task.cancel()
+    asyncio.run(run())
+
+
+def test_slow_subscriber_is_told_to_refetch(monkeypatch):
+    monkeypatch.setattr("service.changefeed.SUBSCRIBER_QUEUE_SIZE", 2)
+
+    async def run():
+        feed = ChangeFeed(db=None)
+        feed._task = asyncio.get_running_loop().create_future()
+        async with feed.subscribe("Apt A") as queue:
+            for _ in range(3):
+                feed.dispatch(_chore_change("Apt A", "Mop"))
+            assert queue.qsize() == 1
+            assert queue.get_nowait() == ("revision", {"sections": []})
+        feed._task.cancel()
+    asyncio.run(run())
+
+
+def test_poller_reports_revision_changes():
+    """Standalone mongod: revisions of subscribed groups are polled"""
+    groups = [{"name": "Apt A", "revision": 3, "changed": ["bills"]}]
+
+    class FakeDb:
+        pass
+
+    db = FakeDb()
+    db.groups = FakeGroups(groups)
+
+    async def run():
+        feed = ChangeFeed(db, poll_seconds=0.01)
+        feed.mode = "poll"
+        async with feed.subscribe("Apt A") as queue:
+            await asyncio.sleep(0.05)
+            assert queue.empty()
+
+            groups[0].update(revision=4, changed=["bills"])
+            assert await asyncio.wait_for(queue.get(), 1) == ("revision", {"revision": 4, "sections": ["bills"]})
+
+            # Several writes between polls: only the last one's sections are known
+            groups[0].update(revision=6, changed=["events"])
+            assert await asyncio.wait_for(queue.get(), 1) == ("revision", {"revision": 6, "sections": []})
+        feed._task.cancel()
+    asyncio.run(run())
@@ -1,12 +1,21 @@
 import pytest
 from unittest.mock import MagicMock
-from service.logic import mark_chore_complete
+from service.logic import mark_chore_complete, reopen_chore, delete_chore
 from bson import ObjectId
+from service.users import profile_cache, roster_cache
 
 @pytest.fixture
 def mock_db():
     return MagicMock()
 
+@pytest.fixture(autouse=True)
+def clear_profile_cache():
+    profile_cache.clear()
+    roster_cache.clear()
+    yield
+    profile_cache.clear()
+    roster_cache.clear()
+
 def test_rotation_logic(mock_db):
     mock_db = MagicMock()
     id_alissa = ObjectId()
@@ -36,20 +45,20 @@ def test_rotation_logic(mock_db):
         {"username": "Reece", "group_name": "Apt A"}
     ]
 
-    mock_db.chores.find_one.return_value = fake_chore_doc
+    mock_db.chores.find_one_and_update.return_value = fake_chore_doc
     mock_db.groups.find_one.return_value = fake_group_doc
 
-    def get_user(query):
-        user_id = query.get("_id")
-        if user_id == id_alissa:
-            return {"_id": id_alissa, "username": "Alissa"}
-        elif user_id == id_khusboo:
-            return {"_id": id_khusboo, "username": "Khusboo"}
-        elif user_id == id_reece:
-            return {"_id": id_reece, "username": "Reece"}
-        return None
+    fake_users = [
+        {"_id": id_alissa, "username": "Alissa"},
+        {"_id": id_khusboo, "username": "Khusboo"},
+        {"_id": id_reece, "username": "Reece"}
+    ]
+
+    def find_users(query, projection=None):
+        wanted = query["_id"]["$in"]
+        return [u for u in fake_users if u["_id"] in wanted]
         
-    mock_db.users.find_one.side_effect = get_user
+    mock_db.users.find.side_effect = find_users
 
     result = mark_chore_complete(mock_db, fake_chore_id)
 
@@ -99,4 +108,360 @@ def test_calendar_aggregation(mock_db):
     assert len(calendar) == 2
     
     assert calendar[0]["title"] == "Sweep"
-    assert "Rent Due" in calendar[1]["title"]
\ No newline at end of file
+    assert "Rent Due" in calendar[1]["title"]
+
+def test_profile_cache_serves_warm_lookups(mock_db):
+    from service.users import resolve_users, user_saved
+
+    user_id = ObjectId()
+    mock_db.users.find.return_value = [{"_id": user_id, "username": "Majo", "email": "m@test.com"}]
+
+    assert resolve_users(mock_db, [str(user_id)])[str(user_id)]["username"] == "Majo"
+    assert resolve_users(mock_db, [str(user_id)])[str(user_id)]["username"] == "Majo"
+    assert mock_db.users.find.call_count == 1
+    assert profile_cache.stats()["hits"] == 1
+
+    # Updates are written through so the next read sees the new name
+    user_saved({"_id": user_id, "username": "Maria", "email": "m@test.com"})
+    assert resolve_users(mock_db, [str(user_id)])[str(user_id)]["username"] == "Maria"
+    assert mock_db.users.find.call_count == 1
+
+def test_calendar_window_pushdown(mock_db):
+    from service.logic import get_group_calendar
+
+    mock_db.rent.find_one.return_value = None
+    mock_db.bills.find.return_value = []
+    mock_db.chores.find.return_value = [{
+        "_id": "123", "task": "Sweep", "assigned_to": "Majo",
+        "due_date": "2020-03-10", "status": "pending"
+    }]
+
+    calendar = get_group_calendar(mock_db, "Apt A", "2020-03-01", "2020-04-01T00:00:00-05:00")
+
+    window = {"$gte": "2020-03-01", "$lt": "2020-04-01"}
+    assert mock_db.chores.find.call_args[0][0]["due_date"] == window
+    assert mock_db.bills.find.call_args[0][0]["due_date"] == window
+    assert mock_db.rent.find_one.call_args[0][0]["due_date"] == window
+    # Today is outside the window, so supplies are never read
+    assert not mock_db.supplies.find.called
+    assert [e["title"] for e in calendar] == ["Sweep"]
+
+def test_bill_visibility_pushed_into_query(mock_db):
+    from service.logic import analyze_bills
+
+    mock_db.bills.find.return_value = []
+
+    analyze_bills(mock_db, "Apt A", "user-1")
+
+    query = mock_db.bills.find.call_args[0][0]
+    assert query["group_name"] == "Apt A"
+    assert {"visibility": "only_me", "created_by": "user-1"} in query["$or"]
+    assert {"visibility": "custom", "visible_to": "user-1"} in query["$or"]
+
+def test_chores_classified_from_typed_due_date(mock_db):
+    from datetime import datetime, timedelta
+    from service.logic import analyze_chores
+
+    # due_at wins over a stale string; no string parsing is needed
+    mock_db.chores.find.return_value = [{
+        "_id": "123",
+        "task": "Dishes",
+        "assigned_to": "Majo",
+        "due_date": "2099-01-01",
+        "due_at": datetime.now() - timedelta(days=1),
+        "status": "pending"
+    }]
+
+    result = analyze_chores(mock_db, "Apt A")
+
+    assert result["chores"][0]["status"] == "OVERDUE"
+
+
+def test_chores_keyset_page(mock_db):
+    """Test that a chores page filters on the cursor and reports the next one"""
+    from service.logic import analyze_chores
+    after = ObjectId()
+    ids = [ObjectId() for _ in range(2)]
+    page = mock_db.chores.find.return_value.sort.return_value.limit
+    page.return_value = [
+        {"_id": i, "task": "Dishes", "assigned_to": "a", "due_date": "2030-01-01", "status": "pending"}
+        for i in ids
+    ]
+    
+    result = analyze_chores(mock_db, "TestGroup", after=str(after), limit=1)
+    
+    query = mock_db.chores.find.call_args[0][0]
+    assert query == {"group_name": "TestGroup", "_id": {"$lt": after}}
+    assert len(result["chores"]) == 1
+    assert result["next_cursor"] == str(ids[0])
+    
+    page.return_value = page.return_value[:1]
+    assert analyze_chores(mock_db, "TestGroup", limit=1)["next_cursor"] is None
+
+
+def test_chores_after_without_limit(mock_db):
+    """Test that a cursor still applies when no page size is given"""
+    from service.logic import analyze_chores
+    after = ObjectId()
+    mock_db.chores.find.return_value.sort.return_value = []
+
+    analyze_chores(mock_db, "TestGroup", after=str(after))
+
+    assert mock_db.chores.find.call_args[0][0] == {"group_name": "TestGroup", "_id": {"$lt": after}}
+    mock_db.chores.find.return_value.sort.assert_called_once_with("_id", -1)
+
+
+def test_archive_moves_old_completed_chores(mock_db):
+    """Test that old completed chores are copied to the archive before deletion"""
+    from service.archive import run_archive
+    mock_db.__getitem__.side_effect = lambda name: getattr(mock_db, name)
+    old = {"_id": ObjectId(), "group_name": "TestGroup", "status": "completed", "completed_by": "u1"}
+    mock_db.chores.find.return_value.limit.side_effect = [[old], []]
+    mock_db.bills.find.return_value.limit.return_value = []
+    
+    results = run_archive(mock_db, horizon_days=30)
+    
+    assert results == {"chores": 1, "bills": 0}
+    query = mock_db.chores.find.call_args[0][0]
+    assert query["status"] == "completed" and "$lt" in query["completed_at"]
+    mock_db.chores_archive.insert_many.assert_called_once_with([old], ordered=False)
+    mock_db.chores.delete_many.assert_called_once_with({"_id": {"$in": [old["_id"]]}})
+
+
+def test_completion_bumps_leaderboard_counters(mock_db):
+    """Test that completing a chore increments one counter per period bucket"""
+    from datetime import datetime
+    chore_id = ObjectId()
+    mock_db.chores.find_one_and_update.return_value = {
+        "_id": chore_id, "group_name": "TestGroup", "task": "Dishes", "status": "pending"
+    }
+    mock_db.users.find.return_value = []
+    
+    mark_chore_complete(mock_db, str(chore_id), "u1")
+    
+    updates = mock_db.leaderboard_counters.bulk_write.call_args[0][0]
+    periods = sorted(u._filter["period"] for u in updates)
+    now = datetime.now()
+    assert periods == sorted(["all", now.strftime("%Y-%m"), f"{now.isocalendar()[0]}-W{now.isocalendar()[1]:02d}"])
+    assert all(u._doc == {"$inc": {"count": 1}} and u._upsert for u in updates)
+    
+    # Completing it again fails the status precondition and must not count twice
+    mock_db.leaderboard_counters.bulk_write.reset_mock()
+    mock_db.chores.find_one_and_update.return_value = None
+    mock_db.chores.count_documents.return_value = 1
+    assert mark_chore_complete(mock_db, str(chore_id), "u1") == {"error": "Chore already completed"}
+    assert not mock_db.leaderboard_counters.bulk_write.called
+
+
+def test_reopen_and_delete_take_back_completion(mock_db):
+    """Test that reopening or deleting a completed chore decrements its counters"""
+    chore_id = ObjectId()
+    completed = {
+        "_id": chore_id, "group_name": "TestGroup", "task": "Dishes", "status": "completed",
+        "completed_by": "u1", "completed_at": "2024-03-05T10:00:00"
+    }
+    mock_db.chores.find_one_and_update.return_value = dict(completed)
+
+    assert reopen_chore(mock_db, str(chore_id)) == {"message": "Chore reopened."}
+    query, update = mock_db.chores.find_one_and_update.call_args[0]
+    assert query["status"] == "completed" and update["$set"] == {"status": "pending"}
+    updates = mock_db.leaderboard_counters.bulk_write.call_args[0][0]
+    assert sorted(u._filter["period"] for u in updates) == ["2024-03", "2024-W10", "all"]
+    assert all(u._doc == {"$inc": {"count": -1}} and u._filter["user_id"] == "u1" for u in updates)
+    mock_db.leaderboard_counters.delete_many.assert_called_once_with(
+        {"group_name": "TestGroup", "user_id": "u1", "count": {"$lte": 0}}
+    )
+
+    mock_db.leaderboard_counters.reset_mock()
+    mock_db.chores.find_one_and_delete.return_value = dict(completed)
+    assert delete_chore(mock_db, str(chore_id)) == {"message": "Chore deleted."}
+    assert mock_db.leaderboard_counters.bulk_write.called
+
+    # A pending chore was never counted
+    mock_db.leaderboard_counters.reset_mock()
+    mock_db.chores.find_one_and_delete.return_value = {"_id": chore_id, "group_name": "TestGroup", "status": "pending"}
+    delete_chore(mock_db, str(chore_id))
+    assert not mock_db.leaderboard_counters.bulk_write.called
+
+
+def test_backfill_merges_counts_and_marks_done_last(mock_db):
+    """Test that a backfill claims the group, merges with $max and only then marks it done"""
+    from datetime import datetime
+    from pymongo.errors import DuplicateKeyError
+    from service.leaderboard import backfill_group
+    mock_db.chores.find.return_value = [
+        {"group_name": "TestGroup", "completed_by": "u1", "completed_at": "2024-03-05T10:00:00"}
+    ]
+    mock_db.chores_archive.find.return_value = []
+    
+    assert backfill_group(mock_db, "TestGroup", now=datetime(2024, 4, 1)) is True
+    
+    claim, marker_update = mock_db.leaderboard_counters.update_one.call_args_list[0][0]
+    assert claim["done"] == {"$ne": True} and marker_update["$set"] == {"claimed_at": datetime(2024, 4, 1)}
+    updates = mock_db.leaderboard_counters.bulk_write.call_args[0][0]
+    assert sorted(u._filter["period"] for u in updates) == ["2024-03", "2024-W10", "all"]
+    assert all(u._doc == {"$max": {"count": 1}} and u._upsert for u in updates)
+    assert not mock_db.leaderboard_counters.delete_many.called
+    done = mock_db.leaderboard_counters.update_one.call_args_list[-1][0]
+    assert done == ({"group_name": "TestGroup", "period": "backfilled"}, {"$set": {"done": True}, "$unset": {"claimed_at": ""}})
+    
+    # A failed backfill releases its claim instead of marking the group done
+    mock_db.leaderboard_counters.reset_mock()
+    mock_db.leaderboard_counters.bulk_write.side_effect = RuntimeError("write failed")
+    with pytest.raises(RuntimeError):
+        backfill_group(mock_db, "TestGroup")
+    released = mock_db.leaderboard_counters.update_one.call_args_list[-1][0][1]
+    assert released == {"$unset": {"claimed_at": ""}}
+    
+    # Done, or claimed by someone else: nothing to do
+    mock_db.leaderboard_counters.reset_mock()
+    mock_db.leaderboard_counters.update_one.side_effect = DuplicateKeyError("dup")
+    assert backfill_group(mock_db, "TestGroup") is False
+    assert not mock_db.leaderboard_counters.bulk_write.called
+
+
+def test_concurrent_completions_rotate_once(mock_db):
+    """Test that racing completions of one recurring chore create exactly one successor"""
+    import threading
+    chore_id = ObjectId()
+    roommates = [ObjectId(), ObjectId()]
+    chore = {
+        "_id": chore_id, "task": "Trash", "group_name": "Apt A", "assigned_to": "",
+        "status": "pending", "is_recurring": True, "frequency_days": 7
+    }
+    lock = threading.Lock()
+
+    def find_one_and_update(query, update, projection=None, return_document=None):
+        # Mimics the server applying the status precondition atomically
+        with lock:
+            if chore["status"] == query["status"]["$ne"]:
+                return None
+            before = dict(chore)
+            chore.update(update["$set"])
+            return before
+
+    mock_db.chores.find_one_and_update.side_effect = find_one_and_update
+    mock_db.chores.count_documents.return_value = 1
+    mock_db.groups.find_one.return_value = {"name": "Apt A", "roommates": roommates}
+    mock_db.users.find.return_value = []
+
+    barrier = threading.Barrier(8)
+    results = []
+
+    def complete():
+        barrier.wait()
+        results.append(mark_chore_complete(mock_db, str(chore_id), str(roommates[0])))
+
+    threads = [threading.Thread(target=complete) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert mock_db.chores.insert_one.call_count == 1
+    assert sum(1 for r in results if "message" in r) == 1
+    assert sum(1 for r in results if r.get("error") == "Chore already completed") == 7
+
+
+def test_completion_media_is_pushed(mock_db):
+    """Test that completion media is appended with $push instead of rewriting the list"""
+    chore_id = ObjectId()
+    mock_db.chores.find_one_and_update.return_value = {
+        "_id": chore_id, "group_name": "TestGroup", "task": "Dishes", "status": "pending"
+    }
+    
+    mark_chore_complete(mock_db, str(chore_id), None, "/static/uploads/done.jpg")
+    
+    query, update = mock_db.chores.find_one_and_update.call_args[0]
+    assert query == {"_id": chore_id, "status": {"$ne": "completed"}}
+    assert update["$push"]["completion_media"]["media_url"] == "/static/uploads/done.jpg"
+    assert update["$set"]["media_url"] == "/static/uploads/done.jpg"
+    assert not mock_db.chores.find_one.called
+
+
+def test_recurring_bills_materialized_with_idempotency_keys(mock_db):
+    """Test that the materializer upserts occurrences by key and advances the series"""
+    from datetime import datetime
+    from service.recurrence import materialize_series
+    series = {
+        "_id": "s1",
+        "group_name": "TestGroup",
+        "template": {"name": "Internet", "amount": 50.0, "group_name": "TestGroup"},
+        "interval_days": 7,
+        "materialized_through": datetime(2030, 1, 1)
+    }
+    
+    materialize_series(mock_db, series, now=datetime(2030, 1, 4), lead_days=14)
+    
+    upserts = mock_db.bills.bulk_write.call_args[0][0]
+    keys = [u._filter["occurrence_key"] for u in upserts]
+    assert keys == ["s1:2030-01-08", "s1:2030-01-15"]
+    assert all(u._upsert and "$setOnInsert" in u._doc for u in upserts)
+    assert upserts[1]._doc["$setOnInsert"]["due_at"] == datetime(2030, 1, 15)
+    assert upserts[1]._doc["$setOnInsert"]["paid"] is False
+    query, update = mock_db.bill_series.update_one.call_args[0]
+    assert query == {"_id": "s1", "materialized_through": {"$lt": datetime(2030, 1, 15)}}
+    assert update == {"$set": {"materialized_through": datetime(2030, 1, 15)}}
+
+
+def test_stale_series_skips_past_occurrences(mock_db):
+    """Test that a series materialized months ago resumes at today, not with overdue bills"""
+    from datetime import datetime
+    from service.recurrence import materialize_series
+    series = {
+        "_id": "s1",
+        "group_name": "TestGroup",
+        "template": {"name": "Internet", "amount": 50.0, "group_name": "TestGroup"},
+        "interval_days": 7,
+        "materialized_through": datetime(2030, 1, 1)
+    }
+    mock_db.bills.bulk_write.return_value.upserted_count = 1
+    
+    created = materialize_series(mock_db, series, now=datetime(2030, 4, 1, 9, 30), lead_days=7)
+    
+    assert created == 1
+    upserts = mock_db.bills.bulk_write.call_args[0][0]
+    # 2030-04-02 is the first weekly slot on or after 2030-04-01
+    assert [u._filter["occurrence_key"] for u in upserts] == ["s1:2030-04-02"]
+    query, update = mock_db.bill_series.update_one.call_args[0]
+    assert update == {"$set": {"materialized_through": datetime(2030, 4, 2)}}
+    
+    # Nothing due within the lead time yet: the skipped slots are still recorded
+    mock_db.reset_mock()
+    created = materialize_series(mock_db, series, now=datetime(2030, 4, 1), lead_days=0)
+    assert created == 0 and not mock_db.bills.bulk_write.called
+    assert mock_db.bill_series.update_one.call_args[0][1] == {"$set": {"materialized_through": datetime(2030, 3, 26)}}
+
+
+def test_chore_list_projects_latest_media(mock_db):
+    """Test that the chores list reads only listed fields and the newest media entry"""
+    from service.logic import analyze_chores
+    mock_db.chores.find.return_value = []
+
+    analyze_chores(mock_db, "Apt A")
+
+    projection = mock_db.chores.find.call_args[0][1]
+    assert projection["completion_media"] == {"$slice": -1}
+    assert "group_name" not in projection
+
+
+def test_periodic_job_runs_at_startup(caplog):
+    """Test that a scheduled job runs once right away and logs its failures"""
+    import logging
+    import threading
+    from service.jobs import start_periodic
+    ran = threading.Event()
+
+    def job():
+        ran.set()
+        raise RuntimeError("boom")
+
+    with caplog.at_level(logging.ERROR, logger="service.jobs"):
+        stop = start_periodic("test-job", 24, job)
+        assert ran.wait(1)
+        stop.set()
+        for _ in range(100):
+            if caplog.records:
+                break
+            threading.Event().wait(0.01)
+    assert "test-job run failed" in caplog.text
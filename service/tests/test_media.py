@@ -0,0 +1,47 @@
+import io
+import pytest
+from unittest.mock import MagicMock
+from service import media
+from service.storage import FileSystemStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Keep uploads in a throwaway directory"""
+    return FileSystemStore(str(tmp_path), "/static/uploads")
+
+
+def test_uploads_are_content_addressed(store):
+    first = media.save_upload(io.BytesIO(b"same bytes"), "Photo.JPG", store=store)
+    second = media.save_upload(io.BytesIO(b"same bytes"), "other name.jpg", store=store)
+
+    assert first == second
+    assert first.startswith("media/") and first.endswith(".jpg")
+    assert store.open(first).read() == b"same bytes"
+    assert media.save_upload(io.BytesIO(b"different"), "Photo.JPG", store=store) != first
+
+
+def test_videos_get_no_variants(store):
+    key = media.save_upload(io.BytesIO(b"not an image"), "clip.mp4", store=store)
+    assert media.render_variants(key, store) == {}
+
+
+def test_image_variants_recorded_on_chores(store):
+    Image = pytest.importorskip("PIL.Image")
+    buffer = io.BytesIO()
+    Image.new("RGB", (2000, 1000), "red").save(buffer, "PNG")
+    buffer.seek(0)
+    key = media.save_upload(buffer, "big.png", store=store)
+    db = MagicMock()
+
+    variants = media.process_upload(db, key, store)
+
+    with Image.open(store.path(variants["thumbnail"])) as thumb:
+        assert max(thumb.size) == media.VARIANTS["thumbnail"]
+    url = store.public_url(key)
+    query, update = db.chores.update_many.call_args_list[0][0]
+    assert query == {"media_url": url}
+    assert update["$set"]["thumbnail_url"] == store.public_url(variants["thumbnail"])
+    query, update = db.chores.update_many.call_args_list[1][0]
+    assert query == {"completion_media.media_url": url}
+    assert "completion_media.$[m].web_url" in update["$set"]
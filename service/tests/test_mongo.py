@@ -0,0 +1,50 @@
+import pytest
+from service import mongo
+
+
+@pytest.fixture(autouse=True)
+def fresh_factory(monkeypatch):
+    """Start every test without a cached client"""
+    monkeypatch.setattr(mongo, "_client", None)
+    monkeypatch.setattr(mongo, "_client_pid", None)
+    yield
+
+
+def test_client_shared_within_process():
+    assert mongo.get_client() is mongo.get_client()
+    assert mongo.db.chores.full_name == f"{mongo.MONGO_DB_NAME}.chores"
+
+
+def test_new_client_after_fork(monkeypatch):
+    """A forked worker must not reuse the parent's client or its pool"""
+    parent = mongo.get_client()
+    monkeypatch.setattr(mongo.os, "getpid", lambda: -1)
+    child = mongo.get_client()
+    assert child is not parent
+    assert mongo.get_client() is child
+    assert mongo.pool_stats()["pid"] == -1
+
+
+def test_settings_from_environment(monkeypatch):
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "7")
+    monkeypatch.setenv("MONGO_WRITE_CONCERN", "majority")
+    monkeypatch.setenv("MONGO_READ_PREFERENCE", "secondaryPreferred")
+    settings = mongo.client_settings()
+    assert settings["maxPoolSize"] == 7
+    assert settings["w"] == "majority"
+    client = mongo.get_client()
+    assert client.options.pool_options.max_pool_size == 7
+    assert client.read_preference.mongos_mode == "secondaryPreferred"
+
+
+def test_pool_stats_count_checkouts():
+    mongo.get_client()
+    stats = mongo._stats
+    stats.connection_created(None)
+    stats.connection_checked_out(None)
+    stats.connection_checked_out(None)
+    stats.connection_checked_in(None)
+    snapshot = mongo.pool_stats()
+    assert snapshot["connections_open"] == 1
+    assert snapshot["checked_out"] == 1
+    assert snapshot["max_pool_size"] == mongo.client_settings()["maxPoolSize"]
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from bson.objectid import ObjectId
+
+# Only the fields the UI actually displays for a user
+USER_PROFILE_FIELDS = {"username": 1, "email": 1}
+
+
+class ProfileCache:
+    """
+    Bounded LRU cache of user profile projections with a per-entry TTL.
+    Usernames and emails almost never change, so hot endpoints can serve
+    them from process memory instead of querying db.users every request.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id, profile):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, profile)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+profile_cache = ProfileCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("USER_CACHE_TTL", 300))
+)
+
+# Roommate id lists keyed by group name, for chore rotation
+roster_cache = ProfileCache(
+    maxsize=int(os.getenv("ROSTER_CACHE_SIZE", 256)),
+    ttl=float(os.getenv("ROSTER_CACHE_TTL", 60))
+)
+
+
+def _to_object_ids(user_ids):
+    """Converts user id strings to ObjectIds, skipping anything invalid."""
+    object_ids = []
+    for user_id in user_ids:
+        if not user_id:
+            continue
+        try:
+            object_ids.append(ObjectId(user_id))
+        except Exception:
+            pass
+    return object_ids
+
+
+def _profile(user):
+    return {
+        "username": user.get("username", ""),
+        "email": user.get("email", "")
+    }
+
+
+def _split_cached(user_ids):
+    """Returns (cached profiles, ObjectIds still to fetch) for a lookup."""
+    users = {}
+    missing = []
+    for user_id in set(str(u) for u in user_ids if u):
+        profile = profile_cache.get(user_id)
+        if profile is None:
+            missing.append(user_id)
+        else:
+            users[user_id] = profile
+    return users, _to_object_ids(missing)
+
+
+def _remember(users, user):
+    user_id = str(user["_id"])
+    users[user_id] = _profile(user)
+    profile_cache.put(user_id, users[user_id])
+
+
+def resolve_users(db, user_ids):
+    """
+    Returns a dict mapping the string user id to {"username", "email"}.
+    Profiles come from the process cache where possible; all misses are
+    fetched with a single $in query. Unknown or invalid ids are simply
+    missing from the result.
+    """
+    users, object_ids = _split_cached(user_ids)
+    if not object_ids:
+        return users
+
+    for user in db.users.find({"_id": {"$in": object_ids}}, USER_PROFILE_FIELDS):
+        _remember(users, user)
+    return users
+
+
+async def resolve_users_async(db, user_ids):
+    """resolve_users for an async database handle; shares the same cache."""
+    users, object_ids = _split_cached(user_ids)
+    if not object_ids:
+        return users
+
+    async for user in db.users.find({"_id": {"$in": object_ids}}, USER_PROFILE_FIELDS):
+        _remember(users, user)
+    return users
+
+
+def get_username(db, user_id, default=None):
+    """Looks up a single username through the profile cache."""
+    if not user_id:
+        return default
+    user = resolve_users(db, [user_id]).get(str(user_id))
+    return user["username"] if user else default
+
+
+def user_saved(user):
+    """
+    Write-through hook for user creates and updates: replaces the cached
+    profile so readers never see a stale username or email.
+    """
+    profile_cache.put(str(user["_id"]), _profile(user))
+
+
+def roommates_info(roommate_ids, users):
+    """Builds the roommates_info list for a group from a resolve_users() map."""
+    info = []
+    for rm_id in roommate_ids:
+        user = users.get(str(rm_id))
+        if user:
+            info.append({
+                "user_id": str(rm_id),
+                "username": user["username"],
+                "email": user["email"]
+            })
+    return info
+
+
+def group_roster(db, group_name):
+    """
+    Returns the group's roommate ids through the roster cache, or None if
+    the group does not exist. Membership changes call roster_changed();
+    the TTL bounds staleness across processes.
+    """
+    roster = roster_cache.get(group_name)
+    if roster is None:
+        group = db.groups.find_one({"name": group_name}, {"roommates": 1})
+        if not group:
+            return None
+        roster = list(group.get("roommates", []))
+        roster_cache.put(group_name, roster)
+    return roster
+
+
+def roster_changed(group_name):
+    """Drops a group's cached roster after roommates are added or removed."""
+    if group_name:
+        roster_cache.invalidate(group_name)
@@ -0,0 +1,47 @@
+"""
+Who in a group sees a bill or calendar event. The list endpoints filter
+with these rules, and the shared dashboard snapshot holds exactly the
+documents VISIBLE_TO_ALL matches, so the two never disagree.
+"""
+
+# A missing visibility field means everyone in the group can see the item.
+# An explicit null does not: bills with it are hidden, events treat it as custom.
+VISIBLE_TO_ALL = [{"visibility": "all"}, {"visibility": {"$exists": False}}]
+
+
+def visible_to_all(doc):
+    """VISIBLE_TO_ALL for a document already in hand."""
+    return doc.get("visibility", "all") == "all"
+
+
+def bill_visibility_filter(user_id=None):
+    """
+    Compiles the bill visibility rules into a Mongo filter:
+    - "all": everyone in the group sees it
+    - "only_me": only the creator sees it
+    - "custom": only users listed in visible_to see it
+    Without a user_id every bill is visible (for backward compatibility).
+    """
+    if not user_id:
+        return {}
+    return {"$or": VISIBLE_TO_ALL + [
+        {"visibility": "only_me", "created_by": user_id},
+        {"visibility": "custom", "visible_to": user_id}
+    ]}
+
+
+def event_visibility_filter(user_id=None):
+    """
+    Compiles the calendar event visibility rules into a Mongo filter. Any
+    visibility other than "all"/"only_me" is treated as custom, and a custom
+    event with no visible_to list falls back to its creator only.
+    """
+    if not user_id:
+        return {}
+    custom = {"$nin": ["all", "only_me"]}
+    return {"$or": VISIBLE_TO_ALL + [
+        {"visibility": "only_me", "created_by": user_id},
+        {"visibility": custom, "visible_to": user_id},
+        {"visibility": custom, "visible_to": {"$size": 0}, "created_by": user_id},
+        {"visibility": custom, "visible_to": None, "created_by": user_id}
+    ]}
@@ -0,0 +1,25 @@
+"""
+Write helpers that hand back the written document, so routes respond
+without a second round trip to read it again.
+"""
+from pymongo import ReturnDocument
+
+
+def insert_document(collection, doc):
+    """
+    Inserts doc and returns it with its new _id. The document sent is the
+    document stored, so there is nothing to re-read.
+    """
+    result = collection.insert_one(doc)
+    doc["_id"] = result.inserted_id
+    return doc
+
+
+def update_document(collection, query, update, projection=None):
+    """
+    Applies update to the first match and returns the document as it is
+    after the update, or None if nothing matched.
+    """
+    return collection.find_one_and_update(
+        query, update, projection=projection, return_document=ReturnDocument.AFTER
+    )
@@ -69,7 +69,14 @@ function setButtonLoading(button, loading = true) {
 }
 
 /* ---------- API wrappers ---------- */
-async function apiFetch(path, opts = {}) {
+/* Last ETag, body and next-page cursor per GET path and token. Re-fetches
+   send the ETag back; a 304 means nothing changed, so the stored body is
+   reused. */
+const etagCache = new Map();
+
+/* Resolves to { data, cursor }: the parsed body and the X-Next-Cursor
+   header that paged list endpoints send. */
+async function apiRequest(path, opts = {}) {
   showSpinner();
   const headers = opts.headers || {};
   if (!headers["Content-Type"] && !(opts.body instanceof FormData)) {
@@ -77,30 +84,140 @@ async function apiFetch(path, opts = {}) {
   }
   const token = getToken();
   if (token) headers["Authorization"] = "Bearer " + token;
+  const cacheKey = (opts.method || "GET").toUpperCase() === "GET" ? `${token}|${path}` : null;
+  const cached = cacheKey && etagCache.get(cacheKey);
+  if (cached) headers["If-None-Match"] = cached.etag;
   opts.headers = headers;
   try {
     const res = await fetch(API_ROOT + path, opts);
-    const text = await res.text();
+    let text = await res.text();
     hideSpinner();
-    if (!text) return null;
+    let cursor = res.headers.get("X-Next-Cursor");
+    if (res.status === 304 && cached) {
+      text = cached.text;
+      cursor = cached.cursor;
+    }
+    if (!text) return { data: null, cursor };
     let data;
     try { data = JSON.parse(text); } catch(e) { data = text; }
-    if (!res.ok) {
+    if (!res.ok && res.status !== 304) {
       const err = data.error || data.message || res.statusText;
       throw new Error(err);
     }
-    return data;
+    const etag = res.headers.get("ETag");
+    if (cacheKey && etag && res.status === 200) etagCache.set(cacheKey, { etag, text, cursor });
+    return { data, cursor };
   } catch (err) {
     hideSpinner();
     throw err;
   }
 }
+async function apiFetch(path, opts = {}) { return (await apiRequest(path, opts)).data; }
 async function apiGet(path) { return apiFetch(path, { method: "GET" }); }
 async function apiPost(path, body) { return apiFetch(path, { method: "POST", body: JSON.stringify(body) }); }
 async function apiPostFormData(path, formData) { return apiFetch(path, { method: "POST", body: formData }); }
 async function apiPatch(path, body) { return apiFetch(path, { method: "PATCH", body: JSON.stringify(body) }); }
 async function apiDelete(path) { return apiFetch(path, { method: "DELETE" }); }
 
+/* Follow X-Next-Cursor through a paginated list endpoint. The list is the
+   body itself, or its listKey field for group lists. onPage(items, data)
+   runs after every page with everything fetched so far, so the page can
+   render progressively. Resolves to the last response with the full list. */
+async function apiGetPaged(path, listKey, onPage, pageSize = 50) {
+  let items = [];
+  let after = null;
+  let data;
+  do {
+    const sep = path.includes("?") ? "&" : "?";
+    const page = await apiRequest(`${path}${sep}limit=${pageSize}` + (after ? `&after=${encodeURIComponent(after)}` : ""), { method: "GET" });
+    data = page.data;
+    items = items.concat((Array.isArray(data) ? data : data[listKey]) || []);
+    after = page.cursor;
+    if (onPage) onPage(items, data);
+  } while (after);
+  return Array.isArray(data) ? items : { ...data, [listKey]: items };
+}
+
+/* ---------- Live updates ---------- */
+/* Seconds between full refetches when the change feed is not served */
+const LIVE_POLL_SECONDS = 30;
+
+/* Follows the group's server-sent event feed. onEvent(type, data) gets
+   "chore" deltas and "revision" events whose data.sections names what
+   changed (empty: refetch everything). EventSource cannot send the
+   Authorization header, so the stream is read through fetch. Reconnects
+   with backoff, and asks for a full refetch after a gap. When the feed
+   is not served it warns on the console and falls back to a refetch
+   every LIVE_POLL_SECONDS, which the ETags make cheap. Returns an
+   unsubscribe function. */
+function subscribeGroup(groupName, onEvent) {
+  const controller = new AbortController();
+  let delay = 1000;
+  let reconnecting = false;
+  let pollTimer = null;
+
+  function fallBackToPolling(reason) {
+    console.warn(`Live updates unavailable (${reason}); refreshing every ${LIVE_POLL_SECONDS}s instead`);
+    pollTimer = setInterval(() => onEvent("revision", { sections: [] }), LIVE_POLL_SECONDS * 1000);
+  }
+
+  function dispatch(block) {
+    let type = "message";
+    let data = "";
+    for (const line of block.split("\n")) {
+      if (line.startsWith("event:")) type = line.slice(6).trim();
+      else if (line.startsWith("data:")) data += line.slice(5).trim();
+    }
+    if (data) onEvent(type, JSON.parse(data));
+  }
+
+  async function connect() {
+    try {
+      const res = await fetch(`${API_ROOT}/groups/${encodeURIComponent(groupName)}/stream`, {
+        headers: { "Authorization": "Bearer " + getToken(), "Accept": "text/event-stream" },
+        signal: controller.signal
+      });
+      if (!res.ok || !res.body) {
+        if (res.status < 500) {
+          fallBackToPolling(res.ok ? "streaming not supported" : `HTTP ${res.status}`);
+          return;
+        }
+      } else {
+        if (reconnecting) onEvent("revision", { sections: [] });
+        delay = 1000;
+        const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = "";
+        while (true) {
+          const { value, done } = await reader.read();
+          if (done) break;
+          buffer += value;
+          let end;
+          while ((end = buffer.indexOf("\n\n")) >= 0) {
+            dispatch(buffer.slice(0, end));
+            buffer = buffer.slice(end + 2);
+          }
+        }
+      }
+    } catch (err) {
+      if (controller.signal.aborted) return;
+    }
+    reconnecting = true;
+    setTimeout(connect, delay);
+    delay = Math.min(delay * 2, 30000);
+  }
+
+  connect();
+  return () => {
+    controller.abort();
+    if (pollTimer) clearInterval(pollTimer);
+  };
+}
+
+/* Whether a revision event touches any of the sections a page shows */
+function touchesSections(data, sections) {
+  return !data.sections || !data.sections.length || data.sections.some(s => sections.includes(s));
+}
+
 /* ---------- Modal helpers ---------- */
 function openModal(modalId) {
   const el = document.getElementById(modalId + "-backdrop");